@@ -27,6 +27,7 @@ setup(name='macleod',
             'check_consistency_all=macleod.scripts.check_consistency_all:main',
             'check_nontrivial_consistency=macleod.scripts.check_nontrivial_consistency:main',
             'delete_output=macleod.scripts.delete_output:main',
+            'clear_cache=macleod.scripts.clear_cache:main',
             'prove_lemma=macleod.scripts.prove_lemma:main',
             'prove_lemma_all=macleod.scripts.prove_lemma_all:main',
             # clif_converter is now deprecated
@@ -13,7 +13,8 @@ options_files = []
 
 
 def get_system_command(system_name, ontology):
-    """chooses the correct constructor that sets the command up depending on the selected system"""
+    """chooses the correct constructor that sets the command up depending on the selected system.
+    Returns the arguments of the command and the position of the time limit among them."""
     handlers = {
         "prover9": get_p9_cmd, 
         "mace4":  get_m4_cmd,
@@ -34,9 +35,10 @@ def get_p9_cmd (ontology):
 
     args = []
     args.append(filemgt.read_config('prover9','command'))
+    timeout = len(args)
     args.append('-t' + filemgt.read_config('prover9','timeout'))
     args.append('-f')
-    args.append(ontology.write_ladr_file())
+    args.append(ontology.write_ladr_file(skip_unchanged=True))
 
     # check for possible options file (to change predicate order or other parameters)
     options_file = filemgt.read_config('prover9', 'options')
@@ -45,7 +47,7 @@ def get_p9_cmd (ontology):
         options_file = os.path.abspath(options_file)
         args.append(options_file)
 
-    return args
+    return args, timeout
 
 
 def get_m4_cmd (ontology):
@@ -54,14 +56,15 @@ def get_m4_cmd (ontology):
     args = []
     args.append(filemgt.read_config('mace4','command'))
     args.append('-v0')
+    timeout = len(args)
     args.append('-t' + filemgt.read_config('mace4','timeout'))
     args.append('-s' + filemgt.read_config('mace4','timeout_per'))
     args.append('-n' + filemgt.read_config('mace4','start_size'))
     args.append('-N' + filemgt.read_config('mace4','end_size'))
     args.append('-f')
-    args.append(ontology.write_ladr_file())
+    args.append(ontology.write_ladr_file(skip_unchanged=True))
 
-    return args
+    return args, timeout
 
 
 def get_paradox_cmd (ontology):
@@ -74,14 +77,15 @@ def get_paradox_cmd (ontology):
     if option is not None:
         args.append(option)
     args.append('--time')
+    timeout = len(args)
     args.append(filemgt.read_config('paradox','timeout'))
     args.append('--verbose')
     args.append('2')
     args.append('--model')
     args.append('--tstp')
-    args.append(ontology.write_tptp_file())
+    args.append(ontology.write_tptp_file(skip_unchanged=True))
 
-    return args
+    return args, timeout
 
 
 def get_vampire_cmd (ontology):
@@ -92,15 +96,16 @@ def get_vampire_cmd (ontology):
     args.append('--proof')
     args.append('tptp')
     args.append('-t')
+    timeout = len(args)
     args.append(filemgt.read_config('vampire','timeout'))
     # needed for Windows
     args.append('--input_file')
-    args.append(ontology.write_tptp_file())
+    args.append(ontology.write_tptp_file(skip_unchanged=True))
     #logging.getLogger(__name__).debug("COMMAND FOR vampire IS " + str(args))
     # works for linux, not for Windows
     #return (args, [list(imports)[0].get_module_set(imports).get_single_tptp_file(imports)])
 
-    return args
+    return args, timeout
 
 
 
@@ -27,15 +27,7 @@ class MacleodConfigParser(object):
     def __new__(cls):
         """ instantiating a single instance of a ConfigParser if it doesn't already exist"""
         if MacleodConfigParser.__instance is None:
-            config_file = MacleodConfigParser.__config_dir
-
-            if str(platform.system()) == 'Windows':
-                config_file = os.path.join(config_file, WIN_config_file)
-            elif str(platform.system()) == 'Darwin':
-                config_file = os.path.join(config_file, MAC_config_file)
-            else:
-                config_file = os.path.join(config_file, LINUX_config_file)
-            config_file = os.path.abspath(config_file)
+            config_file = find_config_file(MacleodConfigParser.__config_dir)
 
             if os.path.isfile(config_file):
                 MacleodConfigParser.__config_file = config_file
@@ -70,8 +62,22 @@ class MacleodConfigParser(object):
 
 
 
+def find_config_file(config_dir=None):
+    """Return the path of the MacLeod configuration file for this platform, which need not exist."""
+    if config_dir is None:
+        config_dir = str(Path.home().joinpath('macleod'))
+
+    if str(platform.system()) == 'Windows':
+        config_file = os.path.join(config_dir, WIN_config_file)
+    elif str(platform.system()) == 'Darwin':
+        config_file = os.path.join(config_dir, MAC_config_file)
+    else:
+        config_file = os.path.join(config_dir, LINUX_config_file)
+    return os.path.abspath(config_file)
+
+
 def read_config(section, key, file=None):
-    from configparser import NoOptionError
+    from configparser import NoOptionError, NoSectionError
 
     """read a value from the MacLeod configuration file."""
     if file is None:
@@ -80,6 +86,8 @@ def read_config(section, key, file=None):
             return mcp.get(section, key)
         except NoOptionError as e:
             logging.getLogger(__name__).warning('COULD NOT FIND OPTION: ' + key + ' in section ' + section)
+        except NoSectionError as e:
+            logging.getLogger(__name__).warning('COULD NOT FIND SECTION: ' + section)
     else:
         CONFIG_PARSER_TEMP = ConfigParser()
         if os.path.isfile(file):
@@ -88,6 +96,8 @@ def read_config(section, key, file=None):
                 return CONFIG_PARSER_TEMP.get(section,key)
             except NoOptionError as e:
                 logging.getLogger(__name__).warning('COULD NOT FIND OPTION: ' + key + ' in section ' + section)
+            except NoSectionError as e:
+                logging.getLogger(__name__).warning('COULD NOT FIND SECTION: ' + section)
     return None
 
 
@@ -3,18 +3,31 @@ Top level container for an ontology parsed into the object structure
 """
 
 
+import array
+import concurrent.futures
+import gzip
+import hashlib
 import logging
 import os
 
 import macleod.ReasonerSet
 import macleod.dl.owl
 import macleod.logical.axiom
+import macleod.logical.emitter
+import macleod.logical.normal_form
+import macleod.logical.symbol
+import macleod.logical.symbol_table
+import macleod.parsing.registry
+import macleod.parsing.snapshot
 
 import macleod.Filemgt
 import macleod.Process
 import macleod.dl.filters
 import macleod.dl.translation
 
+# Size of the buffer of output files in bytes
+OUTPUT_BUFFER = 1 << 16
+
 
 class Ontology(object):
     """
@@ -29,9 +42,7 @@ class Ontology(object):
     CONTRADICTION = -100
     ERROR = -50
 
-    imported = {}
-
-    def __init__(self, name, basepath=None, resolve=False, preserve_conditionals = True):
+    def __init__(self, name, basepath=None, resolve=False, preserve_conditionals = True, registry=None):
 
         # The full path to the file
         self.name = os.path.abspath(name)
@@ -57,17 +68,33 @@ class Ontology(object):
 
         self.resolve = resolve
 
-        # for keeping track of the terminology
-        self.unary_predicates = set()
-        self.binary_predicates = set()
-        self.nary_predicates = set()
-        self.all_predicates = set()
-        self.consts = set()
-        self.functs = set()
+        # On-disk cache of parsed modules (ParseCache), passed on to all imports
+        self.cache = None
+
+        # Parsing engine ('ply' or 'descent'), passed on to all imports
+        self.engine = 'ply'
+
+        # Key of the parsed file content and options (see ParseCache.key) while the axioms are unchanged
+        self.digest = None
+        self.digested = None
+
+        # On-disk cache of translated modules (FragmentCache), used by to_tptp and to_ladr
+        self.fragments = None
+
+        # Registry of parsed modules (ModuleRegistry) shared with other ontologies,
+        # None for the registry of the current context (see macleod.parsing.registry)
+        self.registry = registry
+
+        # Index of the import closure (ClosureIndex, see get_closure) and the number of changes
+        # to the axioms and imports of this module, which invalidate the index
+        self.closure = None
+        self.version = 0
         # same for the terminology in the resulting OWL conversion
         self.classes = set()
         self.properties = set()
         self.pcnf_sentences = 0
+        # number of predicates introduced by definitional FF-PCNF translations
+        self.definitions = 0
         self.filtered_patterns = 0
         self.owl_axioms = 0
 
@@ -95,93 +122,250 @@ class Ontology(object):
         global var_enum
         var_enum = 0
 
-    def to_ffpcnf(self):
+    def to_ffpcnf(self, cnf=macleod.logical.normal_form.NAIVE, prenex=macleod.logical.normal_form.UNIVERSALS_FIRST):
         """
         Translate any held Axioms to their equivalent function-free prenex
         conjunctive normal form.
 
         :param self, Default for method
+        :param String cnf, naive or definitional conjunctive normal form (see Axiom.ff_pcnf)
+        :param String prenex, order of the quantifiers in the prenex form (see Axiom.ff_pcnf)
         :return None
         """
 
         temp_axioms = []
 
-        for axiom in self.axioms:
-            print(axiom)
-            temp_axioms.append(axiom.ff_pcnf())
+        # Number the new variables and predicates within the ontology
+        with macleod.logical.symbol.numbering():
+            for axiom in self.axioms:
+                print(axiom)
+                pcnf = axiom.ff_pcnf(cnf, prenex=prenex)
+                self.definitions += pcnf.definitions
+                temp_axioms.append(pcnf)
 
         self.axioms = temp_axioms
+        self.changed()
         return self.axioms
 
-    def resolve_imports(self):
+    def resolve_imports(self, parallel=False, workers=None):
         """
         Look over our list of imports and tokenize and parse any that haven't
         already been parsed;
         Calling this method also sets self.resolve to True (which is False by default)
+
+        :param Boolean parallel, parse the import closure level by level on a pool of processes
+        :param int workers, maximum number of worker processes (defaults to the number of CPUs)
         """
 
         self.resolve = True
+        self.changed()
+
+        if parallel:
+            self.resolve_imports_parallel(workers)
+            return
 
         logging.getLogger(__name__).debug("Resolving imports")
 
         # Cyclic imports are kind of painful in Python
         import macleod.parsing.parser as Parser
 
+        registry = self.get_registry()
+
         for path in self.imports:
 
             logging.getLogger(__name__).debug("Working on import " + path)
 
             if self.imports[path] is None:
 
-                if path in Ontology.imported:
+                key = self.module_key(path)
+
+                if registry.is_pending(key):
                     print("Cyclic import found: {} imports {}".format(self.name, path))
-                    self.imports[path] = Ontology.imported[path]
+                    continue
+
+                new_ontology = registry.get(key)
+
+                if new_ontology is not None:
+                    logging.getLogger(__name__).debug("Reusing already parsed import " + path)
                 else:
                     sub, base = self.basepath
                     subbed_path = path.replace(self.basepath[0], self.basepath[1])
                     logging.getLogger(__name__).debug("Subbed path for import " + path)
-                    # Need to immediately keep track of the ontology path in processing to not visit it again
-                    # we later update the value with the actual created ontology object
-                    Ontology.imported[path] = None
+                    # Need to immediately keep track of the module in processing to not visit it again
+                    registry.reserve(key)
                     try:
                         logging.getLogger(__name__).info("Starting to parse " + subbed_path)
-                        new_ontology = Parser.parse_file(subbed_path, sub, base, self.resolve, preserve_conditionals=conditionals)
+                        # The imports of the import are resolved through the same registry
+                        with registry.scope():
+                            new_ontology = Parser.parse_file(subbed_path, sub, base, self.resolve, preserve_conditionals=conditionals, cache=self.cache, engine=self.engine)
                     except TypeError as e:
                         logging.getLogger(__name__).error("Error parsing " + subbed_path + ": " + str(e))
+                        registry.discard(key)
+                        continue
+
+                    if new_ontology is None:
+                        logging.getLogger(__name__).error("Could not parse import " + path)
+                        registry.discard(key)
+                        continue
 
                     new_ontology.basepath = self.basepath
-                    self.imports[path] = new_ontology
                     # update the import information with the created ontology object
-                    Ontology.imported[path] = new_ontology
+                    registry.put(key, new_ontology)
 
-    def get_all_modules(self):
-        """Get a flattened list of all Ontologies that are imported either directly or indirectly """
+                self.imports[path] = new_ontology
 
-        all_modules=[self]
-        all_modules_names = set()
-        all_modules_names.add(self.name)
+    def resolve_imports_parallel(self, workers=None):
+        """
+        Resolve the import closure breadth-first: all not yet parsed modules of
+        one level of the import DAG are parsed at the same time in worker
+        processes; the parsed modules are then sent back and stitched into the
+        imports of their importing ontologies, exactly as resolve_imports() does.
 
-        processing = [self]
+        :param int workers, maximum number of worker processes (defaults to the number of CPUs)
+        """
 
-        while processing != []:
+        logging.getLogger(__name__).debug("Resolving imports in parallel")
 
-            new = processing.pop()
-            print("Processsing " + new.name)
+        sub, base = self.basepath
+        registry = self.get_registry()
 
-            if new is not None:
+        modules = [self]
+        frontier = [self]
+        # Modules parsed or reused during this resolution by key
+        resolved = {}
+        # Keys of the modules each module of the frontier is imported through, to recognize cyclic imports
+        ancestors = {id(self): frozenset()}
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+
+            while frontier:
+
+                scheduled = {}
+                through = {}
+
+                for ontology in frontier:
+
+                    chain = ancestors[id(ontology)]
+
+                    for path in ontology.imports:
+
+                        if ontology.imports[path] is not None:
+                            continue
 
-                for onto in new.imports.values():
-                    print ("Found import " + onto.name)
-                    if onto.name not in all_modules_names:
-                        print("New import " + onto.name)
-                        all_modules_names.add(onto.name)
-                        all_modules.append(onto)
-                        processing.append(onto)
+                        key = self.module_key(path)
 
-            #print(len(all_modules_names))
-            #print(len(all_modules))
-        return all_modules
+                        if key in scheduled:
+                            # Scheduled in this level for another importer already
+                            through[key] |= chain
+                            continue
 
+                        # Imported through the module itself, or by an import that encloses this resolution
+                        if key in chain or registry.is_pending(key):
+                            print("Cyclic import found: {} imports {}".format(ontology.name, path))
+                            continue
+
+                        if key in resolved:
+                            continue
+
+                        new_ontology = registry.get(key)
+                        if new_ontology is not None:
+                            logging.getLogger(__name__).debug("Reusing already parsed import " + path)
+                            resolved[key] = new_ontology
+                            continue
+
+                        subbed_path = path.replace(self.basepath[0], self.basepath[1])
+                        logging.getLogger(__name__).info("Starting to parse " + subbed_path)
+                        # Keep track of the module right away so that it is not scheduled twice
+                        registry.reserve(key)
+                        through[key] = chain | {key}
+                        scheduled[key] = path, executor.submit(parse_import, subbed_path, sub, base, conditionals, self.cache, self.engine)
+
+                frontier = []
+
+                for key, (path, future) in scheduled.items():
+
+                    try:
+                        new_ontology = future.result()
+                    except TypeError as e:
+                        logging.getLogger(__name__).error("Error parsing " + path + ": " + str(e))
+                        registry.discard(key)
+                        continue
+
+                    if new_ontology is None:
+                        logging.getLogger(__name__).error("Could not parse import " + path)
+                        registry.discard(key)
+                        continue
+
+                    # Axiom ids are handed out per process, renumber them to keep them unique in this one
+                    digest = new_ontology.get_digest()
+                    axioms = new_ontology.axioms
+                    new_ontology.axioms = []
+                    for axiom in axioms:
+                        new_ontology.adopt_axiom(axiom)
+                    new_ontology.set_digest(digest)
+
+                    new_ontology.basepath = self.basepath
+                    new_ontology.resolve = True
+                    registry.put(key, new_ontology)
+                    resolved[key] = new_ontology
+
+                    modules.append(new_ontology)
+                    frontier.append(new_ontology)
+                    ancestors[id(new_ontology)] = through[key]
+
+        # Stitch the parsed modules into the imports of every module in the closure
+        for ontology in modules:
+            for path in ontology.imports:
+                if ontology.imports[path] is None and self.module_key(path) in resolved:
+                    ontology.imports[path] = resolved[self.module_key(path)]
+                    ontology.changed()
+
+    def set_digest(self, digest):
+        """
+        Identify the current axioms of the module, e.g. by the key of the parsed file (see ParseCache.key)
+
+        :param String digest, the key
+        """
+
+        self.digest = digest
+        self.digested = (id(self.axioms), len(self.axioms))
+
+    def get_digest(self):
+        """
+        :return String, the key of the parsed file or None if the axioms have changed since
+        """
+
+        if self.digest is None or self.digested != (id(self.axioms), len(self.axioms)):
+            return None
+
+        return self.digest
+
+    def get_registry(self):
+        """
+        :return ModuleRegistry, the registry of parsed modules to share the imports through
+        """
+
+        if self.registry is not None:
+            return self.registry
+
+        return macleod.parsing.registry.current()
+
+    def module_key(self, path):
+        """
+        Key of an imported module in the registry: the file it is parsed from and the parser options
+
+        :param String path, the URI of the import
+        :return Tuple
+        """
+
+        return (os.path.normpath(path.replace(self.basepath[0], self.basepath[1])), conditionals)
+
+    def get_all_modules(self):
+        """Get a flattened list of all Ontologies that are imported either directly or indirectly """
+
+        self.resolve = True
+
+        return list(self.get_closure().modules)
 
     def add_axiom(self, logical):
         """
@@ -193,6 +377,23 @@ class Ontology(object):
         """
 
         self.axioms.append(macleod.logical.axiom.Axiom(logical))
+        self.changed()
+
+    def adopt_axiom(self, axiom):
+        """
+        Stores an already constructed Axiom object (e.g. one loaded from the
+        cache or parsed in another process) in this ontology, giving it a
+        fresh id so that axiom ids remain unique in this process
+
+        :param Axiom axiom, a previously created axiom
+        :return None
+        """
+
+        axiom.id = macleod.logical.axiom.Axiom.axiom_id
+        macleod.logical.axiom.Axiom.axiom_id += 1
+
+        self.axioms.append(axiom)
+        self.changed()
 
     def add_conjecture(self, logical):
         """
@@ -215,116 +416,79 @@ class Ontology(object):
         """
 
         self.imports[path] = None
+        self.changed()
 
-    def analyze_ontology(self):
+    def get_symbol_table(self):
         """
-        Analyzes all axioms of the ontology and stores lists of predicates, etc.
+        The symbol table of all axioms of the ontology and, if resolve is set,
+        of its import closure; built once for every closure index
 
-        :return:
+        :return SymbolTable
         """
 
-        class WrappedSymbol(object):
-            """
-            Wrapping predicates and function symbols in a new class to make comparing, merging, etc. easier
-            """
-            def __init__(self, symbol):
-                self.symbol = symbol
-
-            def __eq__(self, other):
-                # special treatment if either one is a string -- applies to constants only
-                if isinstance(self.symbol, str) and isinstance(other.symbol, str):
-                    return self.symbol==other.symbol
-                elif isinstance(self.symbol, str) and not isinstance(other.symbol, str):
-                    return self.symbol==other.symbol.name
-                elif not isinstance(self.symbol, str) and isinstance(other.symbol, str):
-                    return self.symbol.name == other.symbol
-                else:
-                    return self.symbol.same_symbol(other.symbol)
+        closure = self.get_closure()
 
-            def __hash__(self):
-                if isinstance(self.symbol, str):
-                    return hash(self.symbol)
-                else:
-                    return hash(self.symbol.name)
+        if closure.symbol_table is None:
 
-            def __repr__(self):
-                if isinstance(self.symbol, str):
-                    return self.symbol + "(0)"
-                else:
-                    return self.symbol.name + "(" + str(len(self.symbol.variables)) + ")"
+            symbol_table = macleod.logical.symbol_table.SymbolTable()
 
-        axioms = self.get_all_axioms()
+            for (axiom, path) in closure.items():
+                symbol_table.add_axiom(axiom, path)
 
-        from macleod.logical.symbol import Function
-        self.binary_predicates.add(WrappedSymbol(Function("=",["x","y"])))
+            closure.symbol_table = symbol_table
 
-        for (axiom, _) in axioms:
-            # Aready done during axiom creation
-            #axiom.analyze_logical()
+        return closure.symbol_table
+
+    def analyze_ontology(self):
+        """
+        Analyzes all axioms of the ontology and logs the predicates, functions
+        and constants as well as names that are used as different kinds of symbols
 
-            self.unary_predicates.update(set(WrappedSymbol(p) for p in axiom.unary_predicates))
-            self.binary_predicates.update(set(WrappedSymbol(p) for p in axiom.binary_predicates))
+        :return SymbolTable, the symbol table of the ontology
+        """
+
+        import macleod.logical.symbol_table as Symbols
+
+        symbol_table = self.get_symbol_table()
+        LOGGER = logging.getLogger(__name__)
 
-            self.nary_predicates.update(set(WrappedSymbol(p) for p in axiom.nary_predicates))
-            self.consts.update(set(WrappedSymbol(p) for p in axiom.consts))
-            self.functs.update(set(WrappedSymbol(p) for p in axiom.functs))
+        def symbols(ids):
+            return ", ".join([symbol_table.format(x) for x in sorted(ids)])
 
-        logging.getLogger(__name__).info("Unary predicates: {}".format(", ".join([repr(p) for p in self.unary_predicates])))
-        logging.getLogger(__name__).info("Binary predicates: {}".format(", ".join([repr(p) for p in self.binary_predicates])))
-        logging.getLogger(__name__).info("N-ary predicates: {}".format(", ".join([repr(p) for p in self.nary_predicates])))
-        logging.getLogger(__name__).info("Functions: {}".format(", ".join([repr(p) for p in self.functs])))
-        logging.getLogger(__name__).info("Constants: {}".format(", ".join([repr(p) for p in self.consts])))
+        nary = [x for x in symbol_table.predicates() if symbol_table.arity(x) > 2]
 
-        self.all_predicates = self.unary_predicates.union(self.binary_predicates).union(self.nary_predicates)
+        LOGGER.info("Unary predicates: {}".format(symbols(symbol_table.predicates(1))))
+        LOGGER.info("Binary predicates: {}".format(symbols(symbol_table.predicates(2))))
+        LOGGER.info("N-ary predicates: {}".format(symbols(nary)))
+        LOGGER.info("Functions: {}".format(symbols(symbol_table.functions())))
+        LOGGER.info("Constants: {}".format(symbols(symbol_table.constants())))
 
         # do some sanity checks
-        # need to compare names; identity alone doesn't work
-        intersection = self.unary_predicates & self.binary_predicates
-        if bool(intersection):
-            full_intersection = self.unary_predicates.intersection(self.binary_predicates)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning("Predicate " + repr(i.symbol.name) + " used as unary predicate (class) and binary predicate (relation)")
-
-        intersection = self.unary_predicates & self.nary_predicates
-        if bool(intersection):
-            full_intersection = self.unary_predicates.intersection(self.nary_predicates)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning("Predicate " + repr(i.symbol.name) + " used as unary predicate (class) and n-ary predicate (relation)")
-
-        intersection = self.binary_predicates & self.nary_predicates
-        if bool(intersection):
-            full_intersection = self.binary_predicates.intersection(self.nary_predicates)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning("Predicate " + repr(i.symbol.name) + " used as binary and n-ary predicate (relation)")
-
-        intersection = self.all_predicates & self.functs
-        if bool(intersection):
-            full_intersection = self.all_predicates.intersection(self.functs)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning(repr(i.symbol.name) + " used as predicate and function symbol")
-
-        #predicate_names = set([p.symbol.name for p in self.all_predicates])
-        #function_names = set([p.symbol.name for p in self.functs])
-
-        intersection = self.all_predicates & self.consts
-        if bool(intersection):
-            full_intersection = self.all_predicates.intersection(self.consts)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning(i.symbol + " used as predicate and constant")
-
-        intersection = self.functs & self.consts
-        if bool(intersection):
-            full_intersection = self.functs.intersection(self.consts)
-            for i in full_intersection:
-                logging.getLogger(__name__).warning(i.symbol + " used as function symbol and constant")
-
-        # TODO comparing against constants needs to be done differently because they are just strings
-        #intersection = self.consts & all_predicates
-        #if bool(intersection):
-        #    logging.getLogger(__name__).warning(intersection + " used as predicate and a constant")
-        #intersection = self.consts & self.functs
-        #if bool(intersection):
-        #    logging.getLogger(__name__).warning(intersection + " used as a function symbol and a constant")
+        usages = {1: "unary predicate (class)", 2: "binary predicate (relation)"}
+
+        for name in sorted(symbol_table.overlap(Symbols.PREDICATE, Symbols.PREDICATE)):
+            # All other arities count as n-ary
+            arities = sorted(set(symbol_table.arity(x) if symbol_table.arity(x) in usages else 3
+                                 for x in symbol_table.with_name(name)
+                                 if symbol_table.kind(x) == Symbols.PREDICATE))
+            for i, arity in enumerate(arities):
+                for other in arities[i + 1:]:
+                    if arity == 2:
+                        LOGGER.warning("Predicate " + repr(name) + " used as binary and n-ary predicate (relation)")
+                    else:
+                        LOGGER.warning("Predicate " + repr(name) + " used as " + usages[arity] + " and "
+                                       + usages.get(other, "n-ary predicate (relation)"))
+
+        for name in sorted(symbol_table.overlap(Symbols.PREDICATE, Symbols.FUNCTION)):
+            LOGGER.warning(repr(name) + " used as predicate and function symbol")
+
+        for name in sorted(symbol_table.overlap(Symbols.PREDICATE, Symbols.CONSTANT)):
+            LOGGER.warning(name + " used as predicate and constant")
+
+        for name in sorted(symbol_table.overlap(Symbols.FUNCTION, Symbols.CONSTANT)):
+            LOGGER.warning(name + " used as function symbol and constant")
+
+        return symbol_table
 
     def get_explicit_definitions(self):
         """
@@ -349,29 +513,28 @@ class Ontology(object):
         :return:
         """
 
-        axioms = self.get_all_axioms()
-
-        self.analyze_ontology()
+        symbol_table = self.analyze_ontology()
 
         logging.getLogger(__name__).info("Creating existential axioms to enforce nontrivial consistency")
 
-        for pred in self.all_predicates:
-            if pred.symbol.name=="=":
+        for pred in sorted(symbol_table.predicates()):
+            if symbol_table.name(pred)=="=":
                 # skip the equality predicate
                 continue
             else:
-                self.add_predicate_satisfiability_axiom(pred.symbol,True)
-                self.add_predicate_satisfiability_axiom(pred.symbol,False)
+                self.add_predicate_satisfiability_axiom(symbol_table.name(pred), symbol_table.arity(pred), True)
+                self.add_predicate_satisfiability_axiom(symbol_table.name(pred), symbol_table.arity(pred), False)
 
         # Remember that nontrivial axioms have been created
         self.nontrivial = True
 
 
-    def add_predicate_satisfiability_axiom(self, symbol, positive_polarity=True):
+    def add_predicate_satisfiability_axiom(self, name, arity, positive_polarity=True):
         """
         Creates and adds an axiom that ascertains the existence of a predicate
         (i.e. class, binary relation or n-ary predicate)
-        :param symbol:
+        :param name: name of the predicate
+        :param arity: number of arguments of the predicate
         :return:
         """
 
@@ -383,14 +546,13 @@ class Ontology(object):
 
         global var_enum
 
-        arity = len(symbol.variables)
         # Create new constants for each variable
         vars = []
-        for v in symbol.variables:
+        for v in range(arity):
             var_enum += 1
             vars.append("var" + str(var_enum))
 
-        atomic_term = Predicate(symbol.name, vars)
+        atomic_term = Predicate(name, vars)
         if not positive_polarity:
             atomic_term = Negation(atomic_term)
         terms = [atomic_term]
@@ -405,38 +567,130 @@ class Ontology(object):
         conjunction = Conjunction(terms)
         axiom = Axiom(Existential(vars,conjunction))
         self.axioms.append(axiom)
+        self.changed()
 
-    def to_tptp(self):
+    def to_tptp(self, clauses=False):
         """
         Translates all axioms in the module and, if present, in any imported modules to the TPTP format
+        :param clauses: translate the clause sets of the FF-PCNF axioms instead (not stored for write_tptp_file)
         :return: TPTP conversions as a list of strings
         """
+        if clauses:
+            return [x for clause_set in self.to_clause_sets() for x in clause_set.to_tptp()]
+
         if self.tptp_output is None:
-            tptp_output = []
+            self.tptp_output = list(self.iter_tptp())
 
-            for (axiom, path) in self.get_all_axioms():
-                tptp_output.append(axiom.to_tptp())
+        return self.tptp_output
 
-            self.tptp_output = tptp_output
+    def iter_tptp(self):
+        """
+        Translates the axioms of the module and, if present, of any imported modules to the TPTP format one by one
+        :return: generator of TPTP formulas
+        """
 
-        return self.tptp_output
+        # Translate every symbol of the ontology only once
+        emitter = macleod.logical.emitter.Emitter(macleod.logical.emitter.TPTP)
+
+        # The axioms are named after their content, numbered if the same axiom occurs more than once
+        names = {}
+
+        for axioms, formulas in self.translate_modules('tptp', emitter.to_string):
+            for formula in formulas:
+                name = macleod.logical.emitter.formula_name(formula)
+                names[name] = names.get(name, 0) + 1
+                if names[name] > 1:
+                    name += "_{}".format(names[name])
+                yield "fof({}, axiom, {}).".format(name, formula)
 
-    def to_ladr(self):
+    def to_ladr(self, clauses=False):
         """
         Translates all axioms in the module and, if present, in any imported modules to the LADR format supported by Prover9 and Mace4
+        :param clauses: translate the clause sets of the FF-PCNF axioms instead (not stored for write_ladr_file)
         :return: LADR conversions as a list of strings
         """
 
+        if clauses:
+            return [clause_set.to_ladr() for clause_set in self.to_clause_sets()]
+
         if self.ladr_output is None:
-            ladr_output = []
+            self.ladr_output = list(self.iter_ladr())
+
+        return self.ladr_output
 
-            all_axioms = self.get_all_axioms()
-            for (axiom, path) in all_axioms:
-                ladr_output.append(axiom.to_ladr())
+    def iter_ladr(self):
+        """
+        Translates the axioms of the module and, if present, of any imported modules to the LADR format one by one
+        :return: generator of LADR formulas
+        """
 
-            self.ladr_output = ladr_output
+        emitter = macleod.logical.emitter.Emitter(macleod.logical.emitter.LADR)
 
-        return self.ladr_output
+        for axioms, formulas in self.translate_modules('ladr', emitter.to_string):
+            for formula in formulas:
+                yield formula + "."
+
+    def translate_modules(self, dialect, translate):
+        """
+        Translate the axioms of every module of the closure, one module at a
+        time. If a fragment cache is set (self.fragments), the formulas of
+        unchanged modules are loaded from it and those of the other modules
+        are stored in it; otherwise the formulas are translated only as they
+        are consumed.
+
+        :param String dialect, name of the output format (see FragmentCache.DIALECTS)
+        :param translate, function from the sentence of an axiom to its formula
+        :return generator of (axioms, formulas) of the modules
+        """
+
+        from macleod.parsing.cache import FragmentCache
+
+        closure = self.get_closure()
+
+        for position, module in enumerate(closure.modules):
+
+            axioms = closure.module_axioms(position)
+            digest = module.get_digest() if self.fragments is not None else None
+
+            if digest is None:
+                yield axioms, (translate(axiom.sentence) for axiom in axioms)
+                continue
+
+            key = FragmentCache.key(digest, dialect)
+            formulas = self.fragments.load(key)
+
+            if formulas is None or len(formulas) != len(axioms):
+                formulas = [translate(axiom.sentence) for axiom in axioms]
+                self.fragments.store(key, formulas)
+            else:
+                logging.getLogger(__name__).debug("Loaded the {} translation of {} from the cache".format(dialect, closure.paths[position]))
+
+            yield axioms, formulas
+
+    def to_clause_sets(self, cnf=macleod.logical.normal_form.NAIVE, prenex=macleod.logical.normal_form.UNIVERSALS_FIRST):
+        """
+        Translates all axioms in the module and, if present, in any imported modules
+        (and their function declarations) to FF-PCNF clause sets.
+
+        Note that the FF-PCNF of an axiom is weaker than the axiom if functions have been
+        replaced (the new predicates are only declared to be functional, not total).
+
+        :param cnf: naive or definitional conjunctive normal form (see Axiom.ff_pcnf)
+        :param prenex: order of the quantifiers in the prenex form (see Axiom.ff_pcnf)
+        :return: list of ClauseSets
+        """
+
+        clause_sets = []
+
+        # Number the new variables and predicates within the ontology
+        with macleod.logical.symbol.numbering():
+            for (axiom, path) in self.get_all_axioms():
+                pcnf = axiom.ff_pcnf(cnf, prenex=prenex)
+                self.definitions += pcnf.definitions
+                for sentence in [pcnf] + pcnf.extra_sentences:
+                    clause_sets.append(sentence.clause_set())
+
+        return clause_sets
 
     def to_latex(self):
         """
@@ -444,15 +698,34 @@ class Ontology(object):
         """
 
         if self.latex_output is None:
-            latex_output = []
+            self.latex_output = list(self.iter_latex())
+
+        return self.latex_output
+
+    def iter_latex(self):
+        """
+        Translates the axioms of the module and, if present, of any imported modules to LaTeX one by one
+        :return: generator of LaTeX formulas
+        """
 
-            all_axioms = self.get_all_axioms()
-            for (axiom, path) in all_axioms:
-                latex_output.append("$" + axiom.to_latex() +"$")
+        emitter = macleod.logical.emitter.Emitter(macleod.logical.emitter.LATEX)
 
-            self.latex_output = latex_output
+        for axiom in self.get_closure().axioms:
+            yield "$" + axiom.to_latex(emitter) + "$"
 
-        return self.latex_output
+    def forget_translations(self):
+        """
+        Forget the stored translations and the files they were written to, e.g.
+        once a module of the import closure has changed
+        """
+
+        self.tptp_output = None
+        self.tptp_file = None
+        self.ladr_output = None
+        self.ladr_file = None
+        self.latex_output = None
+        self.latex_file = None
+        self.owl = None
 
     def get_output_filename(self, output_type, out=False):
         # the following assumes that the names of the configuration sections
@@ -499,59 +772,90 @@ class Ontology(object):
         return output_filename
 
 
-    def write_tptp_file(self):
+    def write_tptp_file(self, compress=False, keep=False, skip_unchanged=False):
+        """
+        Writes the TPTP translation of the module and, if present, of any imported modules to the TPTP output file;
+        the axioms are translated while they are written unless the translation is already stored (see to_tptp)
+        :param compress: write a gzip-compressed file (with the additional ending .gz)
+        :param keep: also store the translation in memory for to_tptp
+        :param skip_unchanged: leave the output file untouched if its content stays the same
+        :return: the name of the written file
+        """
 
-        if self.tptp_file is None:
-            logging.getLogger(__name__).info("Converting " + self.name + " to TPTP format")
+        output_filename = self.get_output_filename('tptp') + (".gz" if compress else "")
 
-            results = self.to_tptp()
+        if self.tptp_file != output_filename:
+            logging.getLogger(__name__).info("Converting " + self.name + " to TPTP format")
 
-            output_filename = self.get_output_filename('tptp')
+            results = self.tptp_output if self.tptp_output is not None else self.iter_tptp()
+            if keep:
+                results = self.tptp_output = list(results)
 
-            with open(output_filename, "w") as f:
+            with open_output(output_filename, compress, skip_unchanged) as f:
                 for sentence in results:
-                    #print(sentence)
                     f.write(sentence + "\n")
-                f.close()
 
             # save results to prevent redo the TPTP conversion
             self.tptp_file = output_filename
 
         return self.tptp_file
 
-    def write_ladr_file(self):
+    def write_ladr_file(self, compress=False, keep=False, skip_unchanged=False):
+        """
+        Writes the LADR translation of the module and, if present, of any imported modules to the LADR output file;
+        the axioms are translated while they are written unless the translation is already stored (see to_ladr)
+        :param compress: write a gzip-compressed file (with the additional ending .gz)
+        :param keep: also store the translation in memory for to_ladr
+        :param skip_unchanged: leave the output file untouched if its content stays the same
+        :return: the name of the written file
+        """
 
-        if self.ladr_file is None:
-            logging.getLogger(__name__).info("Converting " + self.name + " to LADR format")
+        output_filename = self.get_output_filename('ladr') + (".gz" if compress else "")
 
-            results = self.to_ladr()
+        if self.ladr_file != output_filename:
+            logging.getLogger(__name__).info("Converting " + self.name + " to LADR format")
 
-            output_filename = self.get_output_filename('ladr')
+            results = self.ladr_output if self.ladr_output is not None else self.iter_ladr()
+            if keep:
+                results = self.ladr_output = list(results)
 
-            with open(output_filename, "w") as f:
-                if len(results) > 0:
-                    f.write("formulas(sos).\n")
-                    for sentence in results:
-                        #print(sentence)
-                        f.write(sentence + "\n")
+            with open_output(output_filename, compress, skip_unchanged) as f:
+                empty = True
+                for sentence in results:
+                    if empty:
+                        f.write("formulas(sos).\n")
+                        empty = False
+                    f.write(sentence + "\n")
+                if not empty:
                     f.write("end_of_list.\n")
-                f.close()
 
             # save results to prevent redo the LADR conversion
             self.ladr_file = output_filename
 
         return self.ladr_file
 
-    def write_latex_file(self, enumerate):
+    def write_latex_file(self, enumerate, compress=False, keep=False, echo=True, skip_unchanged=False):
+        """
+        Writes the LaTeX translation of the module and, if present, of any imported modules to the LaTeX output file;
+        the axioms are translated while they are written unless the translation is already stored (see to_latex)
+        :param enumerate: enumerate the axioms
+        :param compress: write a gzip-compressed file (with the additional ending .gz)
+        :param keep: also store the translation in memory for to_latex
+        :param echo: print every axiom to stdout as well
+        :param skip_unchanged: leave the output file untouched if its content stays the same
+        :return: the name of the written file
+        """
+
+        output_filename = self.get_output_filename('latex') + (".gz" if compress else "")
 
-        if self.latex_file is None:
+        if self.latex_file != output_filename:
             logging.getLogger(__name__).info("Converting " + self.name + " to LaTeX format")
 
-            results = self.to_latex()
-
-            output_filename = self.get_output_filename('latex')
+            results = self.latex_output if self.latex_output is not None else self.iter_latex()
+            if keep:
+                results = self.latex_output = list(results)
 
-            with open(output_filename, "w") as f:
+            with open_output(output_filename, compress, skip_unchanged) as f:
                 f.write("\\documentclass{article}\n")
 
                 f.write("\\usepackage{amsmath,amssymb,hyperref}\n\n")
@@ -564,7 +868,8 @@ class Ontology(object):
                 if enumerate:
                     f.write("\\begin{enumerate}\n")
                 for sentence in results:
-                    print(sentence)
+                    if echo:
+                        print(sentence)
                     if enumerate:
                         f.write("\\item " + sentence + "\n")
                     else:
@@ -572,22 +877,29 @@ class Ontology(object):
                 if enumerate:
                     f.write("\\end{enumerate}\n")
                 f.write("\\end{document}")
-                f.close()
 
             self.latex_file = output_filename
 
         return self.latex_file
 
-    def check_consistency (self, options_files = None):
-        """ test the input for consistency by trying to find a model or an inconsistency."""
-        # want to create a subfolder for the output files
+    def get_reasoners (self):
+        """ the active reasoners (ReasonerSet) with their commands for this ontology, which writes their input files."""
 
         reasoners = macleod.ReasonerSet.ReasonerSet()
         reasoners.constructAllCommands(self)
         logging.getLogger(__name__).info("USING " + str(len(reasoners)) + " REASONERS: " + str([r.name for r in reasoners]))
 
+        return reasoners
+
+    def check_consistency (self, options_files = None, results = None):
+        """ test the input for consistency by trying to find a model or an inconsistency.
+        Results of reasoners on identical inputs are taken from results (a ResultCache), if given."""
+        # want to create a subfolder for the output files
+
+        reasoners = self.get_reasoners()
+
         # run provers and modelfinders simultaneously and wait until one returns
-        reasoners = macleod.Process.raceProcesses(reasoners)
+        reasoners = macleod.Process.raceProcesses(reasoners, results)
 
         # this captures our return code (consistent/inconsistent/unknown), not the reasoning processes return code
         (return_value, fastest_reasoner) = self.consolidate_results(reasoners)
@@ -647,30 +959,82 @@ class Ontology(object):
         logging.getLogger(__name__).info("CONSOLIDATED RESULT: " + str(return_value))
         return (return_value, fastest_reasoner)
 
+    def get_closure(self):
+        """
+        The index of the axioms of the ontology and, if resolve is set (i.e.
+        by calling resolve_imports()), of its import closure. The index is
+        built once and reused until axioms or imports of any of its modules
+        change.
+
+        :return ClosureIndex
+        """
+
+        if self.closure is None or self.closure.resolve != self.resolve or not self.closure.is_valid():
+
+            if self.resolve:
+                self.resolve_imports()
+
+            closure = ClosureIndex(self, self.resolve)
+
+            logging.getLogger(__name__).info("Found " + str(closure.offsets[1]) + " axioms in " + self.name)
+            if self.resolve:
+                logging.getLogger(__name__).info("Collected " + str(len(closure.axioms) - closure.offsets[1]) + " imported axioms from " + str(len(closure.modules) - 1) + " modules")
+                logging.getLogger(__name__).info("Working from a total of " + str(len(closure.axioms)) + " axioms (including imported ones)")
+
+            self.closure = closure
+
+        return self.closure
+
+    def save_snapshot(self, path):
+        """
+        Write the ontology, its import closure (if resolve is set) and their
+        symbol table to a binary snapshot, see macleod.parsing.snapshot
+
+        :param String path, the snapshot file
+        :return String path
+        """
+
+        return macleod.parsing.snapshot.save(self, path)
+
+    @staticmethod
+    def load_snapshot(path, lazy=False):
+        """
+        Rebuild an ontology and its import closure from a snapshot written by save_snapshot()
+
+        :param String path, the snapshot file
+        :param Boolean lazy, memory-map the snapshot and build the axioms only when they are accessed
+        :return Ontology
+        """
+
+        return macleod.parsing.snapshot.load(path, lazy)
+
+    def stamp(self):
+        """
+        :return Tuple, changes whenever axioms or imports are added to the ontology
+        """
+
+        return (self.version, id(self.axioms), len(self.axioms))
+
+    def changed(self):
+        """
+        Record that axioms or imports of the ontology have changed, which
+        invalidates the closure index of every ontology whose closure includes it
+        """
+
+        self.version += 1
+
     def get_imported_axioms(self):
         """
-        Traverses over all imports to create and return a list of all axioms found in the import closure.
+        Create and return a list of all axioms found in the import closure.
         The axioms directly contained in the ontology are excluded from this list but can be accessed via self.axioms
 
         :return List imported_axioms, a list of tuples of the form (axiom, module name)
         """
 
-        imported_axioms = []
-        self.resolve_imports()
-
-        seen_paths = []
-        unprocessed = [x for x in self.imports.items()]
-        while unprocessed:
-            path, ontology = unprocessed.pop()
-            if path not in seen_paths and ontology is not None:
-                logging.getLogger(__name__).debug("Adding imported axioms from " + path)
-                imported_axioms += [(a, path) for a in ontology.axioms]
-                seen_paths.append(path)
-                unprocessed += ontology.imports.items()
-
-        logging.getLogger(__name__).info("Collected " + str(len(imported_axioms)) + " imported axioms")
+        self.resolve = True
+        closure = self.get_closure()
 
-        return imported_axioms
+        return closure.items(closure.offsets[1])
 
     def get_all_axioms(self):
         """
@@ -678,25 +1042,19 @@ class Ontology(object):
         if resolve is set (i.e. by calling resolve_imports()),
         also in its import closure
 
-        :param resolve: Boolean that indicates whether to include all axioms from the import closure as well
         :return: axioms: list of all axioms (concatenation of axioms from the ontology and the imported axioms)
         """
 
-        axioms = [(x, self.name) for x in self.axioms[:]]
-        logging.getLogger(__name__).info("Found " + str(len(axioms)) + " axioms in " + self.name)
+        return self.get_closure().items()
 
-        if self.resolve:
-            axioms +=self.get_imported_axioms()
-            logging.getLogger(__name__).info("Working from a total of " + str(len(axioms)) + " axioms (including imported ones)")
 
-        return axioms
-
-
-    def to_owl(self, profile):
+    def to_owl(self, profile, cnf=macleod.logical.normal_form.NAIVE, prenex=macleod.logical.normal_form.UNIVERSALS_FIRST):
         """
         Return a string representation of this ontology in OWL format. If this ontology
         contains imports will translate those as well and concatenate all the axioms.
 
+        :param String cnf, naive or definitional conjunctive normal form of the axioms (see Axiom.ff_pcnf)
+        :param String prenex, order of the quantifiers in the prenex form of the axioms (see Axiom.ff_pcnf)
         :return String onto, this ontology in OWL format
         """
 
@@ -711,64 +1069,44 @@ class Ontology(object):
                                       profile)
 
             axioms = self.get_all_axioms()
+            symbol_table = self.get_symbol_table()
 
-            # keeping track of classes (unary predicates) and properties (binary predicates) encountered
-            # to avoid redundant declarations
-            # predicates with the same arity and name are assumed to be identical
-
-            # Loop over each Axiom and filter applicable patterns
-            for axiom, path in axioms:
-
-                print('Axiom: {} from {}'.format(axiom, path))
-                pcnf = axiom.ff_pcnf()
-                print('FF-PCNF: {}'.format(pcnf))
-
-                # for completeness: declare all unary predicates as classes
-                for unary in axiom.unary():
-                    if unary.name not in self.classes:
-                        self.classes.add(unary.name)
-                        onto.declare_class(unary.name)
+            # for completeness: declare all unary predicates as classes and all binary predicates as object
+            # properties, in the order they first occur; predicates with the same arity and name are identical
+            for unary in sorted(symbol_table.predicates(1)):
+                self.classes.add(symbol_table.name(unary))
+                onto.declare_class(symbol_table.name(unary))
 
-                # for completeness: declare all binary predicates as object properties
-                for binary in axiom.binary():
-                    if binary.name not in self.properties:
-                        self.properties.add(binary.name)
-                        onto.declare_property(binary.name)
+            for binary in sorted(symbol_table.predicates(2)):
+                self.properties.add(symbol_table.name(binary))
+                onto.declare_property(symbol_table.name(binary))
 
-                pcnf_sentences = macleod.dl.translation.translate_owl(pcnf)
+            # Loop over each Axiom and filter applicable patterns, numbering the new
+            # variables and predicates within the ontology
+            with macleod.logical.symbol.numbering():
+                for axiom, path in axioms:
 
-                # Temporarily save all extractions to better sort and filter them
-                extractions = []
+                    print('Axiom: {} from {}'.format(axiom, path))
+                    pcnf = axiom.ff_pcnf(cnf, prenex=prenex)
+                    self.definitions += pcnf.definitions
+                    print('FF-PCNF: {}'.format(pcnf))
 
-                for pruned in pcnf_sentences:
-
-                    self.pcnf_sentences += 1
-
-                    tmp_axiom = macleod.logical.axiom.Axiom(pruned)
-                    pattern_set = macleod.dl.filters.filter_axiom(tmp_axiom)
-
-                    self.filtered_patterns += len(pattern_set)
+                    # Duplicate, tautological and subsumed clauses yield no patterns of their own
+                    try:
+                        clauses = pcnf.clause_set()
+                    except ValueError:
+                        clauses = pcnf
 
-                    #Collector for extracted patterns
-                    for pattern in pattern_set:
+                    pcnf_sentences = macleod.dl.translation.translate_owl(clauses)
 
-                        extraction = pattern(tmp_axiom)
-                        if extraction is not None:
-                            print('     - pattern', extraction[0])
-                            if pattern==Pattern.transitive_relation:
-                                self.transitive_extractions.append(extraction)
-                            else:
-                                extractions.append(extraction)
+                    # Temporarily save all extractions to better sort and filter them
+                    extractions = []
 
-                # TODO: now produce all the extracted axioms
-                for extraction in extractions:
-                    if macleod.dl.translation.produce_construct(extraction, onto):
-                        self.owl_axioms += 1
+                    for pruned in pcnf_sentences:
 
+                        self.pcnf_sentences += 1
 
-                for extra in pcnf.extra_sentences:
-                    for extra_pruned in macleod.dl.translation.translate_owl(extra):
-                        tmp_axiom = macleod.logical.axiom.Axiom(extra_pruned)
+                        tmp_axiom = macleod.logical.axiom.Axiom(pruned)
                         pattern_set = macleod.dl.filters.filter_axiom(tmp_axiom)
 
                         self.filtered_patterns += len(pattern_set)
@@ -778,9 +1116,33 @@ class Ontology(object):
 
                             extraction = pattern(tmp_axiom)
                             if extraction is not None:
-                                print('     - (extra) pattern', extraction[0])
-                                if macleod.dl.translation.produce_construct(extraction, onto):
-                                    self.owl_axioms += 1
+                                print('     - pattern', extraction[0])
+                                if pattern==Pattern.transitive_relation:
+                                    self.transitive_extractions.append(extraction)
+                                else:
+                                    extractions.append(extraction)
+
+                    # TODO: now produce all the extracted axioms
+                    for extraction in extractions:
+                        if macleod.dl.translation.produce_construct(extraction, onto):
+                            self.owl_axioms += 1
+
+
+                    for extra in pcnf.extra_sentences:
+                        for extra_pruned in macleod.dl.translation.translate_owl(extra):
+                            tmp_axiom = macleod.logical.axiom.Axiom(extra_pruned)
+                            pattern_set = macleod.dl.filters.filter_axiom(tmp_axiom)
+
+                            self.filtered_patterns += len(pattern_set)
+
+                            #Collector for extracted patterns
+                            for pattern in pattern_set:
+
+                                extraction = pattern(tmp_axiom)
+                                if extraction is not None:
+                                    print('     - (extra) pattern', extraction[0])
+                                    if macleod.dl.translation.produce_construct(extraction, onto):
+                                        self.owl_axioms += 1
 
             for extraction in self.transitive_extractions:
                 logging.getLogger(__name__).info("Processing all transitive properties last")
@@ -855,3 +1217,273 @@ class Ontology(object):
         rep += '+' * len(self.name) + '\n'
 
         return rep
+
+
+def open_output(filename, compress=False, skip_unchanged=False):
+    """
+    Open an output file for writing text through a large buffer
+
+    :param String filename, the file
+    :param Boolean compress, compress the file with gzip
+    :param Boolean skip_unchanged, leave the file untouched if the text is the same (see UnchangedOutput)
+    :return file object
+    """
+
+    if skip_unchanged:
+        return UnchangedOutput(filename, compress)
+
+    if compress:
+        return gzip.open(filename, 'wt', encoding='utf-8')
+
+    return open(filename, 'w', buffering=OUTPUT_BUFFER)
+
+
+def text_digest(filename, compress=False):
+    """
+    Hash of the text of a file
+
+    :param String filename, the file
+    :param Boolean compress, the file is compressed with gzip
+    :return String hexadecimal digest, or None if the file cannot be read
+    """
+
+    digest = hashlib.sha256()
+
+    try:
+        with (gzip.open(filename, 'rt', encoding='utf-8') if compress else open(filename, 'r', encoding='utf-8')) as f:
+            for chunk in iter(lambda: f.read(OUTPUT_BUFFER), ''):
+                digest.update(chunk.encode('utf-8'))
+    except (OSError, EOFError, UnicodeDecodeError):
+        return None
+
+    return digest.hexdigest()
+
+
+class UnchangedOutput(object):
+    """
+    Output file that is only replaced if its text changes, so that its
+    modification time (and anything keyed by it) stays the same. The text is
+    written to a temporary file next to it while it is hashed; on closing, the
+    temporary file replaces the output file unless both have the same text.
+
+    changed -- whether the output file was replaced, known once it is closed
+    """
+
+    def __init__(self, filename, compress=False):
+
+        self.filename = filename
+        self.compress = compress
+        self.temporary = "{}.{}.tmp".format(filename, os.getpid())
+        self.digest = hashlib.sha256()
+        self.changed = None
+
+        self.file = open_output(self.temporary, compress)
+
+    def write(self, text):
+
+        self.digest.update(text.encode('utf-8'))
+        self.file.write(text)
+
+    def close(self):
+
+        if self.file.closed:
+            return
+
+        self.file.close()
+
+        self.changed = text_digest(self.filename, self.compress) != self.digest.hexdigest()
+
+        if self.changed:
+            os.replace(self.temporary, self.filename)
+        else:
+            logging.getLogger(__name__).info("Left the unchanged file " + self.filename + " untouched")
+            os.remove(self.temporary)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, kind, value, traceback):
+
+        if kind is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.temporary)
+
+
+def parse_import(path, sub, base, preserve_conditionals, cache=None, engine='ply'):
+    """
+    Worker function for Ontology.resolve_imports_parallel: parses a single
+    module without resolving its imports.
+
+    :param String path, path to the imported file (already substituted)
+    :param String sub, path component to be substituted
+    :param String base, new path component
+    :param Boolean preserve_conditionals, keep conditionals as is (True) or convert to disjunctions
+    :param ParseCache cache, on-disk cache of parsed modules (None disables caching)
+    :param String engine, parsing engine ('ply' or 'descent')
+    :return Ontology onto, the parsed module
+    """
+
+    import macleod.parsing.parser as Parser
+
+    return Parser.parse_file(path, sub, base, False, preserve_conditionals=preserve_conditionals, cache=cache, engine=engine)
+
+
+class ClosureIndex(object):
+    """
+    Materialized import closure of an ontology: its modules in topological
+    order (every module before the modules it imports) and all their axioms,
+    with the module of each axiom kept as an index into the list of modules.
+    The index is valid as long as no module of the closure changes, see
+    Ontology.get_closure().
+
+    modules     -- the Ontology objects of the closure, the ontology itself first
+    paths       -- the name of each module (its path for the ontology itself, the import path otherwise)
+    axioms      -- all axioms of the closure, grouped by module in the order of modules
+    provenance  -- index of the module of each axiom
+    offsets     -- index of the first axiom of each module in axioms, and the number of axioms at the end
+    """
+
+    def __init__(self, ontology, resolve):
+
+        self.resolve = resolve
+
+        if resolve:
+            self.modules, self.paths = topological_order(ontology)
+        else:
+            self.modules, self.paths = [ontology], [ontology.name]
+
+        # What each module looked like when the index was built
+        self.stamps = [module.stamp() for module in self.modules]
+
+        self.axioms = []
+        self.provenance = array.array('i')
+        self.offsets = array.array('i')
+
+        for position, module in enumerate(self.modules):
+            self.offsets.append(len(self.axioms))
+            self.axioms.extend(module.axioms)
+            self.provenance.extend([position] * len(module.axioms))
+
+        self.offsets.append(len(self.axioms))
+
+        # Derived views, built on first use
+        self.symbol_table = None
+
+    @classmethod
+    def restore(cls, modules, paths, axioms, offsets, resolve=True, symbol_table=None):
+        """
+        Index of a closure whose parts are already known, e.g. loaded from a snapshot
+
+        :param List modules, the modules in topological order
+        :param List paths, the name of each module
+        :param axioms, sequence of all axioms grouped by module (not iterated)
+        :param offsets, index of the first axiom of each module and the number of axioms at the end
+        :return ClosureIndex
+        """
+
+        closure = cls.__new__(cls)
+
+        closure.resolve = resolve
+        closure.modules = modules
+        closure.paths = paths
+        closure.stamps = [module.stamp() for module in modules]
+
+        closure.axioms = axioms
+        closure.offsets = array.array('i', offsets)
+        closure.provenance = array.array('i')
+        for position in range(len(modules)):
+            closure.provenance.extend([position] * (offsets[position + 1] - offsets[position]))
+
+        closure.symbol_table = symbol_table
+
+        return closure
+
+    def is_valid(self):
+        """
+        :return Boolean, True if no module of the closure has changed since the index was built
+        """
+
+        return all(module.stamp() == stamp for module, stamp in zip(self.modules, self.stamps))
+
+    def path(self, position):
+        """
+        :param int position, index of an axiom in axioms
+        :return String, the name of the module of the axiom
+        """
+
+        return self.paths[self.provenance[position]]
+
+    def items(self, start=0):
+        """
+        :param int start, index of the first axiom
+        :return List of (axiom, module name) tuples
+        """
+
+        axioms = self.axioms
+        paths = self.paths
+        provenance = self.provenance
+
+        return [(axioms[i], paths[provenance[i]]) for i in range(start, len(axioms))]
+
+    def module_axioms(self, position):
+        """
+        :param int position, index of a module in modules
+        :return List of the axioms of the module
+        """
+
+        return self.axioms[self.offsets[position]:self.offsets[position + 1]]
+
+
+def topological_order(ontology):
+    """
+    Modules of the import closure of an ontology, every module before its
+    imports (as far as cyclic imports allow), found by a depth-first search
+
+    :param Ontology ontology, the root of the closure
+    :return (List modules, List paths), the modules and their names
+    """
+
+    paths = {id(ontology): ontology.name}
+    finished = []
+    stack = [(ontology, iter(list(ontology.imports.items())))]
+
+    while stack:
+
+        module, imports = stack[-1]
+
+        for path, imported in imports:
+            if imported is not None and id(imported) not in paths:
+                paths[id(imported)] = path
+                stack.append((imported, iter(list(imported.imports.items()))))
+                break
+        else:
+            stack.pop()
+            finished.append(module)
+
+    finished.reverse()
+
+    return finished, [paths[id(module)] for module in finished]
+
+
+def check_many(ontologies, max_parallel_reasoners=None, results=None):
+    """
+    Check the consistency of several ontologies concurrently (see
+    Ontology.check_consistency), interleaving the reasoners of different
+    ontologies so that up to max_parallel_reasoners reasoners run at the same
+    time. The other reasoners of an ontology are stopped as soon as one of
+    them is decisive.
+
+    :param ontologies, iterable of Ontology objects, consumed as reasoners become free
+    :param int max_parallel_reasoners, the number of CPUs by default
+    :param ResultCache results, results of reasoners on identical inputs to reuse (and to store new ones in)
+    :return generator of (Ontology, return value, fastest reasoner) in the order the checks finish
+    """
+
+    races = ((ontology, ontology.get_reasoners()) for ontology in ontologies)
+
+    for ontology, reasoners in macleod.Process.raceMany(races, max_parallel_reasoners, results):
+        (return_value, fastest_reasoner) = ontology.consolidate_results(reasoners)
+        yield (ontology, return_value, fastest_reasoner)
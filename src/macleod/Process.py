@@ -1,25 +1,155 @@
-import multiprocessing
-from multiprocessing import Queue
+import asyncio
 import os, sys, logging
 import time, re, signal, subprocess
 
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
 import macleod
 
-class ReasonerProcess(multiprocessing.Process):
-
-    def __init__(self, args, output_filename, timeout, result_queue, id):
-        multiprocessing.Process.__init__(self)
-        self.id = id
-        self.args = args
-        self.result_queue = result_queue
-        self.exit = multiprocessing.Event()
-        self.done = multiprocessing.Event()
-        self.output_filename = output_filename
-        self.timeout = timeout
+# Seconds between two checks of the CPU time and memory used by a running reasoner, where the limits are not enforced by the kernel
+LIMIT_INTERVAL = 1.0
+
+# Default memory limit of each reasoner in MB
+DEFAULT_MEMORY_LIMIT = 2048
+
+# Seconds of CPU time a reasoner gets after the time limit (and SIGXCPU) before it is killed
+CPU_GRACE = 1
+
+# Seconds between two checks whether a reasoner has exited, where its exit cannot be waited for through a pidfd
+EXIT_INTERVAL = 0.05
+
+
+class Limits(object):
+    """
+    Limits of the CPU time and memory of a reasoner. The CPU time is limited with setrlimit in the reasoner
+    process before the reasoner is executed, so that the kernel enforces it from the start; the processes the
+    reasoner starts inherit the limit (each one on its own). The memory limit applies to resident memory, which
+    setrlimit cannot limit: it is enforced by the cgroup of the reasoner (see ControlGroup) or, without one,
+    checked every LIMIT_INTERVAL seconds. Limiting the address space instead would stop reasoners such as
+    the JVM-based ones that reserve much more virtual memory than they use.
+
+    cputime -- seconds of CPU time, after which the reasoner receives SIGXCPU (and SIGKILL CPU_GRACE seconds later)
+    memory  -- MB of resident memory
+    """
+
+    def __init__(self, cputime, memory):
+        self.cputime = cputime
+        self.memory = memory
+
+    def enforced (self):
+        """Whether the kernel enforces the time limit on this platform"""
+        return resource is not None
+
+    def apply (self):
+        """Set the time limit of the current process (the reasoner process, after forking)"""
+        set_limit(resource.RLIMIT_CPU, self.cputime, self.cputime + CPU_GRACE)
+
+
+def set_limit(kind, soft, hard):
+    # an unprivileged process cannot raise its hard limit
+    (_, current) = resource.getrlimit(kind)
+    if current != resource.RLIM_INFINITY:
+        hard = min(hard, current)
+        soft = min(soft, hard)
+    resource.setrlimit(kind, (soft, hard))
+
+
+class ControlGroup(object):
+    """
+    A cgroup (version 2) of its own for a reasoner, created in a delegated cgroup that is configured as
+    cgroup in the system section of the configuration file. Unlike the resource limits, which apply to each
+    process separately, the memory limit of the cgroup applies to all processes of the reasoner together, and
+    the accounting includes processes that the reasoner did not wait for.
+    """
+
+    count = 0
+
+    def __init__(self, parent, memory):
+        ControlGroup.count += 1
+        self.path = os.path.join(parent, 'macleod-' + str(os.getpid()) + '-' + str(ControlGroup.count))
+        os.mkdir(self.path)
+        self.write('memory.max', str(memory * 1024 * 1024))
+
+    def write (self, name, value):
+        with open(os.path.join(self.path, name), 'w') as f:
+            f.write(value)
+
+    def statistics (self, name):
+        """:return dict, the values of a file of key-value pairs such as cpu.stat or memory.events"""
+        try:
+            with open(os.path.join(self.path, name)) as f:
+                return dict((key, int(value)) for (key, value) in (line.split() for line in f if line.strip()))
+        except OSError:
+            return {}
+
+    def join (self):
+        """Move the current process (the reasoner process, after forking) into the cgroup"""
+        self.write('cgroup.procs', str(os.getpid()))
+
+    def cputime (self):
+        """:return float, CPU seconds used by all processes of the cgroup, None if not available"""
+        usage = self.statistics('cpu.stat').get('usage_usec')
+        return None if usage is None else usage / 1000000
+
+    def peak_memory (self):
+        """:return int, MB used by all processes of the cgroup at the peak, None if not available (before Linux 5.19)"""
+        try:
+            with open(os.path.join(self.path, 'memory.peak')) as f:
+                return int(f.read()) // (1024*1024)
+        except (OSError, ValueError):
+            return None
+
+    def out_of_memory (self):
+        return self.statistics('memory.events').get('oom_kill', 0) > 0
+
+    def kill (self):
+        """Kill all processes of the cgroup (since Linux 5.14)"""
+        try:
+            self.write('cgroup.kill', '1')
+        except OSError:
+            pass
+
+    def remove (self):
+        try:
+            os.rmdir(self.path)
+        except OSError as e:
+            logging.getLogger(__name__).debug("Could not remove cgroup " + self.path + ": " + str(e))
+
+
+class ReasonerRun(object):
+    """
+    A reasoner started by race(), running in a process group of its own
+
+    process     -- the subprocess of the reasoner, None until started or if it could not be started
+    status      -- the status of the reasoner at the end (PROOF, MODEL, ERROR, ABORTED, ALLOTED TIME EXCEEDED, ...)
+    cputime     -- CPU time used by the reasoner (and the processes it waited for), in seconds
+    peak_memory -- resident memory of the reasoner (or of a process it waited for) at the peak, in MB
+    """
+
+    def __init__(self, reasoner, memory_limit=DEFAULT_MEMORY_LIMIT):
+        self.reasoner = reasoner
+        self.args = reasoner.getCommand()
+        self.output_filename = reasoner.getOutputFile()
+        # TODO Figure out why r.timeout is a str in python3
+        self.limits = Limits(int(reasoner.timeout), memory_limit)
+        self.cgroup = None
+        self.process = None
+        # whether the reasoner holds a slot of a CoreBudget
+        self.slot = False
+        self.started = None
         self.cputime = 0
+        self.peak_memory = 0
         self.current_cputime = 0
         self.previous_cputime = 0
 
+        # key of the result in a ResultCache and whether the result was taken from there
+        self.cache_key = None
+        self.cached = False
+
         # string to capture the status of the reasoner at the end (Aborted, Successful, Unsuccessful, Timed out, ..
         self.status = ''
 
@@ -30,117 +160,186 @@ class ReasonerProcess(multiprocessing.Process):
         return self.status
 
     def getId (self):
-        return self.id
-        
-    def isDone (self):
-        return self.done.is_set()
-
-    def shutdown (self):
-        logging.getLogger(__name__).debug("ABORTING: "  + self.args[0])
-        self.exit.set()
-
-    def terminate (self):
-        logging.getLogger(__name__).debug("TERMINATING: " + self.name + ", command = " + self.args[0])
-        self.shutdown()
-        time.sleep(0.2)
-        multiprocessing.Process.terminate (self)
+        return self.reasoner.getId()
+
+    def start (self, cgroups=None):
+        """Start the reasoner with its limits, writing its output to its output file
+        :param String cgroups, the delegated cgroup to create a cgroup for the reasoner in (None for none)"""
+        logging.getLogger(__name__).info("STARTING: " + self.reasoner.name + ", command = " + self.args[0])
+        if cgroups:
+            try:
+                self.cgroup = ControlGroup(cgroups, self.limits.memory)
+            except OSError as e:
+                logging.getLogger(__name__).warning("COULD NOT CREATE CGROUP in " + cgroups + ": " + str(e))
+        # the subprocess writes to its own copy of the file descriptor
+        with open(self.output_filename, 'w') as out_file:
+            self.process = startProcessGroup(self.args, out_file, self.limits, self.cgroup)
+        self.started = time.monotonic()
+
+    async def wait (self):
+        """Wait until the reasoner exits and collect its resource usage
+        :return int, the exit code of the reasoner (negative if it was killed by a signal)"""
+        watchdog = None
+        if not self.limits.enforced() or self.cgroup is None:
+            watchdog = asyncio.ensure_future(self.enforce_limits())
+        try:
+            (code, usage) = await reap(self.process)
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+        self.reasoner.time = time.monotonic() - self.started
+
+        if usage is not None:
+            self.cputime = usage.ru_utime + usage.ru_stime
+            # kilobytes on Linux, bytes on macOS
+            self.peak_memory = max(self.peak_memory, usage.ru_maxrss // (1024*1024 if sys.platform == 'darwin' else 1024))
+        if self.cgroup is not None:
+            self.cputime = self.cgroup.cputime() or self.cputime
+            self.peak_memory = self.cgroup.peak_memory() or self.peak_memory
+            if self.cgroup.out_of_memory():
+                logging.getLogger(__name__).info("MEMORY EXCEEDED: " + self.reasoner.name + ", command = " + self.args[0])
+                self.status = 'ALLOTED MEMORY EXCEEDED: ' + str(self.limits.memory) + 'MB'
+            self.cgroup.remove()
+        # SIGXCPU at the limit, SIGKILL if the reasoner ignores it
+        if self.limits.enforced() and (code == -signal.SIGXCPU or (code == -signal.SIGKILL and self.cputime >= self.limits.cputime)):
+            logging.getLogger(__name__).info("TIME EXCEEDED: " + self.reasoner.name + ", command = " + self.args[0])
+            self.status = 'ALLOTED TIME EXCEEDED: ' + str(self.limits.cputime) + ' seconds'
+
+        logging.getLogger(__name__).info("REASONER COMPLETED: "  + self.reasoner.name + ", exit code " + str(code) + ", command = " + self.args[0])
+        return code
+
+    def kill (self):
+        """Kill the reasoner and all processes it started"""
+        if self.process is not None and self.process.returncode is None:
+            logging.getLogger(__name__).debug("ABORTING: "  + self.reasoner.name + ", command = " + self.args[0])
+            killProcessGroup(self.process)
+            if self.cgroup is not None:
+                self.cgroup.kill()
+
+    def restore (self, entry):
+        """Take the result of the reasoner from a ResultCache entry instead of running it"""
+        logging.getLogger(__name__).info("CACHED RESULT: " + self.reasoner.name + ", command = " + self.args[0])
+        with open(self.output_filename, 'w') as out_file:
+            out_file.write(entry['text'])
+        self.cached = True
+        self.status = 'CACHED ' + entry['status']
+        self.cputime = entry['cputime']
+        self.peak_memory = entry['peak_memory']
+        self.reasoner.time = entry['time']
+        self.reasoner.output = entry['output']
+
+    def result (self):
+        """:return dict, the entry of the result in a ResultCache"""
+        with open(self.output_filename, 'r') as out_file:
+            text = out_file.read()
+        return {'output': self.reasoner.output, 'status': self.status, 'timeout': self.limits.cputime,
+                'time': self.reasoner.time, 'cputime': self.cputime, 'peak_memory': self.peak_memory, 'text': text}
 
     def update_cputime (self, pid):
         new_cputime = get_cputime(pid)
         if new_cputime==0:
             return False
-        #print "CPU time of " + self.args[0] + " = " + str(new_cputime)
         if new_cputime>=self.current_cputime:
             self.current_cputime = new_cputime
         else:
-            #print "NEW PROCESS; previous_cputime = " + str(previous_cputime) 
             self.previous_cputime += self.current_cputime + 1
-            self.current_cputime = new_cputime 			
+            self.current_cputime = new_cputime
         self.cputime = self.previous_cputime + self.current_cputime
-        #print "total CPU time of " + self.args[0] + " = " + str(self.cputime)
-
-    def enforce_limits (self, pid):
-        limit = int(macleod.Filemgt.read_config('system', 'memory_limit')) # read custom memory limit from configuration file
-        if limit is None:
-            logging.getLogger(__name__).debug("USING DEFAULT MEMORY LIMIT OF 2GB FOR EACH REASONER")
-            limit = 2048 # default memory limit for each reasoner is 2GB
-
-        memory = get_memory(pid)
-        #enforce memory limit
-        if memory>limit:
-            logging.getLogger(__name__).info("MEMORY EXCEEDED: " + self.name + ", command = " + self.args[0])
-            self.status = 'ALLOTED MEMORY EXCEEDED: ' + str(limit) + 'GB'
-            self.shutdown()
-        # enforce time limit
-        if self.cputime>self.timeout:
-            logging.getLogger(__name__).info("TIME EXCEEDED: " + self.name + ", command = " + self.args[0])
-            self.status = 'ALLOTED TIME EXCEEDED: ' + str(self.timeout) + ' seconds'
-            self.shutdown()
-
-
-    def run (self):
-        logging.getLogger(__name__).info("STARTING: " + self.name + ", command = " + self.args[0])
-        out_file = open (self.output_filename, 'w')
-        sp = startSubprocessWithOutput(self.args, out_file, [])
-        self.previous_cputime = 0
-        self.current_cputime = 0
-        while sp.poll() is None and not self.exit.is_set():
-            time.sleep(1)
-            self.update_cputime(sp.pid)
-            self.enforce_limits(sp.pid)		
-        if self.exit.is_set():
-            # interrupted
-            logging.getLogger(__name__).debug("ABORTING: "  + self.name + ", command = " + self.args[0])
-            (_, stdoutdata) = terminateSubprocess(sp)
-            if stdoutdata:
-                stdoutdata = re.sub(r'[^\w]', ' ', stdoutdata)
-                stdoutdata = ' '.join(stdoutdata.split())
-                logging.getLogger(__name__).debug("STDOUT from "  + self.name + ": " + str(stdoutdata))
-            self.result_queue.put((self.args[0], -1, stdoutdata))
-            logging.getLogger(__name__).info("ABORTED: "  + self.name + ", command = " + self.args[0])
-            self.update_cputime(sp.pid)
-            out_file.flush()
-            out_file.close()
-            #self.writeHeader()
-            self.done.set()
-            return True
-        # finished normally, i.e., sp.poll() determined the subprocess has terminated by itself
-        self.update_cputime(sp.pid)
-        self.result_queue.put((self.args[0], sp.returncode, None))
-        logging.getLogger(__name__).info("REASONER COMPLETED: "  + self.name + ", exit code " + str(sp.returncode) + ", command = " + self.args[0])
-        out_file.flush()
-        out_file.close()
-        #self.writeHeader()
-        self.done.set()
-        return True
+
+    async def enforce_limits (self):
+        """Check the limits periodically where the kernel does not enforce them (the memory limit without a cgroup)"""
+        while True:
+            await asyncio.sleep(LIMIT_INTERVAL)
+            pid = self.process.pid
+            self.update_cputime(pid)
+            memory = get_session_memory(pid)
+            self.peak_memory = max(self.peak_memory, memory)
+            # enforce memory limit
+            if self.cgroup is None and memory>self.limits.memory:
+                logging.getLogger(__name__).info("MEMORY EXCEEDED: " + self.reasoner.name + ", command = " + self.args[0])
+                self.status = 'ALLOTED MEMORY EXCEEDED: ' + str(self.limits.memory) + 'MB'
+                self.kill()
+            # enforce time limit
+            if not self.limits.enforced() and self.cputime>self.limits.cputime:
+                logging.getLogger(__name__).info("TIME EXCEEDED: " + self.reasoner.name + ", command = " + self.args[0])
+                self.status = 'ALLOTED TIME EXCEEDED: ' + str(self.limits.cputime) + ' seconds'
+                self.kill()
 
     def writeHeader (self):
         import datetime
         """ Create a standardized footer for all output files that contains name of the program,
         the specific command, and a timestamp."""
         # list of input files
-        time.sleep(0.2)
         cmd = self.args[0]
         for i in range(1,len(self.args)):
             cmd += " " + self.args[i]
 
-        #logging.getLogger(__name__).debug("WRITING STATISTICS to " + reasoner.getOutfile())
-        in_file =  open(self.output_filename, 'a')
+        # a reasoner that never started may have left the output of an earlier run
+        in_file =  open(self.output_filename, 'a' if self.process is not None or self.cached else 'w')
         in_file.write('\n')
 
         in_file.write('========================== MACLEOD SUMMARY ===========================\n')
-        #file.write(vampire.get_version()+'\n')
         now = datetime.datetime.now()
         in_file.write('reasoner: ' + self.args[0] + '\n')
         in_file.write('status: ' + str(self.getStatus()) + '\n')
         in_file.write('execution finished: ' + now.strftime("%a %b %d %H:%M:%S %Y") +'\n')
-        in_file.write('total CPU time used: ' + str(self.cputime) + '\n')
+        in_file.write('total CPU time used: ' + str(round(self.cputime, 2)) + '\n')
+        in_file.write('peak memory used: ' + str(self.peak_memory) + ' MB\n')
         in_file.write('The command was \"' + cmd + '\"\n')
         in_file.write('============================ end of footer ===========================\n')
         in_file.flush()
         in_file.close()
 
 
+def memory_limit():
+    """Read the memory limit of each reasoner in MB from the configuration file."""
+    limit = macleod.Filemgt.read_config('system', 'memory_limit')
+    if limit is None:
+        logging.getLogger(__name__).debug("USING DEFAULT MEMORY LIMIT OF 2GB FOR EACH REASONER")
+        return DEFAULT_MEMORY_LIMIT
+    return int(limit)
+
+
+async def reap(process):
+    """Wait for a subprocess to terminate without blocking the event loop or a thread: through a pidfd where
+    available (Linux 5.3 and later), otherwise by checking every EXIT_INTERVAL seconds.
+    :return (int exit code, resource usage of the process and the processes it waited for or None if not available)"""
+    pidfd = None
+    if hasattr(os, 'pidfd_open'):
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except OSError:
+            pass
+    if pidfd is not None:
+        # the pidfd becomes readable once the process has exited
+        loop = asyncio.get_running_loop()
+        exited = loop.create_future()
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(True))
+        try:
+            await exited
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+    while True:
+        result = poll(process)
+        if result is not None:
+            return result
+        await asyncio.sleep(EXIT_INTERVAL)
+
+
+def poll(process):
+    """Collect the exit code of a subprocess if it has terminated (without blocking).
+    :return (int exit code, resource usage or None if not available), None if the process is still running"""
+    if hasattr(os, 'wait4'):
+        (pid, status, usage) = os.wait4(process.pid, os.WNOHANG)
+        if pid == 0:
+            return None
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return (process.returncode, usage)
+    code = process.poll()
+    return None if code is None else (code, None)
+
+
 def get_cputime(pid):
     """Returns the CPU time a process has used so far in seconds as a float (one floating point digit)."""
 
@@ -158,26 +357,11 @@ def get_cputime(pid):
 
 
     def cputime_nix(pid):
-        try:
-            ps_process = subprocess.Popen("ps -g " + str(pid) + " -o time", shell=True, stdout=subprocess.PIPE)
-            stdout_list = ps_process.communicate()[0].decode('utf-8').split('\n')
-            while '' in stdout_list:
-                stdout_list.remove('')
-            stdout_list.pop(0)
-            #print "CPU TIMES: " + str(stdout_list)
-            seconds = 0
-            for entry in stdout_list:
-                time_chunks = entry.split(':')
-                print(time_chunks)
-                minute = time_chunks[0]
-                second = time_chunks[1][0:1]
-                print("Used time is %{0}m: %{1}".format(minute, second))
-                seconds +=  int(minute)*60 + int(second) 
-            return seconds
-        except OSError as e:
-            print(e)
+        # user and system time of the process and of the children it waited for, in clock ticks
+        fields = proc_stat(pid)
+        if fields is None:
             return 0
-
+        return round(sum(int(x) for x in fields[11:15]) / os.sysconf('SC_CLK_TCK'), 1)
 
     cputime_default = cputime_nix
 
@@ -204,15 +388,11 @@ def get_memory(pid):
             return int(result[0].WorkingSet) // (1024*1024) # convert from Bytes to MB
 
     def memory_nix(pid):
-        ps_process = subprocess.Popen("ps -g " + str(pid) + " -o rss", shell=True, stdout=subprocess.PIPE)
-        stdout_list = ps_process.communicate()[0].decode('utf-8').split('\n')
-        memory = 0
-        while '' in stdout_list:
-            stdout_list.remove('')
-        stdout_list.pop(0)
-        for entry in stdout_list:
-            memory += int(entry)	
-        return memory // 1024 # convert to MB
+        # resident set size in pages
+        fields = proc_stat(pid)
+        if fields is None:
+            return 0
+        return int(fields[21]) * os.sysconf('SC_PAGE_SIZE') // (1024*1024) # convert to MB
 
     memory_default = memory_nix
 
@@ -225,6 +405,31 @@ def get_memory(pid):
 
 
 
+def get_session_memory(sid):
+    """Returns the resident memory in MB of all processes of a session (the reasoner and the processes it started),
+    of the process sid only where /proc is not available."""
+    if not os.path.isdir('/proc'):
+        return get_memory(sid)
+    pages = 0
+    for name in os.listdir('/proc'):
+        if name.isdigit():
+            fields = proc_stat(name)
+            # the fourth field is the session
+            if fields is not None and int(fields[3]) == sid:
+                pages += int(fields[21])
+    return pages * os.sysconf('SC_PAGE_SIZE') // (1024*1024) # convert to MB
+
+
+def proc_stat(pid):
+    """The fields of /proc/<pid>/stat after the command name (i.e., starting with the third field), None if not available."""
+    try:
+        with open('/proc/' + str(pid) + '/stat') as stat:
+            # the command name in parentheses may contain spaces
+            return stat.read().rsplit(')', 1)[1].split()
+    except (OSError, IndexError):
+        return None
+
+
 def startSubprocessWithOutput(args, output_file, input_files=[]):
     """Start a new subprocess, but does not wait for the subprocess to complete. 
     This method uses the os.setsid in Linux, which is not available in Windows"""
@@ -248,6 +453,40 @@ def startSubprocessWithOutput(args, output_file, input_files=[]):
     return p
 
 
+def startProcessGroup(args, output_file, limits=None, cgroup=None):
+    """Start a subprocess in a process group of its own (a new session on Linux), but do not wait for it to complete.
+    Its output (STDOUT and STDERR) is written to output_file. The limits (Limits) and the cgroup (ControlGroup)
+    are applied in the new process before args is executed."""
+    if os.name == 'nt':
+        # Windows
+        return subprocess.Popen(args, stdout=output_file, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+
+    # Linux (and others)
+    def prepare():
+        if cgroup is not None:
+            cgroup.join()
+        if limits is not None and limits.enforced():
+            limits.apply()
+
+    return subprocess.Popen(args, stdout=output_file, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                            start_new_session=True, close_fds=True, preexec_fn=prepare)
+
+
+def killProcessGroup(process):
+    """Kill a subprocess started by startProcessGroup together with all processes it started."""
+    try:
+        if os.name == 'nt':
+            # Windows
+            subprocess.call(["taskkill", "/F", "/T", "/PID", str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            # Linux (and others)
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError as e:
+        # the process group is gone already
+        logging.getLogger(__name__).debug("Could not kill process group " + str(process.pid) + ": " + str(e))
+
+
 def startSubprocess(command):
     """Start a new subprocess, but does not wait for the subprocess to complete. 
     This method uses the os.setsid in Linux, which is not available in Windows"""
@@ -334,93 +573,243 @@ def terminateSubprocess (process):
     return handlers.get(os.name, terminate_default)(process)
 
 
-def raceProcesses (reasoners):
+class CoreBudget(object):
+    """
+    Number of reasoners that may run at the same time, shared by concurrent races (see raceMany)
+
+    slots   -- the number of reasoners that may run at the same time
+    waiting -- the number of reasoners waiting for a slot
+    running -- the number of reasoners holding a slot
+    changed -- asyncio.Event set whenever a slot becomes free
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.waiting = 0
+        self.running = 0
+        self.semaphore = asyncio.Semaphore(slots)
+        self.changed = asyncio.Event()
+
+    def request (self):
+        """Record that a reasoner will wait for a slot (before acquire is awaited)"""
+        self.waiting += 1
+
+    async def acquire (self):
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+
+    def release (self):
+        self.running -= 1
+        self.semaphore.release()
+        self.changed.set()
+
+    def demand (self):
+        """:return int, the number of reasoners that are running or waiting to run"""
+        return self.waiting + self.running
+
+
+def raceProcesses (reasoners, results=None):
     """run a set of theorem provers and a set of model finders in parallel.
     If one terminates successfully, all others are immediately terminated.
     Parameters:
     reasoners -- list of Reasoners to execute.
+    results -- ResultCache to take the results of reasoners on identical inputs from (and to store new ones in)
     """
-    
-    from macleod.ClifModuleSet import ClifModuleSet
-
-    results = Queue()
-
-    def startup(reasoners, results):
-        # start all processes
-        reasonerProcesses = []
-        for r in reasoners:
-            # TODO Figure out why r.timeout is a str in python3
-            p = ReasonerProcess(r.getCommand(), r.getOutputFile(), int(r.timeout), results, r.getId())
-            logging.getLogger(__name__).debug('Created ' + str(p))
-            reasonerProcesses.append(p)
-            p.start()
-            time.sleep(0.1)
-        return reasonerProcesses
-
 
-    # keeps track of the number of running reasoners
-    reasonerProcesses = startup(reasoners,results)
-    num_running = len(reasonerProcesses)
-    logging.getLogger(__name__).info(str(num_running) + ' Reasoners running')
+    return asyncio.run(race(reasoners, results=results))
 
 
-    time.sleep(0.1)
-    while num_running>0:
-        while results.empty():
-            time.sleep(1)
-            #sys.stdout.write(".")
-        # at least one process has terminated
-        sys.stdout.write("\n")
-        while not results.empty():
-            num_running += - 1
-            (name, code, _) = results.get()
-            r = reasoners.getByCommand(name)
-            #r.setReturnCode(code)
-            if r.terminatedWithError():
-                logging.getLogger(__name__).error("TERMINATED WITH ERROR (LIKELY DURING PARSING): " + name)
-            elif r.terminatedSuccessfully():
-                if r.output==macleod.Ontology.INCONSISTENT:
-                    if r.isProver():
-                        logging.getLogger(__name__).info("FOUND PROOF: " + name)
-                        status = 'PROOF'
-                    else:
-                        logging.getLogger(__name__).info("PROVED INCONSISTENCY: " + name)
-                        status = 'INCONSISTENT'
-                elif r.output==macleod.Ontology.CONSISTENT:
-                    if r.isProver():
-                        logging.getLogger(__name__).info("FOUND COUNTEREXAMPLE: " + name)
-                        status = 'COUNTEREXAMPLE'
-                    else:
-                        logging.getLogger(__name__).info("FOUND MODEL: " + name)
-                        status = 'MODEL'
-            else:
-                status = 'TERMINATED'
-                logging.getLogger(__name__).debug("TERMINATED WITHOUT SUCCESS: " + name)
-                logging.getLogger(__name__).debug("PROCESSES STILL RUNNING: " + str(num_running))
-
-
-            if r.terminatedWithError():
-                # if one reasoner terminates with an error, set the status of all of them to Error
-                for p in reasonerProcesses:
-                    p.setStatus('ERROR')
-            elif r.terminatedSuccessfully():
-                # cleanup the other reasoning processes that are still running
-                for p in reasonerProcesses:
-                    if p.getId()==r.getId():
-                        # set the status of the successful reasoner
-                        if p.getStatus()=='':
-                            p.setStatus(status)
-                    else:
-                        # Set the status of the other reasoners
-                        p.shutdown()
-                        while not p.isDone():
-                            time.sleep(0.1)
+def raceMany (races, max_parallel_reasoners=None, results=None):
+    """run the races (see raceProcesses) of several sets of reasoners concurrently, with at most
+    max_parallel_reasoners reasoners running at the same time over all races.
+    The next race is only set up (e.g., its input files written) when the reasoners of the
+    races already set up do not use all slots.
+    Parameters:
+    races -- iterable of (key, reasoners) pairs, consumed as slots become free
+    max_parallel_reasoners -- number of reasoners running at the same time, the number of CPUs by default
+    results -- ResultCache, see raceProcesses
+    Yields (key, reasoners) for every race as soon as it is decided.
+    """
 
+    budget = CoreBudget(max_parallel_reasoners or os.cpu_count() or 1)
+    races = iter(races)
+    exhausted = False
+    pending = {}
+
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            # fill the free slots before waiting
+            while not exhausted and budget.demand() < budget.slots:
+                try:
+                    (key, reasoners) = next(races)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[loop.create_task(race(reasoners, budget, results))] = key
+                # let the race request its slots
+                loop.run_until_complete(asyncio.sleep(0))
+
+            if not pending:
+                break
+
+            for task in loop.run_until_complete(next_finished(pending, None if exhausted else budget)):
+                yield (pending.pop(task), task.result())
+    finally:
+        # when the caller stops early
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.wait(pending))
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+
+async def next_finished (tasks, budget=None):
+    """Wait until at least one task is done or, if a budget is given, a slot of the budget becomes free.
+    :return List of the finished tasks"""
+    waiters = list(tasks)
+    if budget is not None:
+        budget.changed.clear()
+        waiters.append(asyncio.ensure_future(budget.changed.wait()))
+    (done, _) = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    if budget is not None:
+        waiters[-1].cancel()
+    return [task for task in done if task in tasks]
+
+
+async def runReasoner (run, cgroups=None, budget=None):
+    """Start a reasoner once the budget (CoreBudget) has a slot for it and wait until it exits.
+    The slot is kept (run.slot) until the race has handled the result, see race.
+    :return Boolean, whether the reasoner ran"""
+    if budget is not None:
+        await budget.acquire()
+        run.slot = True
+    try:
+        run.start(cgroups)
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.getLogger(__name__).error("COULD NOT START " + run.reasoner.name + ": " + str(e))
+        run.setStatus('NOT STARTED')
+        return False
+    await run.wait()
+    return True
+
+
+async def race (reasoners, budget=None, results=None):
+    """Start all reasoners directly as subprocesses and handle each one as soon as it exits, see raceProcesses.
+    The reasoners that are still running when one terminates successfully are killed right away,
+    those still waiting for a slot of the budget (CoreBudget, shared with other races) are not started.
+    Reasoners whose result is in the results cache (ResultCache) are not started either, none at all
+    if one of the cached results is decisive."""
+
+    limit = memory_limit()
+    runs = [ReasonerRun(r, limit) for r in reasoners]
+
+    if results is not None:
+        for run in runs:
+            run.cache_key = results.key(run.reasoner.name, run.args, run.reasoner.timeout_position)
+            entry = results.lookup(run.cache_key, run.limits.cputime)
+            if entry is not None:
+                run.restore(entry)
+        if any(run.cached and run.reasoner.terminatedSuccessfully() for run in runs):
+            for run in runs:
+                if not run.cached:
+                    run.setStatus('CANCELLED')
+            for run in runs:
+                run.writeHeader()
+            return reasoners
+
+    cgroups = None
+    if sys.platform.startswith('linux'):
+        cgroups = macleod.Filemgt.read_config('system', 'cgroup')
+
+    def release(run):
+        # only now may a waiting reasoner of this race (or another one) start
+        if run.slot:
+            run.slot = False
+            budget.release()
+
+    running = {}
+    for run in runs:
+        if run.cached:
+            continue
+        if budget is not None:
+            budget.request()
+        running[asyncio.ensure_future(runReasoner(run, cgroups, budget))] = run
+
+    logging.getLogger(__name__).info(str(len(running)) + ' Reasoners running')
+
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                run = running.pop(task)
+                if task.cancelled() or not task.result():
+                    release(run)
+                    continue
+                r = run.reasoner
+                name = run.args[0]
+
+                if r.terminatedWithError():
+                    logging.getLogger(__name__).error("TERMINATED WITH ERROR (LIKELY DURING PARSING): " + name)
+                elif r.terminatedSuccessfully():
+                    if r.output==macleod.Ontology.INCONSISTENT:
+                        if r.isProver():
+                            logging.getLogger(__name__).info("FOUND PROOF: " + name)
+                            status = 'PROOF'
+                        else:
+                            logging.getLogger(__name__).info("PROVED INCONSISTENCY: " + name)
+                            status = 'INCONSISTENT'
+                    elif r.output==macleod.Ontology.CONSISTENT:
+                        if r.isProver():
+                            logging.getLogger(__name__).info("FOUND COUNTEREXAMPLE: " + name)
+                            status = 'COUNTEREXAMPLE'
+                        else:
+                            logging.getLogger(__name__).info("FOUND MODEL: " + name)
+                            status = 'MODEL'
+                else:
+                    logging.getLogger(__name__).debug("TERMINATED WITHOUT SUCCESS: " + name)
+                    logging.getLogger(__name__).debug("PROCESSES STILL RUNNING: " + str(len(running)))
+
+                if r.terminatedWithError():
+                    # if one reasoner terminates with an error, set the status of all of them to Error
+                    for other in runs:
+                        other.setStatus('ERROR')
+                elif r.terminatedSuccessfully():
+                    # set the status of the successful reasoner
+                    if run.getStatus()=='':
+                        run.setStatus(status)
+                    # stop the other reasoning processes that are still running or waiting to run
+                    for (other_task, other) in running.items():
+                        if other.process is None:
+                            other.setStatus('CANCELLED')
+                            other_task.cancel()
+                        else:
+                            if other.getStatus()=='':
+                                other.setStatus('ABORTED')
+                            other.kill()
+
+                if results is not None:
+                    if r.terminatedSuccessfully():
+                        results.store(run.cache_key, run.result(), True)
+                    elif not r.terminatedWithError() and (run.getStatus()=='' or run.getStatus().startswith('ALLOTED TIME')):
+                        # the reasoner gave up or ran out of time by itself
+                        results.store(run.cache_key, run.result(), False)
+
+                release(run)
+    finally:
+        # also when interrupted
+        for (other_task, other) in running.items():
+            other_task.cancel()
+            other.kill()
+        for run in runs:
+            release(run)
 
     # write statistics
-    # time.sleep(1)
-    for r in reasonerProcesses:
-        r.writeHeader()
+    for run in runs:
+        run.writeHeader()
 
     return reasoners
-
@@ -21,6 +21,9 @@ class Reasoner (object):
 
         self.args = []
 
+        # position of the time limit in args, see macleod.Commands.get_system_command
+        self.timeout_position = None
+
         self.input_files = ''
 
         self.output_file = ''
@@ -62,7 +65,7 @@ class Reasoner (object):
     def constructCommand (self, ontology):
         import os
         """Return the command (includes constructing it if necessary) to invoke the reasoner."""
-        self.args = macleod.Commands.get_system_command(self.name, ontology)
+        (self.args, self.timeout_position) = macleod.Commands.get_system_command(self.name, ontology)
 
         self.ontology = ontology
         self.output_file = ontology.get_output_filename(self.name, out=True)
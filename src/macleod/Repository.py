@@ -0,0 +1,269 @@
+"""
+Consistency checks of all ontologies in a folder (a repository), ordered by
+their imports.
+
+The .clif files under the root folder form a directed acyclic graph by their
+imports (imports of files outside of the folder are part of the closures
+that are checked, but not of the graph). The modules are checked level by
+level, bottom-up: first the modules without imports in the repository, then
+the modules whose imports are all on lower levels, and so on; the modules of
+a level are checked concurrently (see macleod.Ontology.check_many).
+
+Results are propagated where that is sound: the closure of a module includes
+the closures of its imports, so a module that imports an inconsistent module
+is inconsistent itself and is not checked. Consistent imports say nothing
+about the importing module. Modules with cyclic imports, and the modules that
+import them, are checked together after all other modules, without
+propagation between them.
+"""
+
+import json
+import logging
+import os
+import time
+
+import macleod.Ontology
+import macleod.parsing.parser as Parser
+import macleod.parsing.registry
+from macleod.Ontology import check_many
+
+LOGGER = logging.getLogger(__name__)
+
+# Folders that contain generated files and lemmas rather than modules of the repository
+IGNORES = ["theorems", "generated", "output", "conversions", "owl", "latex"]
+
+# Names of the results in the summary
+RESULTS = {
+    macleod.Ontology.CONSISTENT: 'consistent',
+    macleod.Ontology.INCONSISTENT: 'inconsistent',
+    macleod.Ontology.UNKNOWN: 'unknown',
+    macleod.Ontology.ERROR: 'error',
+    macleod.Ontology.CONTRADICTION: 'contradiction',
+}
+
+
+class Repository(object):
+    """
+    The modules in a folder, their imports and the results of checking them
+
+    :param String root, the folder
+    :param String sub, the URI prefix of the imports to substitute with base
+    :param String base, the folder the URIs are resolved in
+    :param Boolean nontrivial, check for nontrivial consistency (see Ontology.add_nontrivial_axioms)
+    :param ResultCache results, results of reasoners to reuse
+
+    ontologies -- the parsed modules by file name, None for modules that could not be parsed
+    imports    -- the files in the repository that each module imports directly
+    results    -- result (a dict, see check()) of every checked module by file name
+    """
+
+    def __init__(self, root, sub, base, nontrivial=False, preserve_conditionals=True, cache=None, engine='ply', registry=None, results=None):
+
+        self.root = os.path.abspath(root)
+        self.sub = sub
+        self.base = base
+        self.nontrivial = nontrivial
+        self.preserve_conditionals = preserve_conditionals
+        self.cache = cache
+        self.engine = engine
+
+        # Results of reasoners on identical inputs (ResultCache), e.g. of modules with the same closure
+        self.results_cache = results
+
+        # The imports of all modules are parsed once and shared
+        self.registry = registry if registry is not None else macleod.parsing.registry.ModuleRegistry(capacity=None)
+
+        self.ontologies = {}
+        self.imports = {}
+        self.results = {}
+
+        self.timings = {}
+
+    def files(self):
+        """
+        :return List of the .clif files under the root, sorted, without those in IGNORES folders
+        """
+
+        result = []
+
+        for directory, subdirs, files in os.walk(self.root):
+            subdirs[:] = sorted(x for x in subdirs if x not in IGNORES)
+            result.extend(os.path.join(directory, x) for x in sorted(files) if x.endswith('.clif'))
+
+        return result
+
+    def scan(self):
+        """
+        Parse every module (without its imports) and record which modules of the repository it imports
+        """
+
+        started = time.monotonic()
+
+        names = self.files()
+        known = set(names)
+
+        for name in names:
+
+            try:
+                ontology = Parser.parse_file(name, self.sub, self.base, preserve_conditionals=self.preserve_conditionals, cache=self.cache, engine=self.engine)
+            except TypeError as e:
+                LOGGER.error("Error parsing " + name + ": " + str(e))
+                ontology = None
+
+            self.ontologies[name] = ontology
+            self.imports[name] = []
+
+            if ontology is None:
+                continue
+
+            for uri in ontology.imports:
+                path = ontology.module_key(uri)[0]
+                if path in known and path != name:
+                    self.imports[name].append(path)
+
+        self.timings['scan'] = time.monotonic() - started
+
+        LOGGER.info("Found " + str(len(names)) + " modules in " + self.root)
+
+    def levels(self):
+        """
+        Group the modules by their depth in the import graph
+
+        :return List of lists of file names, the modules without imports in the repository
+                first, modules with cyclic imports (and the modules importing them) together on the last level
+        """
+
+        remaining = dict((name, set(imports)) for name, imports in self.imports.items())
+        result = []
+
+        while remaining:
+
+            level = sorted(name for name, imports in remaining.items() if not imports)
+
+            if not level:
+                result.append(sorted(remaining))
+                break
+
+            result.append(level)
+
+            for name in level:
+                del remaining[name]
+            for imports in remaining.values():
+                imports.difference_update(level)
+
+        return result
+
+    def check(self, max_parallel_reasoners=None):
+        """
+        Check all modules level by level, scanning the repository first if necessary
+
+        :param int max_parallel_reasoners, number of reasoners running at the same time (the number of CPUs by default)
+        :return generator of the result of each module as soon as it is known: a dict with the
+                module, its level, its imports in the repository, the result (see RESULTS), the
+                reasoner that found it, the seconds the reasoner took and the seconds since the
+                check of the module was set up, and the import it was propagated from
+        """
+
+        if not self.ontologies:
+            self.scan()
+
+        started = time.monotonic()
+
+        for depth, level in enumerate(self.levels()):
+
+            LOGGER.info("Checking level " + str(depth) + " with " + str(len(level)) + " modules")
+
+            if any(x in level for name in level for x in self.imports[name]):
+                LOGGER.warning("Cyclic imports between the modules " + ", ".join(level))
+
+            to_check = []
+
+            for name in level:
+
+                if self.ontologies[name] is None:
+                    yield self.record(name, depth, macleod.Ontology.ERROR)
+                    continue
+
+                inconsistent = [x for x in self.imports[name] if x in self.results and self.results[x]['value'] == macleod.Ontology.INCONSISTENT]
+
+                if inconsistent:
+                    LOGGER.info("INCONSISTENT IMPORT " + inconsistent[0] + " of " + name)
+                    yield self.record(name, depth, macleod.Ontology.INCONSISTENT, propagated_from=inconsistent[0])
+                else:
+                    to_check.append(name)
+
+            for (ontology, return_value, fastest_reasoner, seconds) in self.run([self.ontologies[name] for name in to_check], max_parallel_reasoners):
+                yield self.record(ontology.name, depth, return_value, fastest_reasoner, seconds)
+
+        self.timings['check'] = time.monotonic() - started
+
+    def run(self, ontologies, max_parallel_reasoners=None):
+        """
+        Check the consistency of the modules of one level concurrently
+
+        :return generator of (ontology, return value, fastest reasoner, seconds since it was set up)
+        """
+
+        prepared = {}
+
+        def prepare():
+            for ontology in ontologies:
+                prepared[id(ontology)] = time.monotonic()
+                with self.registry.scope():
+                    ontology.resolve_imports()
+                if self.nontrivial:
+                    ontology.add_nontrivial_axioms()
+                yield ontology
+
+        for (ontology, return_value, fastest_reasoner) in check_many(prepare(), max_parallel_reasoners, self.results_cache):
+            yield (ontology, return_value, fastest_reasoner, time.monotonic() - prepared[id(ontology)])
+
+    def record(self, name, depth, value, reasoner=None, seconds=0.0, propagated_from=None):
+
+        result = {
+            'module': name,
+            'level': depth,
+            'imports': self.imports[name],
+            'result': RESULTS.get(value, str(value)),
+            'value': value,
+            'reasoner': reasoner.name if reasoner is not None else None,
+            'reasoner_seconds': reasoner.time if reasoner is not None else None,
+            'output': reasoner.output_file if reasoner is not None else None,
+            'seconds': seconds,
+            'propagated_from': propagated_from,
+        }
+
+        self.results[name] = result
+
+        return result
+
+    def summary(self):
+        """
+        :return dict, counts of the results, timings and the results of all modules, to be dumped as JSON
+        """
+
+        counts = dict((x, 0) for x in RESULTS.values())
+        for result in self.results.values():
+            counts[result['result']] = counts.get(result['result'], 0) + 1
+
+        return {
+            'root': self.root,
+            'modules': len(self.ontologies),
+            'levels': len(self.levels()),
+            'propagated': sum(1 for x in self.results.values() if x['propagated_from'] is not None),
+            'counts': counts,
+            'timings': dict(self.timings),
+            'results': [self.results[name] for name in sorted(self.results)],
+        }
+
+    def write_summary(self, filename):
+        """
+        Write the summary as JSON
+
+        :return String filename
+        """
+
+        with open(filename, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+        return filename
@@ -18,6 +18,7 @@ import logging
 import macleod.dl.utilities as Utility
 from macleod.dl.owl import Owl
 from macleod.logical.symbol import Predicate
+from macleod.logical.clauses import ClauseSet
 
 LOGGER = logging.getLogger(__name__)
 
@@ -27,8 +28,18 @@ def reset_seen():
 
 def translate_owl(axiom):
     """
+    Split an FF-PCNF axiom into the parts that are translated separately.
+
+    :param Axiom axiom, the FF-PCNF axiom, or a ClauseSet of its clauses
+    :return Generator of Logicals
     """
 
+    if isinstance(axiom, ClauseSet):
+        for pruned_logical in axiom.split():
+            print(" + yielded: {}".format(str(pruned_logical)))
+            yield pruned_logical
+        return
+
     logicals = []
     sentence = axiom.sentence
     Utility.split_logical(sentence, logicals, [], [], [])
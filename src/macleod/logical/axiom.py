@@ -3,6 +3,7 @@ Axiom class
 """
 
 import copy
+import io
 import logging
 import functools
 
@@ -11,11 +12,55 @@ from macleod.logical.connective import (Conjunction, Disjunction, Connective, Im
 from macleod.logical.quantifier import (Universal, Existential, Quantifier)
 from macleod.logical.negation import Negation
 from macleod.logical.symbol import (Function, Predicate)
+import macleod.logical.symbol as Symbol
+from macleod.logical.clauses import ClauseSet
+from macleod.logical.emitter import Emitter
+import macleod.logical.emitter as Emitters
 import macleod.logical.utils as Util
+import macleod.logical.normal_form as NormalForm
+from macleod.logical.node import thaw
 
 LOGGER = logging.getLogger(__name__)
 
 
+def analysis_property(index, description):
+    """
+    Read-only attribute of an Axiom backed by its lazily built analysis
+
+    :param int index, position of the list in the analysis
+    :param String description, what the list contains
+    """
+
+    return property(lambda self: self.get_analysis()[index], doc="List of all {}".format(description))
+
+
+def has_unquoted_names(term):
+    """
+    Check whether any argument of a predicate or function is a name with
+    special symbols that is not yet in quotation marks, i.e. whether quoting
+    the constants of the term could change it.
+
+    :param Logical term, the term to search
+    :return Boolean
+    """
+
+    stack = [term]
+
+    while stack:
+        current = stack.pop()
+
+        if isinstance(current, (Predicate, Function)):
+            for var in current.variables:
+                if isinstance(var, Function):
+                    stack.append(var)
+                elif not var.isalnum() and not (len(var) > 1 and var[0] == var[-1] == "'"):
+                    return True
+        else:
+            stack.extend(current.get_term())
+
+    return False
+
+
 class Axiom(object):
     """
     Used as a wrapper around individual sentences given in an ontology. Contains
@@ -27,10 +72,11 @@ class Axiom(object):
     :return Axiom axiom
     """
 
-    # Internal axiom counter for tptp and ladr translations
+    # Internal axiom counter, identifies axioms within the process (the
+    # translations name them after their content instead, see get_name())
     axiom_id = 1
 
-    def __init__(self, sentence):
+    def __init__(self, sentence, transient=False):
 
         if not isinstance(sentence, Logical):
             raise ValueError("Axiom need Logicals")
@@ -38,24 +84,47 @@ class Axiom(object):
         self.sentence = sentence
         self.extra_sentences = []
 
-        self.unary_predicates = None
-        self.binary_predicates = None
-        self.nary_predicates = None
-        self.negated_predicates = None
-        self.positive_predicates = None
-        self.uni_quantifiers = None
-        self.uni_variables = None
-        self.exi_quantifiers = None
-        self.exi_variables = None
-        self.consts = None
-        self.functs = None
+        # Lazily built cache of useful information, see get_analysis()
+        self.analysis = None
+        self.analyzed = None
+
+        # Number of predicates introduced by a definitional CNF
+        self.definitions = 0
 
         self.id = Axiom.axiom_id
         Axiom.axiom_id = Axiom.axiom_id + 1
 
-        # Build our cache of useful information
-        # TODO: Figure out how to not make it crash rather than just comment this out
-        self.analyze_logical()
+        # Lazily derived name of the axiom in the TPTP output
+        self.name = None
+
+        # Transient axioms, like the intermediate steps of ff_pcnf(), are
+        # neither analyzed nor have their constants quoted
+        if not transient and has_unquoted_names(self.sentence):
+            self.analyze_logical()
+
+    uni_quantifiers = analysis_property(0, 'universal quantifiers')
+    exi_quantifiers = analysis_property(1, 'existential quantifiers')
+    unary_predicates = analysis_property(2, 'unary predicates')
+    binary_predicates = analysis_property(3, 'binary predicates')
+    nary_predicates = analysis_property(4, 'n-ary predicates')
+    negated_predicates = analysis_property(5, 'negated predicates')
+    positive_predicates = analysis_property(6, 'non-negated predicates')
+    uni_variables = analysis_property(7, 'universally quantified variables')
+    exi_variables = analysis_property(8, 'existentially quantified variables')
+    consts = analysis_property(9, 'constants')
+    functs = analysis_property(10, 'functions')
+
+    def get_name(self):
+        """
+        Name of the axiom in the TPTP output, derived from its TPTP translation
+
+        :return String name
+        """
+
+        if self.name is None:
+            self.name = Emitters.formula_name(Emitter(Emitters.TPTP).to_string(self.sentence))
+
+        return self.name
 
     def quantifiers(self):
         """
@@ -175,129 +244,144 @@ class Axiom(object):
 
         return self.consts
 
-    def substitute_functions(self):
+    def substitute_functions(self, transient=False):
         """
         Recurse over the contained logical replacing any nested functions with
         new predicates.
+
+        :param Boolean transient, skip the analysis of the new axiom
         """
 
-        functions = []
-        ret_object = copy.deepcopy(self.sentence)
-        axiom = Axiom(Util.dfs_functions(ret_object, functions, None))
+        sentence, functions = NormalForm.substitute_functions(self.sentence.freeze())
+        axiom = Axiom(thaw(sentence), transient)
 
         # Form explicit function declaration to keep tight logical equivalence
         declarations = []
-        unique_functions = {f.name for f in functions if len(f.variables) == 2}
 
-        for function in unique_functions:
+        for function in functions:
             LOGGER.debug('Adding function declaration on: {}'.format(function))
-            term_one = ~(Predicate(function, ['a', 'b']))
-            term_two = ~(Predicate(function, ['a', 'c']))
-            equality = Predicate('=', ['c', 'b'])
-            sentence = Universal(['a', 'b', 'c'], term_one | term_two | equality)
-            declarations.append(Axiom(sentence))
+            declarations.append(Axiom(thaw(NormalForm.declaration(function))))
 
         return axiom, declarations
 
-    def standardize_variables(self):
+    def standardize_variables(self, transient=False):
         """
         Recurse over the contained logical substituting all variables to ensure
         that only unique variables exist.
+
+        :param Boolean transient, skip the analysis of the new axiom
         """
 
-        ret_object = copy.deepcopy(self.sentence)
-        return Axiom(Util.dfs_standardize(ret_object, Util.generator(),))
+        return Axiom(thaw(NormalForm.standardize_variables(self.sentence.freeze())), transient)
 
-    def push_negation(self):
+    def push_negation(self, transient=False):
         """
         Recurse over the logical pushing negation down to the predicate level.
+
+        :param Boolean transient, skip the analysis of the new axiom
         """
 
-        ret_object = copy.deepcopy(self.sentence)
-        return Axiom(Util.dfs_negate(ret_object))
+        return Axiom(thaw(NormalForm.push_negation(self.sentence.freeze())), transient)
 
-    def create_prenex(self):
+    def create_prenex(self, transient=False, order=NormalForm.UNIVERSALS_FIRST):
         """
-        Recurse over the logical pulling quantifiers to the front.
+        Pull the quantifiers of the logical to the front.
+
+        :param Boolean transient, skip the analysis of the new axiom
+        :param String order, order of quantifiers where it is free, see NormalForm.create_prenex
         """
 
-        # Acquire the starting Logical
-        ret_obj = copy.deepcopy(self.sentence)
+        return Axiom(thaw(NormalForm.create_prenex(self.sentence.freeze(), order)), transient)
 
-        # Build the reverse BFS queue
-        queue = Util.reverse_bfs(ret_obj)
+    def distribute_disjunctions(self):
+        """
+        Recursively distribute disjunctions to form a valid conjunctive normal
+        form Logical
+        """
 
-        # Traverse all the Logicals in reverse BFS order
-        for term, parent in queue:
+        return Axiom(thaw(NormalForm.distribute_disjunctions(self.sentence.freeze())))
 
-            LOGGER.debug("Term: " + repr(term))
+    def definitional_cnf(self, threshold=NormalForm.DEFINITION_THRESHOLD):
+        """
+        Form a conjunctive normal form Logical that introduces new predicates
+        for conjunctions instead of distributing disjunctions over them into
+        more than threshold clauses. The result is only equisatisfiable.
 
-            if isinstance(term, Connective):
+        :param int threshold, maximum number of clauses of a distributed disjunction
+        :return Axiom cnf, with the number of new predicates in cnf.definitions
+        """
 
-                # Quantifier coalescence
-                coalesced_term = term.coalesce()
-                LOGGER.debug("Coalesced Term: " + repr(coalesced_term))
+        sentence, definitions = NormalForm.definitional_cnf(self.sentence.freeze(), threshold)
 
-                if isinstance(coalesced_term, Connective):
-                    scoped_term = coalesced_term.rescope(parent)
-                    LOGGER.debug("Rescoped Term: " + repr(scoped_term))
-                else:
-                    scoped_term = coalesced_term
+        cnf = Axiom(thaw(sentence))
+        cnf.definitions = definitions
 
+        return cnf
 
-                if not parent is None:
-                    # Nested within the BFS tree
-                    parent.remove_term(term)
-                    parent.set_term(scoped_term)
+    def ff_pcnf(self, cnf=NormalForm.NAIVE, threshold=NormalForm.DEFINITION_THRESHOLD, prenex=NormalForm.UNIVERSALS_FIRST):
+        """
+        Apply logical operations to translate the axiom into a function free
+        prenex conjunctive normal form. None of the steps modifies or copies
+        the axiom, see normal_form.py.
 
-                else:
-                    # Hit the top level Logical
-                    ret_obj = scoped_term
+        :param String cnf, NormalForm.NAIVE to distribute disjunctions (default)
+               or NormalForm.DEFINITIONAL to introduce new predicates instead
+               where the number of clauses would exceed threshold
+        :param int threshold, maximum number of clauses of a distributed
+               disjunction in the definitional CNF
+        :param String prenex, NormalForm.UNIVERSALS_FIRST (default) or
+               NormalForm.EXISTENTIALS_FIRST to pull the quantifiers to the
+               front in a single pass, taking universals or existentials
+               first where their order is free
+        :return Axiom cnf
+        """
 
-        if isinstance(ret_obj, Quantifier):
-            LOGGER.debug("Duplicated Prenex: " + repr(ret_obj))
-            ret_obj = ret_obj.simplify()
+        if cnf not in NormalForm.CNF_MODES:
+            raise ValueError("Unknown conjunctive normal form: {}".format(cnf))
 
-        return Axiom(ret_obj)
+        if prenex not in NormalForm.PRENEX_MODES:
+            raise ValueError("Unknown quantifier order: {}".format(prenex))
 
-    def distribute_disjunctions(self):
-        """
-        Recursively distribute disjunctions to form a valid conjunctive normal
-        form Logical
-        """
+        # Number the new variables and predicates within the axiom (or within
+        # an enclosing translation of a whole ontology)
+        with Symbol.numbering():
+            LOGGER.debug("Starting Axiom: " + repr(self))
 
-        ret_object = copy.deepcopy(self.sentence)
-        return Axiom(ret_object.to_onf())
+            # The intermediate axioms are thrown away, so they are not analyzed
+            function_free, declaration = self.substitute_functions(transient=True)
+            LOGGER.debug("Function Free: " + repr(function_free))
 
-    def ff_pcnf(self):
-        """
-        Apply logical operations to translate the axiom into a function free
-        prenex conjunctive normal form.
-        """
+            unique_variables = function_free.standardize_variables(transient=True)
+            LOGGER.debug("Unique Variables: " + repr(unique_variables))
 
-        copied = copy.deepcopy(self)
-        LOGGER.debug("Starting Axiom: " + repr(copied))
+            distributed_negation = unique_variables.push_negation(transient=True)
+            LOGGER.debug("Distributed Negation: " + repr(distributed_negation))
 
-        function_free, declaration = copied.substitute_functions()
-        LOGGER.debug("Function Free: " + repr(function_free))
+            prenex_form = distributed_negation.create_prenex(transient=True, order=prenex)
+            LOGGER.debug("Prenex Form: " + repr(prenex_form))
 
-        unique_variables = function_free.standardize_variables()
-        LOGGER.debug("Unique Variables: " + repr(unique_variables))
+            if cnf == NormalForm.DEFINITIONAL:
+                cnf = prenex_form.definitional_cnf(threshold)
+            else:
+                cnf = prenex_form.distribute_disjunctions()
+            LOGGER.debug("CNF Form: " + repr(cnf))
 
-        distributed_negation = unique_variables.push_negation()
-        LOGGER.debug("Distributed Negation: " + repr(distributed_negation))
+            #Add additional function declarations if they exist
+            if declaration is not None:
+                cnf.extra_sentences = declaration
 
-        prenex_form = distributed_negation.create_prenex()
-        LOGGER.debug("Prenex Form: " + repr(prenex_form))
+            return cnf
 
-        cnf = prenex_form.distribute_disjunctions()
-        LOGGER.debug("CNF Form: " + repr(cnf))
+    def clause_set(self):
+        """
+        Compact set of the clauses of this axiom, which has to be in FF-PCNF
+        (e.g. the result of ff_pcnf()). Duplicate, tautological and subsumed
+        clauses are dropped, see clauses.py.
 
-        #Add additional function declarations if they exist
-        if declaration is not None:
-            cnf.extra_sentences = declaration
+        :return ClauseSet clauses
+        """
 
-        return cnf
+        return ClauseSet.from_axiom(self)
 
     def is_explicit_definition(self):
         """
@@ -332,223 +416,105 @@ class Axiom(object):
                 return defined_term
 
 
+    def get_analysis(self):
+        """
+        Return the cache of useful information about the contained Logical,
+        building it on first access or after the sentence has been replaced.
+
+        :return List analysis, see __analyze_logical__
+        """
+
+        if self.analysis is None or self.analyzed is not self.sentence:
+            self.analysis = __analyze_logical__(self.sentence)
+            self.analyzed = self.sentence
+
+        return self.analysis
+
     def analyze_logical(self):
         """
         Build a cache of useful information about the contained Logical.
         """
 
         # TODO need to store information about functions as well
-        analysis = __analyze_logical__(self.sentence)
-
-        self.uni_quantifiers = analysis[0]
-        self.exi_quantifiers = analysis[1]
-        self.unary_predicates = analysis[2]
-        self.binary_predicates = analysis[3]
-        self.nary_predicates = analysis[4]
-        self.negated_predicates = analysis[5]
-        self.positive_predicates = analysis[6]
-        self.uni_variables = analysis[7]
-        self.exi_variables = analysis[8]
-        self.consts = analysis[9]
-        self.functs = analysis[10]
+        analysis = self.get_analysis()
 
         # surround constants with special symbols with quotation marks
-        self.sentence = Util.quote_constants(self.sentence, self.consts)
+        self.sentence = Util.quote_constants(self.sentence, analysis[9])
+
+        # Keep the analysis, which names the constants without quotation marks
+        self.analyzed = self.sentence
 
 
-    def to_tptp(self):
+    def to_tptp(self, emitter=None):
         """
         Produce a TPTP representation of this axiom.
 
+        :param Emitter emitter, TPTP emitter to reuse, e.g. for all axioms of an ontology
         :return str tptp, TPTP formatted version of this axiom
         """
 
-        # For printing to TPTP add Axiom identifier to each variable to keep it unique
-        variable_map = {}
-        for var in self.variables():
-            variable_map[var.upper()] = var.upper() + str(self.id)
-
-        def tptp_logical(logical):
-            """
-            :param logical: term to be translated to TPTP
-            :return: TPTP version of the logical term; variables are converted to upper case and predicates and functions to lower case
-            """
-
-            if isinstance(logical, str):
-                if logical in self.consts:
-                    return str.lower(logical)
-                else:
-                    return str.upper(logical)
-
-            elif isinstance(logical, Predicate):
-                if logical.is_equality():
-                    return tptp_logical(logical.variables[0])  + logical.name + tptp_logical(logical.variables[1])
-                elif logical.name.isalnum():
-                    # leave alphanumeric predicate symbols names as-is
-                    return "{}({})".format(str.lower(logical.name), ",".join([tptp_logical(t) for t in logical.variables]))
-                else:
-                    # if the predicate symbol contains any special symbols, wrap it in single quotes
-                    return "'{}'({})".format(str.lower(logical.name), ",".join([tptp_logical(t) for t in logical.variables]))
-
-            elif isinstance(logical, Function):
-                if logical.name.isalnum():
-                    # leave alphanumeric function symbols as-is
-                    return "{}({})".format(str.lower(logical.name), ",".join([tptp_logical(t) for t in logical.variables]))
-                else:
-                    # if the function symbol contains any special symbols, wrap it in single quotes
-                    return "'{}'({})".format(str.lower(logical.name), ",".join([tptp_logical(t) for t in logical.variables]))
-
-            elif isinstance(logical, Negation):
-                if isinstance(logical.terms[0], Negation):
-                    # get rid of double negation
-                    return tptp_logical(logical.terms[0].terms[0])
-                elif isinstance(logical.terms[0], Predicate):
-                    # put parentheses around single predicates to not mix them up with special-symbol predicates
-                    return "~({})".format(tptp_logical(logical.terms[0]))
-                else:
-                    return "~{}".format(tptp_logical(logical.terms[0]))
-
-            elif isinstance(logical, Conjunction):
-                if len(logical.terms)>1:
-                    return "({})".format(" & ".join([tptp_logical(t) for t in logical.terms]))
-                else:
-                    return "{}".format(tptp_logical(logical.terms[0]))
-
-            elif isinstance(logical, Disjunction):
-                if len(logical.terms)>1:
-                    return "({})".format(" | ".join([tptp_logical(t) for t in logical.terms]))
-                else:
-                    return "{}".format(tptp_logical(logical.terms[0]))
-
-            elif isinstance(logical, Implication):
-                return "({} => {})".format(tptp_logical(logical.terms[0]),tptp_logical(logical.terms[1]))
-
-            elif isinstance(logical, Biconditional):
-                return "({} <=> {})".format(tptp_logical(logical.terms[0]),tptp_logical(logical.terms[1]))
-
-            elif isinstance(logical, Universal):
-                return "({} ({}))".format(("! [{}] : " * len(logical.variables)).format(*[str.upper(var) for var in logical.variables]), tptp_logical(logical.terms[0]))
-
-            elif isinstance(logical, Existential):
-                return "({} ({}))".format(("? [{}] : " * len(logical.variables)).format(*[str.upper(var) for var in logical.variables]), tptp_logical(logical.terms[0]))
-
-            else:
-                raise ValueError("Not a valid type for TPTP output")
-
-        return "fof(axiom{}, axiom, {}).".format(str(self.id*10),tptp_logical(self.sentence))
+        out = io.StringIO()
+        self.write_tptp(out, emitter)
 
+        return out.getvalue()
 
-    def to_ladr(self):
+    def write_tptp(self, out, emitter=None):
         """
-        Produce a LADR representation of this axiom.
+        Write the TPTP representation of this axiom to a text buffer.
 
-        :return str ladr, LADR formatted version of this axiom
+        :param out, the text buffer
+        :param Emitter emitter, TPTP emitter to reuse, e.g. for all axioms of an ontology
         """
 
-        def ladr_logical(logical):
-
-            if isinstance(logical, str):
-                return logical
-            elif isinstance(logical, Predicate):
-                return "{}({})".format(logical.name, ",".join([ladr_logical(t) for t in logical.variables]))
-
-            elif isinstance(logical, Function):
-                return "{}({})".format(logical.name, ",".join([ladr_logical(t) for t in logical.variables]))
-
-            elif isinstance(logical, Negation):
-                if isinstance(logical.terms[0], Negation):
-                    # get rid of double negation
-                    return ladr_logical(logical.terms[0].terms[0])
-                elif isinstance(logical.terms[0], Predicate):
-                    # put parentheses around single predicates to not mix them up with special-symbol predicates
-                    return "-({})".format(ladr_logical(logical.terms[0]))
-                else:
-                    return "-{}".format(ladr_logical(logical.terms[0]))
-
-            elif isinstance(logical, Conjunction):
-                if len(logical.terms)>1:
-                    return "({})".format(" & ".join([ladr_logical(t) for t in logical.terms]))
-                else:
-                    return "{}".format(ladr_logical(logical.terms[0]))
-
-            elif isinstance(logical, Disjunction):
-                if len(logical.terms)>1:
-                    return "({})".format(" | ".join([ladr_logical(t) for t in logical.terms]))
-                else:
-                    return "{}".format(ladr_logical(logical.terms[0]))
-
-            elif isinstance(logical, Implication):
-                return "({} -> {})".format(ladr_logical(logical.terms[0]),ladr_logical(logical.terms[1]))
-
-            elif isinstance(logical, Biconditional):
-                return "({} <-> {})".format(ladr_logical(logical.terms[0]),ladr_logical(logical.terms[1]))
+        if emitter is None:
+            emitter = Emitter(Emitters.TPTP)
 
-            elif isinstance(logical, Universal):
-                return "({} {})".format(("all {} " * len(logical.variables)).format(*logical.variables), ladr_logical(logical.terms[0]))
+        formula = emitter.to_string(self.sentence)
 
-            elif isinstance(logical, Existential):
-                return "({} {})".format(("exists {} " * len(logical.variables)).format(*logical.variables), ladr_logical(logical.terms[0]))
+        if self.name is None:
+            self.name = Emitters.formula_name(formula)
 
-            else:
-                raise ValueError("Not a valid type for LADR output")
-
-        return "{}.".format(ladr_logical(self.sentence))
+        out.write("fof({}, axiom, {}).".format(self.name, formula))
 
-    def to_latex(self):
+    def to_ladr(self, emitter=None):
         """
         Produce a LADR representation of this axiom.
 
+        :param Emitter emitter, LADR emitter to reuse, e.g. for all axioms of an ontology
         :return str ladr, LADR formatted version of this axiom
         """
 
-        def latex_logical(logical):
-
-            if isinstance(logical, str):
-                return logical
-
-            elif isinstance(logical, Predicate):
-                return "{}({})".format("\\textrm{" + logical.name.replace('_','\_') +"}", ",".join([latex_logical(t) for t in logical.variables]))
+        out = io.StringIO()
+        self.write_ladr(out, emitter)
 
-            elif isinstance(logical, Function):
-                return "{}({})".format("\\textrm{" + logical.name.replace('_','\_') + "}", ",".join([latex_logical(t) for t in logical.variables]))
+        return out.getvalue()
 
-            elif isinstance(logical, Negation):
-                if isinstance(logical.terms[0], Negation):
-                    # get rid of double negation
-                    return latex_logical(logical.terms[0].terms[0])
-                elif isinstance(logical.terms[0], Predicate):
-                    # put parentheses around single predicates to not mix them up with special-symbol predicates
-                    return "\\neg \\left({}\\right)".format(latex_logical(logical.terms[0]))
-                else:
-                    return "\\neg {}".format(latex_logical(logical.terms[0]))
+    def write_ladr(self, out, emitter=None):
+        """
+        Write the LADR representation of this axiom to a text buffer.
 
-            elif isinstance(logical, Conjunction):
-                if len(logical.terms)>1:
-                    return "\\left({}\\right)".format(" \\land ".join([latex_logical(t) for t in logical.terms]))
-                else:
-                    return "{}".format(latex_logical(logical.terms[0]))
-            elif isinstance(logical, Disjunction):
-                if len(logical.terms)>1:
-                    return "\\left({}\\right)".format(" \\lor ".join([latex_logical(t) for t in logical.terms]))
-                else:
-                    return "{}".format(latex_logical(logical.terms[0]))
+        :param out, the text buffer
+        :param Emitter emitter, LADR emitter to reuse, e.g. for all axioms of an ontology
+        """
 
-            elif isinstance(logical, Implication):
-                return "\\left[ {} \\rightarrow {} \\right]".format(latex_logical(logical.terms[0]), latex_logical(logical.terms[1]))
+        if emitter is None:
+            emitter = Emitter(Emitters.LADR)
 
-            elif isinstance(logical, Biconditional):
-                return "\\left[ {} \\leftrightarrow {} \\right]".format(latex_logical(logical.terms[0]), latex_logical(logical.terms[1]))
+        emitter.emit(self.sentence, out)
+        out.write(".")
 
-            elif isinstance(logical, Universal):
-                return "{} \\left[ {} \\right]".format(("\\forall {}\\; " * len(logical.variables)).format(*logical.variables), latex_logical(logical.terms[0]))
+    def to_latex(self, emitter=None):
+        """
+        Produce a LaTeX representation of this axiom.
 
-            elif isinstance(logical, Existential):
-                return "{} \\left[ {} \\right]".format(("\\exists {}\\; " * len(logical.variables)).format(*logical.variables), latex_logical(logical.terms[0]))
+        :param Emitter emitter, LaTeX emitter to reuse, e.g. for all axioms of an ontology
+        :return str latex, LaTeX formatted version of this axiom
+        """
 
-            else:
-                raise ValueError("Not a valid type for LaTeX output")
+        if emitter is None:
+            emitter = Emitter(Emitters.LATEX)
 
-        return "{}".format(latex_logical(self.sentence))
+        return emitter.to_string(self.sentence)
 
 
     def __repr__(self):
@@ -610,7 +576,7 @@ def __analyze_logical__(term):
                     # TODO: Bug here if a constant with the same name as a variable appears
                     #       in a quantified + un-quantified portion of the same logical. Really
                     #       should never happen, but still will need to fix at some point.
-                    if var not in accumulator[7] and var not in accumulator[8]:
+                    if var not in bound:
                         # keeping track of all constants
                         accumulator[9].append(var)
 
@@ -623,6 +589,8 @@ def __analyze_logical__(term):
                 accumulator[1].append(term)
                 accumulator[8].extend(term.variables)
 
+            bound.update(term.variables)
+
             _ = [analyze_logical(x, accumulator, term) for x in term.get_term()]
 
         else:
@@ -630,6 +598,8 @@ def __analyze_logical__(term):
             _ = [analyze_logical(x, accumulator, term) for x in term.get_term()]
 
 
+    # Variables quantified anywhere before in the search, as the set of accumulator[7] and accumulator[8]
+    bound = set()
     analysis = [[], [], [], [], [], [], [], [], [], [], []]
     analyze_logical(term, analysis, None)
     return analysis
@@ -0,0 +1,406 @@
+"""
+Compact clause sets of axioms in function free prenex conjunctive normal form.
+
+A ClauseSet keeps the quantifier prefix of an FF-PCNF axiom and the clauses of
+its matrix. Predicate names and terms (variables and constants) are numbered,
+each distinct literal is encoded once as integers -- symbol id, polarity,
+arity and argument ids -- in a flat array, and a clause is a sorted array of
+literal ids. Clauses are added through add(), which drops duplicate and
+tautological clauses and applies forward and backward subsumption: a clause
+whose literals include all literals of another clause is redundant, since all
+clauses share the same quantifier prefix.
+"""
+
+import array
+import logging
+
+from macleod.logical.connective import (Conjunction, Disjunction)
+from macleod.logical.emitter import formula_name
+from macleod.logical.negation import Negation
+from macleod.logical.quantifier import (Universal, Existential)
+from macleod.logical.symbol import Predicate
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ClauseSet(object):
+    '''
+    Clauses under a quantifier prefix. Use ClauseSet.from_axiom() (or
+    Axiom.clause_set()) to create the clause set of an FF-PCNF axiom.
+
+    prefix      -- list of (Universal or Existential, tuple of variables)
+    symbols     -- predicate names, indexed by symbol id
+    terms       -- variables and constants, indexed by term id
+    literals    -- encoded literals: symbol id, polarity (1 positive, 0
+                   negated), arity and the argument ids of each literal
+    offsets     -- start of every literal in literals, indexed by literal id
+    clauses     -- sorted arrays of literal ids (None for removed clauses)
+    duplicates, tautologies, subsumed -- number of clauses dropped for either reason
+    '''
+
+    def __init__(self, prefix=None, name=None):
+
+        self.prefix = [] if prefix is None else prefix
+        # Name of the clauses in the output, derived from them by default
+        self.name = name
+
+        self.symbols = []
+        self.symbol_ids = {}
+        self.terms = []
+        self.term_ids = {}
+
+        self.literals = array.array('i')
+        self.offsets = array.array('i')
+        self.literal_ids = {}
+
+        self.clauses = []
+        self.clause_ids = {}
+        # Clauses each literal occurs in, indexed by literal id
+        self.occurrences = []
+
+        self.duplicates = 0
+        self.tautologies = 0
+        self.subsumed = 0
+
+    @classmethod
+    def from_axiom(cls, axiom):
+        '''
+        Clause set of an axiom in FF-PCNF
+
+        :param Axiom axiom, the axiom, e.g. the result of Axiom.ff_pcnf()
+        :return ClauseSet
+        '''
+
+        return cls.from_logical(axiom.sentence)
+
+    @classmethod
+    def from_logical(cls, logical):
+        '''
+        Clause set of a quantifier prefix over a conjunction of disjunctions
+        of literals (or a single disjunction or literal)
+
+        :param Logical logical, the formula in FF-PCNF
+        :return ClauseSet
+        '''
+
+        prefix = []
+        matrix = logical
+
+        while isinstance(matrix, (Universal, Existential)):
+            prefix.append((type(matrix), tuple(matrix.variables)))
+            matrix = matrix.terms[0]
+
+        if getattr(matrix, 'is_true', False) or getattr(matrix, 'is_false', False):
+            raise ValueError("{} is not in FF-PCNF".format(logical))
+
+        clauses = cls(prefix)
+        conjuncts = matrix.terms if type(matrix) == Conjunction else [matrix]
+
+        for conjunct in conjuncts:
+
+            disjuncts = conjunct.terms if type(conjunct) == Disjunction else [conjunct]
+
+            if getattr(conjunct, 'is_true', False) or getattr(conjunct, 'is_false', False):
+                raise ValueError("{} is not in FF-PCNF".format(logical))
+
+            clauses.add([literal(x, logical) for x in disjuncts])
+
+        return clauses
+
+    def add(self, literals):
+        '''
+        Add a clause unless it is a tautology, a duplicate or subsumed by a
+        clause of the set, and remove the clauses that it subsumes
+
+        :param List literals, (String name, Boolean positive, Tuple arguments) triples
+        :return Boolean, True if the clause was added
+        '''
+
+        clause = sorted(set(self.encode(*x) for x in literals))
+        key = tuple(clause)
+
+        if key in self.clause_ids:
+            self.duplicates += 1
+            return False
+
+        if self.is_tautology(clause):
+            self.tautologies += 1
+            return False
+
+        # Forward subsumption: count how many literals of each clause occur in the new one
+        counts = {}
+        for lit in clause:
+            for index in self.occurrences[lit]:
+                counts[index] = counts.get(index, 0) + 1
+                if counts[index] == len(self.clauses[index]):
+                    LOGGER.debug("Clause {} is subsumed by {}".format(self.format(clause), self.format(self.clauses[index])))
+                    self.subsumed += 1
+                    return False
+
+        # Backward subsumption: clauses that contain all literals of the new one
+        if len(clause) > 0:
+            candidates = set(min([self.occurrences[lit] for lit in clause], key=len))
+            for lit in clause:
+                candidates.intersection_update(self.occurrences[lit])
+        else:
+            candidates = set(i for i, c in enumerate(self.clauses) if c is not None)
+
+        for index in candidates:
+            LOGGER.debug("Clause {} subsumes {}".format(self.format(clause), self.format(self.clauses[index])))
+            self.remove(index)
+            self.subsumed += 1
+
+        index = len(self.clauses)
+        self.clauses.append(array.array('i', clause))
+        self.clause_ids[key] = index
+        for lit in clause:
+            self.occurrences[lit].add(index)
+
+        return True
+
+    def remove(self, index):
+
+        clause = self.clauses[index]
+
+        for lit in clause:
+            self.occurrences[lit].discard(index)
+
+        del self.clause_ids[tuple(clause)]
+        self.clauses[index] = None
+
+    def encode(self, name, positive, arguments):
+        '''
+        Id of a literal, encoding it if it is new
+
+        :return int
+        '''
+
+        symbol = self.symbol_ids.get(name)
+        if symbol is None:
+            symbol = self.symbol_ids[name] = len(self.symbols)
+            self.symbols.append(name)
+
+        key = [symbol, 1 if positive else 0, len(arguments)]
+
+        for term in arguments:
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                term_id = self.term_ids[term] = len(self.terms)
+                self.terms.append(term)
+            key.append(term_id)
+
+        key = tuple(key)
+
+        lit = self.literal_ids.get(key)
+        if lit is None:
+            lit = self.literal_ids[key] = len(self.offsets)
+            self.offsets.append(len(self.literals))
+            self.literals.extend(key)
+            self.occurrences.append(set())
+
+        return lit
+
+    def decode(self, lit):
+        '''
+        :param int lit, id of a literal
+        :return (String name, Boolean positive, Tuple arguments)
+        '''
+
+        offset = self.offsets[lit]
+        symbol, polarity, arity = self.literals[offset:offset + 3]
+        arguments = self.literals[offset + 3:offset + 3 + arity]
+
+        return self.symbols[symbol], polarity == 1, tuple([self.terms[t] for t in arguments])
+
+    def complement(self, lit):
+        '''
+        :return int, id of the opposing literal or None if it does not occur
+        '''
+
+        offset = self.offsets[lit]
+        arity = self.literals[offset + 2]
+        key = list(self.literals[offset:offset + 3 + arity])
+        key[1] = 1 - key[1]
+
+        return self.literal_ids.get(tuple(key))
+
+    def is_tautology(self, clause):
+
+        members = set(clause)
+
+        return any(self.complement(lit) in members for lit in clause)
+
+    def __len__(self):
+
+        return len(self.clause_ids)
+
+    def __iter__(self):
+        '''
+        Iterate over the clauses, as tuples of decoded literals
+        '''
+
+        for clause in self.clauses:
+            if clause is not None:
+                yield tuple([self.decode(lit) for lit in clause])
+
+    def variables(self):
+        '''
+        :return Set of the quantified variables
+        '''
+
+        return set(v for _, variables in self.prefix for v in variables)
+
+    def format(self, clause):
+
+        return " | ".join(["{}{}({})".format('' if p else '~', n, ",".join(a)) for n, p, a in [self.decode(x) for x in clause]])
+
+    def __repr__(self):
+
+        prefix = "".join(["{} {} ".format('forall' if q == Universal else 'exists', ",".join(v)) for q, v in self.prefix])
+
+        return "{}[{}]".format(prefix, " & ".join(["({})".format(self.format(c)) for c in self.clauses if c is not None]))
+
+    def to_logical(self, clauses=None):
+        '''
+        Formula of (some of) the clauses under the part of the quantifier
+        prefix that binds their variables
+
+        :param List clauses, clauses as returned by iterating over the set (all by default)
+        :return Logical
+        '''
+
+        clauses = list(self) if clauses is None else clauses
+
+        matrix = [to_disjunction(c) for c in clauses]
+        matrix = matrix[0] if len(matrix) == 1 else Conjunction(matrix)
+
+        used = set(a for c in clauses for _, _, arguments in c for a in arguments)
+
+        for quantifier, variables in reversed(self.prefix):
+            variables = [v for v in variables if v in used]
+            if variables:
+                matrix = quantifier(variables, matrix)
+
+        return matrix
+
+    def split(self):
+        '''
+        Split the clause set into formulas of single clauses where this keeps
+        the meaning of the axiom, the same way as dl.utilities.split_logical():
+        all clauses whose variables are not bound by nested existential
+        quantifiers are split off, the others stay together.
+
+        :return List of Logicals
+        '''
+
+        clauses = list(self)
+
+        if len(clauses) < 2:
+            return [self.to_logical()]
+
+        e_vars = []
+        for quantifier, variables in self.prefix:
+            if len(e_vars) > 0 or quantifier == Existential:
+                e_vars.extend(variables)
+
+        if len(e_vars) <= 1:
+            return [self.to_logical([c]) for c in clauses]
+
+        e_vars = set(e_vars)
+        split = []
+        others = []
+
+        for clause in clauses:
+            if any(a in e_vars for _, _, arguments in clause for a in arguments):
+                others.append(clause)
+            else:
+                split.append(self.to_logical([clause]))
+
+        if others:
+            split.append(self.to_logical(others))
+
+        return split
+
+    def to_tptp(self):
+        '''
+        TPTP representation of the clauses: a cnf formula per clause if all
+        variables are universally quantified, a single fof formula otherwise
+
+        :return List of Strings
+        '''
+
+        variables = self.variables()
+
+        def term(t):
+            return t.upper() if t in variables else t.lower()
+
+        def tptp_literal(lit):
+            name, positive, arguments = self.decode(lit)
+            if name == '=':
+                atom = "{}={}".format(term(arguments[0]), term(arguments[1]))
+            else:
+                symbol = name.lower() if name.isalnum() else "'{}'".format(name.lower())
+                atom = "{}({})".format(symbol, ",".join([term(a) for a in arguments]))
+            return atom if positive else "~({})".format(atom)
+
+        clauses = ["({})".format(" | ".join([tptp_literal(x) for x in c])) for c in self.clauses if c is not None]
+
+        if all(q == Universal for q, _ in self.prefix):
+            name = self.name if self.name is not None else formula_name(" & ".join(clauses))
+            return ["cnf({}_{}, axiom, {}).".format(name, i + 1, c) for i, c in enumerate(clauses)]
+
+        prefix = "".join(["{} [{}] : ".format('!' if q == Universal else '?', ",".join([term(v) for v in variables]))
+                          for q, variables in self.prefix])
+        formula = "({}({}))".format(prefix, " & ".join(clauses))
+        name = self.name if self.name is not None else formula_name(formula)
+
+        return ["fof({}, axiom, {}).".format(name, formula)]
+
+    def to_ladr(self):
+        '''
+        LADR representation of the clauses as a single formula
+
+        :return String
+        '''
+
+        def ladr_literal(lit):
+            name, positive, arguments = self.decode(lit)
+            atom = "{}({})".format(name, ",".join(arguments))
+            return atom if positive else "-({})".format(atom)
+
+        matrix = " & ".join(["({})".format(" | ".join([ladr_literal(x) for x in c])) for c in self.clauses if c is not None])
+
+        prefix = "".join(["{} {} ".format('all' if q == Universal else 'exists', v) for q, variables in self.prefix for v in variables])
+
+        return "({}({})).".format(prefix, matrix)
+
+
+def literal(term, logical):
+    '''
+    (name, positive, arguments) of a predicate or negated predicate
+    '''
+
+    positive = True
+
+    if isinstance(term, Negation):
+        positive = False
+        term = term.terms[0]
+
+    if not isinstance(term, Predicate) or not all(isinstance(v, str) for v in term.variables):
+        raise ValueError("{} is not in FF-PCNF".format(logical))
+
+    return term.name, positive, tuple(term.variables)
+
+
+def to_disjunction(clause):
+    '''
+    Logical of a clause of decoded literals
+    '''
+
+    literals = []
+
+    for name, positive, arguments in clause:
+        atom = Predicate(name, list(arguments))
+        literals.append(atom if positive else Negation(atom))
+
+    return literals[0] if len(literals) == 1 else Disjunction(literals)
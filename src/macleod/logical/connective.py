@@ -360,30 +360,37 @@ class Conjunction(Connective):
         #LOGGER.debug("Term to remove duplicate terms from: " + repr(self))
         new_terms = []
         negated_terms = []
+        # Nodes of the predicates in new_terms and of the predicates negated in negated_terms
+        positive = {}
+        negative = {}
         duplicate = False
         for term in self.terms:
             if isinstance(term, Negation):
-                negations = [t for t in new_terms if term.is_negation_of(t)]
-                if len(negations)>0:
+                key = term.terms[0].freeze() if isinstance(term.terms[0], Predicate) else None
+                if key is not None and key in positive:
                     duplicate = True
-                    LOGGER.debug("Removing opposing terms " + repr(term) + " and " + repr(negations[0]) + "from " +repr(self))
-                    new_terms.remove(negations[0])
+                    LOGGER.debug("Removing opposing terms " + repr(term) + " and " + repr(positive[key]) + "from " +repr(self))
+                    new_terms.remove(positive[key])
                     self.is_false = True
                     break
                 else:
                     negated_terms.append(term)
-            elif term not in new_terms:
-                negations = [t for t in negated_terms if t.is_negation_of(term)]
-                if len(negations)>0:
+                    if key is not None:
+                        negative.setdefault(key, []).append(term)
+            else:
+                key = term.freeze() if isinstance(term, Predicate) else None
+                if (key in positive) if key is not None else (term in new_terms):
+                    duplicate = True
+                    LOGGER.debug("Removing duplicate term " + repr(term) + "from " +repr(self))
+                elif negative.get(key):
                     duplicate = True
-                    LOGGER.debug("Removing opposing terms " + repr(term) + " and " + repr(negations[0]) + "from " +repr(self))
-                    negated_terms.remove(negations[0])
+                    LOGGER.debug("Removing opposing terms " + repr(term) + " and " + repr(negative[key][0]) + "from " +repr(self))
+                    negated_terms.remove(negative[key].pop(0))
                     break
                 else:
                     new_terms.append(term)
-            else:
-                duplicate = True
-                LOGGER.debug("Removing duplicate term " + repr(term) + "from " +repr(self))
+                    if key is not None:
+                        positive[key] = term
 
         if duplicate:
             #LOGGER.debug("Positive terms: " + repr(new_terms))
@@ -561,29 +568,36 @@ class Disjunction(Connective):
         #LOGGER.debug("Term to remove duplicate terms from: " + repr(self))
         new_terms = []
         negated_terms = []
+        # Nodes of the predicates in new_terms and of the predicates negated in negated_terms
+        positive = {}
+        negative = {}
         duplicate = False
         for term in self.terms:
             if isinstance(term, Negation):
-                negations = [t for t in new_terms if term.is_negation_of(t)]
-                if len(negations)>0:
+                key = term.terms[0].freeze() if isinstance(term.terms[0], Predicate) else None
+                if key is not None and key in positive:
                     duplicate = True
-                    LOGGER.debug("Removing opposing terms " + repr(term) + " and " + repr(negations[0]) + "from disjunction " +repr(self))
+                    LOGGER.debug("Removing opposing terms " + repr(term) + " and " + repr(positive[key]) + "from disjunction " +repr(self))
                     # opposing terms make disjunction vacuously true
                     self.is_true = True
                     break
                 else:
                     negated_terms.append(term)
-            elif term not in new_terms:
-                negations = [t for t in negated_terms if t.is_negation_of(term)]
-                if len(negations)>0:
+                    if key is not None:
+                        negative.setdefault(key, []).append(term)
+            else:
+                key = term.freeze() if isinstance(term, Predicate) else None
+                if (key in positive) if key is not None else (term in new_terms):
+                    duplicate = True
+                    LOGGER.debug("Removing duplicate term " + repr(term) + "from " +repr(self))
+                elif negative.get(key):
                     duplicate = True
-                    LOGGER.debug("Removing opposing terms " + repr(term) + " and " + repr(negations[0]) + "from " +repr(self))
-                    negated_terms.remove(negations[0])
+                    LOGGER.debug("Removing opposing terms " + repr(term) + " and " + repr(negative[key][0]) + "from " +repr(self))
+                    negated_terms.remove(negative[key].pop(0))
                 else:
                     new_terms.append(term)
-            else:
-                duplicate = True
-                LOGGER.debug("Removing duplicate term " + repr(term) + "from " +repr(self))
+                    if key is not None:
+                        positive[key] = term
 
         if duplicate:
             #LOGGER.debug("Positive terms: " + repr(new_terms))
@@ -0,0 +1,368 @@
+"""
+Iterative emitters of Logicals in the output formats of macleod.
+
+An Emitter writes a formula to a text buffer while walking it with an explicit
+stack instead of recursion, so the depth of an axiom is not limited by the
+recursion limit of Python. What is written for each kind of Logical is defined
+by a Dialect: a dispatch table from the Logical classes to handlers plus the
+translation of symbol, variable and constant names. A handler returns the
+output of a single node as a list of parts: strings are written as they are,
+Logicals are emitted in their place. The names are translated only once per
+emitter, so an emitter shared by all axioms of an ontology translates every
+symbol of the ontology once.
+
+Supporting a new output format only takes a new Dialect.
+"""
+
+import hashlib
+import io
+import logging
+
+from macleod.logical.connective import (Conjunction, Disjunction, Implication, Biconditional)
+from macleod.logical.quantifier import (Universal, Existential)
+from macleod.logical.negation import Negation
+from macleod.logical.symbol import (Function, Predicate)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Dialect(object):
+    '''
+    An output format: handlers for the Logical classes and the translation of names
+
+    name      -- name of the format, used in error messages
+    handlers  -- dict from Logical classes to functions (emitter, logical) -> list of parts
+    symbol    -- function translating the name of a predicate or function
+    variable  -- function translating the name of a variable
+    constant  -- function translating the name of a constant
+    '''
+
+    def __init__(self, name, handlers, symbol=str, variable=str, constant=str):
+
+        self.name = name
+        self.handlers = handlers
+        self.symbol = symbol
+        self.variable = variable
+        self.constant = constant
+
+
+class Release(object):
+    '''
+    Marker on the stack of an emitter at the end of the scope of a quantifier
+    '''
+
+    __slots__ = ('variables',)
+
+    def __init__(self, variables):
+
+        self.variables = variables
+
+
+class Emitter(object):
+    '''
+    Writes Logicals in a dialect, caching the translated names
+
+    :param Dialect dialect, the output format
+    '''
+
+    def __init__(self, dialect):
+
+        self.dialect = dialect
+        # Handlers by class, including subclasses found through their base classes
+        self.handlers = dict(dialect.handlers)
+
+        self.symbols = {}
+        self.variables = {}
+        self.constants = {}
+
+        # Number of enclosing quantifiers of each variable in the current scope of emit()
+        self.bound = {}
+
+    def handler(self, cls):
+
+        handler = self.handlers.get(cls)
+
+        if handler is None:
+            for base in cls.__mro__[1:]:
+                if base in self.dialect.handlers:
+                    handler = self.handlers[cls] = self.dialect.handlers[base]
+                    break
+            else:
+                raise ValueError("Not a valid type for {} output".format(self.dialect.name))
+
+        return handler
+
+    def symbol(self, name):
+        '''
+        :return String, the translated name of a predicate or function
+        '''
+
+        translated = self.symbols.get(name)
+        if translated is None:
+            translated = self.symbols[name] = self.dialect.symbol(name)
+
+        return translated
+
+    def variable(self, name):
+
+        translated = self.variables.get(name)
+        if translated is None:
+            translated = self.variables[name] = self.dialect.variable(name)
+
+        return translated
+
+    def term(self, term):
+        '''
+        :param term, a variable or constant name or a Function
+        :return the translated name or the Function, which is emitted in its place
+        '''
+
+        if not isinstance(term, str):
+            return term
+
+        if self.bound.get(term):
+            return self.variable(term)
+
+        translated = self.constants.get(term)
+        if translated is None:
+            translated = self.constants[term] = self.dialect.constant(term)
+
+        return translated
+
+    def bind(self, variables):
+        '''
+        Open the scope of a quantifier
+
+        :return Release, marker to put on the stack at the end of the scope
+        '''
+
+        for var in variables:
+            self.bound[var] = self.bound.get(var, 0) + 1
+
+        return Release(variables)
+
+    def emit(self, logical, out):
+        '''
+        Write a Logical to a text buffer
+
+        :param Logical logical, the formula or term to write
+        :param out, a text buffer (anything with a write method)
+        '''
+
+        bound = self.bound = {}
+        handlers = self.handlers
+        pieces = []
+        stack = [logical]
+
+        while stack:
+
+            item = stack.pop()
+            cls = type(item)
+
+            if cls is str:
+                pieces.append(item)
+            elif cls is Release:
+                for var in item.variables:
+                    bound[var] -= 1
+            else:
+                handler = handlers.get(cls) or self.handler(cls)
+                parts = handler(self, item)
+
+                # Leading strings are output right away instead of going through the stack
+                start = 0
+                for part in parts:
+                    if type(part) is not str:
+                        break
+                    pieces.append(part)
+                    start += 1
+
+                stack.extend(parts[:start - 1:-1] if start else parts[::-1])
+
+        out.write("".join(pieces))
+
+    def to_string(self, logical):
+        '''
+        :return String, the Logical written in the dialect
+        '''
+
+        out = io.StringIO()
+        self.emit(logical, out)
+
+        return out.getvalue()
+
+
+# Building blocks of handlers
+
+def application(emitter, logical):
+    '''
+    Predicate or function applied to its arguments
+    '''
+
+    arguments = [emitter.term(var) for var in logical.variables]
+
+    if all(type(arg) is str for arg in arguments):
+        return [emitter.symbol(logical.name) + '(' + ','.join(arguments) + ')']
+
+    parts = [emitter.symbol(logical.name), '(']
+
+    for i, arg in enumerate(arguments):
+        if i > 0:
+            parts.append(',')
+        parts.append(arg)
+
+    parts.append(')')
+
+    return parts
+
+
+def negation(prefix, opening, closing):
+    '''
+    Handler of negations, dropping double negation and putting parentheses
+    around single predicates to not mix them up with special-symbol predicates
+    '''
+
+    def handler(emitter, logical):
+
+        term = logical.terms[0]
+
+        if isinstance(term, Negation):
+            return [term.terms[0]]
+        elif isinstance(term, Predicate):
+            return [prefix + opening, term, closing]
+
+        return [prefix, term]
+
+    return handler
+
+
+def junction(operator, opening, closing):
+    '''
+    Handler of conjunctions and disjunctions, leaving out the parentheses around single terms
+    '''
+
+    def handler(emitter, logical):
+
+        if len(logical.terms) < 2:
+            return [logical.terms[0]]
+
+        parts = [opening]
+
+        for i, term in enumerate(logical.terms):
+            if i > 0:
+                parts.append(operator)
+            parts.append(term)
+
+        parts.append(closing)
+
+        return parts
+
+    return handler
+
+
+def conditional(operator, opening, closing):
+    '''
+    Handler of implications and biconditionals
+    '''
+
+    def handler(emitter, logical):
+
+        return [opening, logical.terms[0], operator, logical.terms[1], closing]
+
+    return handler
+
+
+def quantification(variable, opening, closing):
+    '''
+    Handler of quantifiers, repeating the quantifier for every variable
+
+    :param String variable, format of the quantifier of a single variable
+    '''
+
+    def handler(emitter, logical):
+
+        prefix = "".join([variable.format(emitter.variable(var)) for var in logical.variables])
+
+        return [opening.format(prefix), logical.terms[0], emitter.bind(logical.variables), closing]
+
+    return handler
+
+
+# TPTP
+
+def tptp_symbol(name):
+
+    # if the symbol contains any special symbols, wrap it in single quotes
+    return name.lower() if name.isalnum() else "'{}'".format(name.lower())
+
+
+# Number of hexadecimal digits of the content hash in the names of formulas
+NAME_DIGITS = 12
+
+
+def formula_name(formula, prefix='axiom'):
+    '''
+    Name of a formula in the TPTP output, derived from its text so that it is
+    the same in every process that translates the same axiom
+
+    :param String formula, the TPTP formula (without name and role)
+    :param String prefix, start of the name
+    :return String name
+    '''
+
+    return "{}_{}".format(prefix, hashlib.sha1(formula.encode('utf-8')).hexdigest()[:NAME_DIGITS])
+
+
+def tptp_predicate(emitter, logical):
+
+    if logical.is_equality():
+        return [emitter.term(logical.variables[0]), logical.name, emitter.term(logical.variables[1])]
+
+    return application(emitter, logical)
+
+
+TPTP = Dialect('TPTP', {
+    Predicate: tptp_predicate,
+    Function: application,
+    Negation: negation("~", "(", ")"),
+    Conjunction: junction(" & ", "(", ")"),
+    Disjunction: junction(" | ", "(", ")"),
+    Implication: conditional(" => ", "(", ")"),
+    Biconditional: conditional(" <=> ", "(", ")"),
+    Universal: quantification("! [{}] : ", "({} (", "))"),
+    Existential: quantification("? [{}] : ", "({} (", "))"),
+}, symbol=tptp_symbol, variable=str.upper, constant=str.lower)
+
+
+# LADR
+
+LADR = Dialect('LADR', {
+    Predicate: application,
+    Function: application,
+    Negation: negation("-", "(", ")"),
+    Conjunction: junction(" & ", "(", ")"),
+    Disjunction: junction(" | ", "(", ")"),
+    Implication: conditional(" -> ", "(", ")"),
+    Biconditional: conditional(" <-> ", "(", ")"),
+    Universal: quantification("all {} ", "({} ", ")"),
+    Existential: quantification("exists {} ", "({} ", ")"),
+})
+
+
+# LaTeX
+
+def latex_symbol(name):
+
+    return "\\textrm{" + name.replace('_', '\\_') + "}"
+
+
+LATEX = Dialect('LaTeX', {
+    Predicate: application,
+    Function: application,
+    Negation: negation("\\neg ", "\\left(", "\\right)"),
+    Conjunction: junction(" \\land ", "\\left(", "\\right)"),
+    Disjunction: junction(" \\lor ", "\\left(", "\\right)"),
+    Implication: conditional(" \\rightarrow ", "\\left[ ", " \\right]"),
+    Biconditional: conditional(" \\leftrightarrow ", "\\left[ ", " \\right]"),
+    Universal: quantification("\\forall {}\\; ", "{} \\left[ ", " \\right]"),
+    Existential: quantification("\\exists {}\\; ", "{} \\left[ ", " \\right]"),
+}, symbol=latex_symbol)
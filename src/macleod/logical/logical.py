@@ -80,6 +80,19 @@ class Logical(object):
         '''
 
         return self.terms
+
+    def freeze(self):
+        '''
+        Immutable, hash-consed node of the current state of this Logical.
+        Structurally identical Logicals have the very same node, so nodes can
+        be compared with 'is' and used as dictionary keys.
+
+        :return Node
+        '''
+
+        from macleod.logical.node import freeze
+
+        return freeze(self)
     
     def is_onf(self):
         '''
@@ -56,20 +56,13 @@ class Negation(Logical):
 
     def is_negation_of(self, other):
 
-        if isinstance(other, Negation):
-            return False
-
         if not isinstance(other, Predicate):
             return False
 
-        if not isinstance(self.term(), Predicate):
+        if not isinstance(self.terms[0], Predicate):
             return False
 
-        if self.term().same_symbol(other):
-            if self.term().compare(other)==Predicate.SAME:
-                return True
-
-        return False
+        return self.terms[0].freeze() is other.freeze()
 
     def push(self):
         '''
@@ -80,29 +73,32 @@ class Negation(Logical):
         # Can be a single predicate
         # Can be a quantifier
 
-        if isinstance(self.term(), Conjunction):
+        # The result is copied below, no need to copy the term first
+        term = self.terms[0]
+
+        if isinstance(term, Conjunction):
 
-            ret = Disjunction([Negation(x) for x in self.term().get_term()])
+            ret = Disjunction([Negation(x) for x in term.get_term()])
 
-        elif isinstance(self.term(), Disjunction):
+        elif isinstance(term, Disjunction):
 
-            ret = Conjunction([Negation(x) for x in self.term().get_term()])
+            ret = Conjunction([Negation(x) for x in term.get_term()])
 
-        elif isinstance(self.term(), Predicate):
+        elif isinstance(term, Predicate):
 
             ret = self
 
-        elif isinstance(self.term(), Existential):
+        elif isinstance(term, Existential):
 
-            ret = Universal(self.term().variables, Negation(self.term().get_term()))
+            ret = Universal(term.variables, Negation(list(term.get_term())))
 
-        elif isinstance(self.term(), Universal):
+        elif isinstance(term, Universal):
 
-            ret = Existential(self.term().variables, Negation(self.term().get_term()))
+            ret = Existential(term.variables, Negation(list(term.get_term())))
 
-        elif isinstance(self.term(), Negation):
+        elif isinstance(term, Negation):
 
-            ret = self.term().term()
+            ret = term.terms[0]
 
         else:
 
@@ -150,7 +146,7 @@ class Negation(Logical):
         Not in ONF unless we're applied to a Predicate
         '''
 
-        if isinstance(self.term(), Predicate):
+        if isinstance(self.terms[0], Predicate):
 
             return True
 
@@ -173,4 +169,4 @@ class Negation(Logical):
         :return self.__repr__() method
         '''
 
-        return "~{}".format(repr(self.term()))
+        return "~{}".format(repr(self.terms[0]))
@@ -0,0 +1,331 @@
+"""
+Immutable, hash-consed representation of formulas and terms.
+
+Every distinct formula exists at most once as a Node: make() looks a node up
+in a global table before creating it, so structurally identical formulas are
+the very same object. Equality of nodes is therefore identity (O(1)), the
+structural hash is computed once on creation, and identical subformulas are
+shared instead of duplicated. Symbol and variable names are interned strings.
+
+The mutable Logical classes remain the API used throughout macleod; they are
+converted into nodes with freeze() (or Logical.freeze()) whenever formulas
+need to be compared, and nodes are turned back into Logicals with thaw().
+"""
+
+import sys
+import threading
+import weakref
+
+# Node kinds
+FUNCTION = 'function'
+PREDICATE = 'predicate'
+NOT = 'not'
+AND = 'and'
+OR = 'or'
+IF = 'if'
+IFF = 'iff'
+FORALL = 'forall'
+EXISTS = 'exists'
+
+# All live nodes, keyed by (kind, symbol, args)
+TABLE = weakref.WeakValueDictionary()
+LOCK = threading.Lock()
+
+
+class Node(object):
+    '''
+    A formula or term that cannot be modified once created. Use make() (or
+    freeze()) instead of instantiating Node directly.
+
+    kind   -- one of the node kinds above
+    symbol -- the name of a predicate or function, the tuple of variables of a
+              quantifier, or for conjunctions and disjunctions True/False if the
+              connective has been evaluated to True/False (None otherwise)
+    args   -- tuple of the children: variable names and function nodes for
+              predicates and functions, formula nodes for everything else
+    '''
+
+    __slots__ = ('kind', 'symbol', 'args', 'hash', '__weakref__')
+
+    def __setattr__(self, name, value):
+
+        raise AttributeError("Node is immutable")
+
+    def __hash__(self):
+
+        return self.hash
+
+    def __reduce__(self):
+
+        # Unpickled nodes are looked up in the table of this process again
+        return (make, (self.kind, self.symbol, self.args))
+
+    def __copy__(self):
+
+        return self
+
+    def __deepcopy__(self, memo):
+
+        return self
+
+    def __repr__(self):
+        '''
+        Same notation as the corresponding Logical
+        '''
+
+        kind = self.kind
+
+        if kind == PREDICATE:
+            return "{}({})".format(self.symbol, ",".join([repr_term(v) for v in self.args]))
+        elif kind == FUNCTION:
+            return "{}({})".format(self.symbol.lower(), ",".join([repr_term(v) for v in self.args]))
+        elif kind == NOT:
+            return "~{}".format(repr(self.args[0]))
+        elif kind == AND or kind == OR:
+            if self.symbol is True:
+                return "True"
+            elif self.symbol is False:
+                return "False"
+            return "({})".format((" & " if kind == AND else " | ").join([repr(t) for t in self.args]))
+        elif kind == IF:
+            return "({0} -> {1})".format(self.args[0], self.args[1])
+        elif kind == IFF:
+            return "({0} <-> {1})".format(self.args[0], self.args[1])
+        elif kind == FORALL:
+            return "{}{}\\;[{}]".format("\\forall ", ",".join(self.symbol), repr(self.args[0]))
+        else:
+            return "{}{}\\;[{}]".format("\\exists ", ",".join(self.symbol), repr(self.args[0]))
+
+
+def repr_term(term):
+
+    return term if isinstance(term, str) else repr(term)
+
+
+def make(kind, symbol, args):
+    '''
+    Return the unique node with the given kind, symbol and children, creating
+    it if it does not exist yet.
+
+    :param String kind, one of the node kinds
+    :param symbol, name, variables or truth value (see Node)
+    :param Tuple args, children; strings must already be interned
+    :return Node
+    '''
+
+    key = (kind, symbol, args)
+
+    node = TABLE.get(key)
+    if node is not None:
+        return node
+
+    node = object.__new__(Node)
+    object.__setattr__(node, 'kind', kind)
+    object.__setattr__(node, 'symbol', symbol)
+    object.__setattr__(node, 'args', args)
+    object.__setattr__(node, 'hash', hash(key))
+
+    # Another thread may have created the same node in the meantime
+    with LOCK:
+        return TABLE.setdefault(key, node)
+
+
+def size():
+    '''
+    :return int, number of distinct nodes currently alive
+    '''
+
+    return len(TABLE)
+
+
+def freeze(logical):
+    '''
+    Convert a Logical (or a term: variable name or Function) into its node.
+
+    :param Logical logical, formula or term to convert
+    :return Node or interned String
+    '''
+
+    if isinstance(logical, str):
+        return sys.intern(logical)
+
+    converter = FREEZERS.get(type(logical))
+    if converter is None:
+        converter = find_converter(type(logical), FREEZERS)
+
+    return converter(logical)
+
+
+def thaw(node):
+    '''
+    Convert a node back into a newly created, mutable Logical.
+
+    :param Node node, formula or term to convert
+    :return Logical or String (None for None)
+    '''
+
+    if isinstance(node, str) or node is None:
+        return node
+
+    return THAWERS[node.kind](node)
+
+
+def find_converter(cls, table):
+    '''
+    Look up the converter of a subclass of one of the Logical classes
+    '''
+
+    for known, converter in list(table.items()):
+        if issubclass(cls, known):
+            table[cls] = converter
+            return converter
+
+    raise ValueError("Cannot convert {} to a node".format(cls))
+
+
+def freeze_symbol(kind):
+
+    def converter(logical):
+        return make(kind, sys.intern(logical.name), tuple([freeze(v) for v in logical.variables]))
+
+    return converter
+
+
+def freeze_connective(kind):
+
+    def converter(logical):
+        symbol = None
+        if getattr(logical, 'is_true', False):
+            symbol = True
+        elif getattr(logical, 'is_false', False):
+            symbol = False
+        return make(kind, symbol, tuple([freeze(t) for t in logical.terms]))
+
+    return converter
+
+
+def freeze_quantifier(kind):
+
+    def converter(logical):
+        return make(kind, tuple([sys.intern(v) for v in logical.variables]),
+                    tuple([freeze(t) for t in logical.terms]))
+
+    return converter
+
+
+def freeze_negation(logical):
+
+    return make(NOT, None, (freeze(logical.terms[0]),))
+
+
+def thaw_symbol(cls):
+
+    def converter(node):
+        logical = cls.__new__(cls)
+        logical.name = node.symbol
+        logical.variables = [thaw(v) for v in node.args]
+        return logical
+
+    return converter
+
+
+def thaw_connective(cls):
+
+    def converter(node):
+        logical = cls.__new__(cls)
+        logical.terms = [thaw(t) for t in node.args]
+        logical.is_true = node.symbol is True
+        logical.is_false = node.symbol is False
+        return logical
+
+    return converter
+
+
+def thaw_quantifier(cls):
+
+    def converter(node):
+        logical = cls.__new__(cls)
+        logical.variables = list(node.symbol)
+        logical.terms = [thaw(t) for t in node.args]
+        return logical
+
+    return converter
+
+
+def thaw_negation(node):
+
+    from macleod.logical.negation import Negation
+
+    logical = Negation.__new__(Negation)
+    logical.terms = [thaw(node.args[0])]
+    return logical
+
+
+class Converters(dict):
+    '''
+    Dispatch table that is filled on first use, as the Logical classes import each other
+    '''
+
+    def __init__(self, fill):
+
+        super().__init__()
+        self.fill = fill
+
+    def __missing__(self, key):
+
+        if self.fill is not None:
+            fill, self.fill = self.fill, None
+            fill(self)
+            return self[key]
+
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+def fill_freezers(table):
+
+    from macleod.logical.connective import (Conjunction, Disjunction, Implication, Biconditional)
+    from macleod.logical.negation import Negation
+    from macleod.logical.quantifier import (Universal, Existential)
+    from macleod.logical.symbol import (Function, Predicate)
+
+    table.update({
+        Predicate: freeze_symbol(PREDICATE),
+        Function: freeze_symbol(FUNCTION),
+        Negation: freeze_negation,
+        Conjunction: freeze_connective(AND),
+        Disjunction: freeze_connective(OR),
+        Implication: freeze_connective(IF),
+        Biconditional: freeze_connective(IFF),
+        Universal: freeze_quantifier(FORALL),
+        Existential: freeze_quantifier(EXISTS),
+    })
+
+
+def fill_thawers(table):
+
+    from macleod.logical.connective import (Conjunction, Disjunction, Implication, Biconditional)
+    from macleod.logical.quantifier import (Universal, Existential)
+    from macleod.logical.symbol import (Function, Predicate)
+
+    table.update({
+        PREDICATE: thaw_symbol(Predicate),
+        FUNCTION: thaw_symbol(Function),
+        NOT: thaw_negation,
+        AND: thaw_connective(Conjunction),
+        OR: thaw_connective(Disjunction),
+        IF: thaw_connective(Implication),
+        IFF: thaw_connective(Biconditional),
+        FORALL: thaw_quantifier(Universal),
+        EXISTS: thaw_quantifier(Existential),
+    })
+
+
+FREEZERS = Converters(fill_freezers)
+THAWERS = Converters(fill_thawers)
@@ -0,0 +1,1090 @@
+"""
+Function free prenex conjunctive normal form (FF-PCNF) on nodes.
+
+Every step of Axiom.ff_pcnf() is a pure function from node to node: the input
+is never modified nor copied, new nodes are only built where the formula
+changes and all unchanged subformulas are shared between input and output.
+
+The smart constructors below mirror the normalizations that the Logical
+constructors apply to every new connective: absorption of like connectives and
+removal of duplicate and opposing literals.
+
+The original implementation on the mutable Logical classes, and a port of its
+prenex form to nodes that the tests compare the other steps with, are kept in
+scripts/benchmark_pcnf.py.
+"""
+
+import functools
+import logging
+import sys
+
+import macleod.logical.symbol as Symbol
+import macleod.logical.utils as Util
+from macleod.logical.node import (Node, make, thaw, FUNCTION, PREDICATE, NOT, AND, OR, IF, IFF, FORALL, EXISTS)
+
+LOGGER = logging.getLogger(__name__)
+
+QUANTIFIERS = (FORALL, EXISTS)
+CONNECTIVES = (AND, OR, IF, IFF)
+
+# Conjunctive normal forms: distribute disjunctions (naive) or define subformulas
+NAIVE = 'naive'
+DEFINITIONAL = 'definitional'
+CNF_MODES = [NAIVE, DEFINITIONAL]
+
+# Largest number of clauses a single disjunction is distributed into in the
+# definitional conjunctive normal form
+DEFINITION_THRESHOLD = 16
+
+# Name of the predicates introduced by definitions, followed by a unique number
+DEFINITION_PREFIX = 'Def'
+
+# Prenex forms: pull the quantifiers to the front in a single pass, taking the
+# universals or the existentials first where their order is free
+UNIVERSALS_FIRST = 'universals-first'
+EXISTENTIALS_FIRST = 'existentials-first'
+PRENEX_MODES = [UNIVERSALS_FIRST, EXISTENTIALS_FIRST]
+
+DUAL = {FORALL: EXISTS, EXISTS: FORALL}
+
+# Quantifiers that distribute over a connective, whose variables can be shared
+SHARED = {AND: FORALL, OR: EXISTS, IF: EXISTS}
+
+# Names of the Logical classes, for messages about missing attributes
+CLASS_NAMES = {
+    FUNCTION: 'Function',
+    PREDICATE: 'Predicate',
+    NOT: 'Negation',
+    AND: 'Conjunction',
+    OR: 'Disjunction',
+    IF: 'Implication',
+    IFF: 'Biconditional',
+    FORALL: 'Universal',
+    EXISTS: 'Existential',
+}
+
+
+def kind_of(term):
+
+    return term.kind if isinstance(term, Node) else None
+
+
+def missing(term, attribute):
+    '''
+    The AttributeError raised when the Logical of a node lacks an attribute
+    '''
+
+    name = CLASS_NAMES.get(kind_of(term), type(term).__name__)
+    return AttributeError("'{}' object has no attribute '{}'".format(name, attribute))
+
+
+#
+# Smart constructors, equivalent to the constructors of the Logical classes
+#
+
+def predicate(name, variables):
+
+    name = Symbol.Predicate.SYMBOL_TRANSLATIONS.get(name, name)
+    return make(PREDICATE, sys.intern(name), tuple(variables))
+
+
+def negation(term):
+
+    return make(NOT, None, (term,))
+
+
+def quantifier(kind, variables, term):
+
+    return make(kind, tuple([sys.intern(v) for v in variables]), (term,))
+
+
+def connective(kind, terms):
+    '''
+    Node of the connective of the given kind over a list of terms
+    '''
+
+    from macleod.logical.connective import (Implication, Biconditional)
+
+    if kind == IF:
+        if len(terms) > 2:
+            raise ValueError("{} cannot contain more than two terms".format(Implication))
+        elif len(terms) < 2:
+            raise ValueError("{} needs two terms: a consequent and antecedent".format(Implication))
+        return make(IF, None, tuple(terms))
+
+    if kind == IFF:
+        if len(terms) != 2:
+            raise ValueError("{} needs exactly two terms".format(Biconditional))
+        return make(IFF, None, tuple(terms))
+
+    # Absorb like-connectives
+    flat = []
+    for term in terms:
+        if kind_of(term) == kind:
+            flat.extend(term.args)
+        else:
+            flat.append(term)
+
+    # An empty conjunction is True, an empty disjunction False
+    symbol = (kind == AND) if len(terms) == 0 else None
+
+    return remove_redundant_terms(kind, symbol, flat)
+
+
+def conjunction(terms):
+
+    return connective(AND, terms)
+
+
+def disjunction(terms):
+
+    return connective(OR, terms)
+
+
+def remove_redundant_terms(kind, symbol, terms):
+    '''
+    Drop duplicate predicates and opposing literals like
+    Conjunction/Disjunction.remove_redundant_terms(). Only predicates are
+    compared: any other term is a fresh copy in a new Logical.
+    '''
+
+    new_terms = []
+    negated_terms = []
+    positive = set()
+    negative = {}
+    duplicate = False
+    vacuous = False
+
+    for term in terms:
+
+        term_kind = kind_of(term)
+
+        if term_kind == NOT:
+            key = term.args[0] if kind_of(term.args[0]) == PREDICATE else None
+            if key is not None and key in positive:
+                # Opposing terms make a conjunction False and a disjunction True
+                duplicate = True
+                vacuous = True
+                if kind == AND:
+                    new_terms.remove(key)
+                symbol = (kind == OR)
+                break
+            else:
+                negated_terms.append(term)
+                if key is not None:
+                    negative[key] = negative.get(key, 0) + 1
+        else:
+            key = term if term_kind == PREDICATE else None
+            if key is not None and key in positive:
+                duplicate = True
+            elif negative.get(key):
+                duplicate = True
+                negative[key] -= 1
+                negated_terms.remove(negation(key))
+                if kind == AND:
+                    break
+            else:
+                new_terms.append(term)
+                if key is not None:
+                    positive.add(key)
+
+    if duplicate:
+        if vacuous:
+            terms = []
+        else:
+            terms = new_terms + negated_terms
+
+    return make(kind, symbol, tuple(terms))
+
+
+def construct(kind, terms):
+    '''
+    Node of type(term)(terms) for a negation or connective
+    '''
+
+    if kind == NOT:
+        return negation(terms[0])
+
+    return connective(kind, terms)
+
+
+def replace(term, args):
+    '''
+    The node with new children but otherwise unchanged, like an assignment to
+    the terms of a Logical (no normalization takes place)
+    '''
+
+    return make(term.kind, term.symbol, tuple(args))
+
+
+def is_true(term):
+
+    if kind_of(term) not in CONNECTIVES:
+        raise missing(term, 'is_true')
+
+    return term.symbol is True
+
+
+#
+# Function substitution
+#
+
+def substitute_functions(sentence):
+    '''
+    Replace every nested function by a new universally quantified variable
+    and a predicate relating it to the arguments of the function.
+
+    :param Node sentence, the formula
+    :return (Node, List) the function free formula and the names of the
+            binary predicates that replaced unary functions
+    '''
+
+    functions = []
+    result = dfs_functions(sentence, functions, None)
+
+    return result, list({f.symbol for f in functions if len(f.args) == 2})
+
+
+def declaration(function):
+    '''
+    Axiom stating that the predicate that replaced a unary function is functional
+    '''
+
+    term_one = negation(predicate(function, ['a', 'b']))
+    term_two = negation(predicate(function, ['a', 'c']))
+    equality = predicate('=', ['c', 'b'])
+
+    return quantifier(FORALL, ['a', 'b', 'c'], disjunction([disjunction([term_one, term_two]), equality]))
+
+
+def dfs_functions(term, accumulator, parent):
+
+    kind = term.kind
+
+    if kind == PREDICATE:
+
+        if has_functions(term):
+
+            clause, minted = substitute_function(term)
+
+            # Hack to workaround having to patch grandparent term link
+            if parent == NOT:
+                clause = negation(clause)
+
+            accumulator += minted
+
+            return dfs_functions(clause, accumulator, PREDICATE)
+
+        return term
+
+    if kind in QUANTIFIERS:
+        return quantifier(kind, term.symbol, dfs_functions(term.args[0], accumulator, kind))
+
+    return construct(kind, [dfs_functions(x, accumulator, kind) for x in term.args])
+
+
+def has_functions(term):
+
+    return any(not isinstance(v, str) for v in term.args)
+
+
+def substitute_function(term):
+    '''
+    Predicate.substitute_function() on the node of a predicate
+    '''
+
+    predicates = []
+    variables = []
+
+    def sub_functions(term):
+
+        if isinstance(term, str):
+            return term
+
+        # Mint a new variable for the function, before any nested function
+        new_variable = term.symbol.lower()[0] + Symbol.gen()
+        variables.append(new_variable)
+
+        predicate_variables = [sub_functions(x) for x in term.args]
+        predicate_variables.append(new_variable)
+        predicates.append(predicate(term.symbol, predicate_variables))
+
+        return new_variable
+
+    arguments = [sub_functions(x) for x in term.args]
+
+    if len(predicates) > 1:
+        clause = conjunction(predicates)
+    else:
+        clause = predicates[0]
+
+    universal = quantifier(FORALL, variables, disjunction([predicate(term.symbol, arguments), negation(clause)]))
+
+    return universal, predicates
+
+
+#
+# Variable standardization
+#
+
+def standardize_variables(sentence):
+    '''
+    Give every quantified variable a new, unique name.
+
+    :param Node sentence, the formula
+    :return Node
+    '''
+
+    return dfs_standardize(sentence, Util.generator(), [])
+
+
+def dfs_standardize(term, gen, translations):
+
+    kind = term.kind
+
+    if kind == PREDICATE:
+
+        left = len(term.args)
+        variables = []
+
+        for var in term.args:
+            for trans in reversed(translations):
+                if var in trans:
+                    var = trans[var]
+                    left -= 1
+                    break
+            variables.append(var)
+
+        if left != 0:
+            LOGGER.info("Found a constant!")
+
+        return replace(term, variables)
+
+    elif kind in QUANTIFIERS:
+
+        lookup_table = {}
+        variables = []
+
+        for var in term.symbol:
+            lookup_table[var] = gen()
+            variables.append(lookup_table[var])
+
+        translations.append(lookup_table)
+        return quantifier(kind, variables, dfs_standardize(term.args[0], gen, translations))
+
+    return construct(kind, [dfs_standardize(x, gen, translations) for x in term.args])
+
+
+#
+# Negation
+#
+
+def push_negation(sentence):
+    '''
+    Push all negations down to the predicates.
+
+    :param Node sentence, the formula
+    :return Node
+    '''
+
+    kind = sentence.kind
+
+    if kind == PREDICATE:
+        return sentence
+    elif kind in QUANTIFIERS:
+        return quantifier(kind, sentence.symbol, push_negation(sentence.args[0]))
+    elif kind == NOT:
+        return push_complete(sentence)
+
+    return construct(kind, [push_negation(x) for x in sentence.args])
+
+
+def push_complete(term):
+    '''
+    Negation.push_complete() on a node
+    '''
+
+    kind = term.kind
+
+    if kind == NOT:
+        if kind_of(term.args[0]) == PREDICATE:
+            return term
+        return push_complete(push(term))
+
+    elif kind == PREDICATE:
+        return term
+
+    elif kind in QUANTIFIERS:
+        return quantifier(kind, term.symbol, push_complete(term.args[0]))
+
+    return construct(kind, [push_complete(x) for x in term.args])
+
+
+def push(term):
+    '''
+    Negation.push() on the node of a negation
+    '''
+
+    child = term.args[0]
+    kind = kind_of(child)
+
+    if kind == AND:
+        return disjunction([negation(x) for x in child.args])
+    elif kind == OR:
+        return conjunction([negation(x) for x in child.args])
+    elif kind == PREDICATE:
+        return term
+    elif kind == EXISTS:
+        return quantifier(FORALL, child.symbol, negation(child.args[0]))
+    elif kind == FORALL:
+        return quantifier(EXISTS, child.symbol, negation(child.args[0]))
+    elif kind == NOT:
+        return child.args[0]
+
+    raise ValueError("Negation onto unknown type!", thaw(term).term)
+
+
+#
+# Prenex form
+#
+
+def create_prenex(sentence, order=UNIVERSALS_FIRST):
+    '''
+    Pull all quantifiers to the front.
+
+    :param Node sentence, the formula
+    :param String order, UNIVERSALS_FIRST or EXISTENTIALS_FIRST to take the
+           universals or the existentials first where their order is free
+           (see pull_quantifiers)
+    :return Node
+    '''
+
+    if order not in PRENEX_MODES:
+        raise ValueError("Unknown quantifier order: {}".format(order))
+
+    prefix, matrix = pull_quantifiers(sentence, FORALL if order == UNIVERSALS_FIRST else EXISTS)
+
+    for kind, variables in reversed(prefix):
+        matrix = quantifier(kind, variables, matrix)
+
+    return matrix
+
+
+def pull_quantifiers(sentence, first):
+    '''
+    Split a formula into a quantifier prefix and a quantifier-free matrix in a
+    single bottom up pass. Every quantifier is pulled out of the connectives
+    above it, switching between universal and existential below negations and
+    in the antecedents of implications; biconditionals over quantified terms
+    are split into two implications. A variable that is quantified more than
+    once or also occurs free is renamed through a substitution map, so that
+    pulling out its quantifier does not capture any other occurrence.
+
+    The prefixes of the terms of a connective are independent of each other
+    and are interleaved by merge_prefixes(), which takes the blocks of the
+    quantifier kind first before those of the other kind and lets like
+    quantifiers share their variables where they distribute over the
+    connective.
+
+    :param Node sentence, the formula
+    :param String first, FORALL or EXISTS
+    :return (List prefix, Node matrix), prefix as (kind, variables) blocks
+    '''
+
+    names = set()
+    free = set()
+    collect_names(sentence, {}, names, free)
+
+    bound = set()
+    substitution = {}
+
+    def fresh(var):
+
+        index = 1
+        while var + str(index) in names:
+            index += 1
+
+        names.add(var + str(index))
+        return var + str(index)
+
+    def pull(term):
+
+        kind = term.kind
+
+        if kind == PREDICATE:
+            return [], substitute(term, substitution)
+
+        elif kind in QUANTIFIERS:
+
+            saved = [(var, substitution.get(var)) for var in term.symbol]
+            variables = []
+
+            for var in term.symbol:
+                name = fresh(var) if var in bound or var in free else var
+                bound.add(var)
+                substitution[var] = name
+                variables.append(name)
+
+            prefix, matrix = pull(term.args[0])
+
+            for var, name in reversed(saved):
+                if name is None:
+                    del substitution[var]
+                else:
+                    substitution[var] = name
+
+            if prefix and prefix[0][0] == kind:
+                return [(kind, variables + prefix[0][1])] + prefix[1:], matrix
+
+            return [(kind, variables)] + prefix, matrix
+
+        elif kind == NOT:
+
+            prefix, matrix = pull(term.args[0])
+            return dual(prefix), negation(matrix)
+
+        elif kind == IF:
+
+            antecedent, condition = pull(term.args[0])
+            consequent, result = pull(term.args[1])
+
+            return combine(IF, [(dual(antecedent), condition), (consequent, result)], first)
+
+        elif kind == IFF:
+
+            left, left_matrix = pull(term.args[0])
+            right, right_matrix = pull(term.args[1])
+
+            if not left and not right:
+                return [], connective(IFF, [left_matrix, right_matrix])
+
+            # Both directions need their own copies of the quantified variables
+            right_copy, right_copy_matrix = pull(term.args[1])
+            left_copy, left_copy_matrix = pull(term.args[0])
+
+            implications = [combine(IF, [(dual(left), left_matrix), (right, right_matrix)], first),
+                            combine(IF, [(dual(right_copy), right_copy_matrix), (left_copy, left_copy_matrix)], first)]
+
+            return combine(AND, implications, first)
+
+        return combine(kind, [pull(x) for x in term.args], first)
+
+    return pull(sentence)
+
+
+def collect_names(term, scope, names, free):
+    '''
+    Gather all variable and constant names of a formula and those that occur free
+
+    :param dict scope, number of enclosing quantifiers of every variable
+    '''
+
+    kind = term.kind
+
+    if kind in (PREDICATE, FUNCTION):
+
+        for var in term.args:
+            if isinstance(var, str):
+                names.add(var)
+                if not scope.get(var):
+                    free.add(var)
+            else:
+                collect_names(var, scope, names, free)
+
+    elif kind in QUANTIFIERS:
+
+        names.update(term.symbol)
+
+        for var in term.symbol:
+            scope[var] = scope.get(var, 0) + 1
+
+        collect_names(term.args[0], scope, names, free)
+
+        for var in term.symbol:
+            scope[var] -= 1
+
+    else:
+
+        for x in term.args:
+            collect_names(x, scope, names, free)
+
+
+def substitute(term, substitution):
+    '''
+    The predicate or function with its variables renamed, including those of nested functions
+    '''
+
+    return replace(term, [substitution.get(v, v) if isinstance(v, str) else substitute(v, substitution) for v in term.args])
+
+
+def dual(prefix):
+    '''
+    The prefix with universal and existential quantifiers swapped, as pulled out of a negation
+    '''
+
+    return [(DUAL[kind], variables) for kind, variables in prefix]
+
+
+def combine(kind, pulled, first):
+    '''
+    Prefix and matrix of a connective from the prefixes and matrices of its terms
+
+    :param String kind, the kind of connective
+    :param List pulled, (prefix, matrix) of every term
+    :param String first, FORALL or EXISTS
+    :return (List prefix, Node matrix)
+    '''
+
+    prefix, substitutions = merge_prefixes([x[0] for x in pulled], first, SHARED.get(kind))
+
+    matrices = [substitute_matrix(x[1], substitution) if substitution else x[1]
+                for x, substitution in zip(pulled, substitutions)]
+
+    return prefix, construct(kind, matrices)
+
+
+def merge_prefixes(prefixes, first, shared=None):
+    '''
+    Interleave the quantifier prefixes of the terms of a connective, which
+    have no variables in common. All blocks of one kind that lead one of the
+    prefixes are taken together before switching to the other kind, starting
+    with the kind first, which keeps the number of quantifier alternations
+    low. Every block is handled once.
+
+    Blocks of the kind that distributes over the connective (universals over
+    conjunctions, existentials over disjunctions) share their variables like
+    Connective.coalesce(): the variables of all blocks taken together are
+    renamed to those of the longest one.
+
+    :param List prefixes, lists of (kind, variables) blocks of alternating kinds
+    :param String first, FORALL or EXISTS
+    :param String shared, the kind of quantifier whose blocks share variables
+    :return (List prefix, List substitutions), the renaming of every term
+    '''
+
+    waiting = {FORALL: [], EXISTS: []}
+    substitutions = [{} for _ in prefixes]
+
+    for position, prefix in enumerate(prefixes):
+        if prefix:
+            waiting[prefix[0][0]].append((position, 0))
+
+    merged = []
+    kind = first
+
+    while waiting[FORALL] or waiting[EXISTS]:
+
+        ready = waiting[kind]
+
+        if ready:
+
+            waiting[kind] = []
+
+            if kind == shared:
+                variables = list(max([prefixes[p][i][1] for p, i in ready], key=len))
+                for p, i in ready:
+                    substitutions[p].update((v, w) for v, w in zip(prefixes[p][i][1], variables) if v != w)
+            else:
+                variables = [v for p, i in ready for v in prefixes[p][i][1]]
+
+            for p, i in ready:
+                if i + 1 < len(prefixes[p]):
+                    waiting[DUAL[kind]].append((p, i + 1))
+
+            merged.append((kind, variables))
+
+        kind = DUAL[kind]
+
+    return merged, substitutions
+
+
+def substitute_matrix(term, substitution):
+    '''
+    The quantifier-free formula with its variables renamed
+    '''
+
+    if term.kind in (PREDICATE, FUNCTION):
+        return substitute(term, substitution)
+    elif not term.args:
+        return term
+
+    return construct(term.kind, [substitute_matrix(x, substitution) for x in term.args])
+
+
+#
+# Conjunctive normal form
+#
+
+def distribute_disjunctions(sentence):
+    '''
+    Distribute disjunctions over conjunctions until the formula is a
+    conjunction of disjunctions of literals.
+
+    :param Node sentence, the formula
+    :return Node, or None if nothing is left of the formula
+    '''
+
+    return to_onf(sentence)
+
+
+def is_onf(term):
+    '''
+    Logical.is_onf() on a node. Checking a conjunction drops True
+    disjunctions from it, so the checked node is returned as well.
+
+    :return (Boolean, Node)
+    '''
+
+    kind = kind_of(term)
+
+    if kind == PREDICATE:
+        return not has_functions(term), term
+    elif kind == NOT:
+        return kind_of(term.args[0]) == PREDICATE, term
+    elif kind in QUANTIFIERS:
+        onf, child = is_onf(term.args[0])
+        return onf, replace(term, [child])
+    elif kind == AND:
+        return conjunction_is_onf(term)
+    elif kind == OR:
+        return disjunction_is_onf(term), term
+
+    raise missing(term, 'is_onf')
+
+
+def conjunction_is_onf(term):
+
+    if term.symbol is not None:
+        LOGGER.debug("Special case: The conjunction {} is not in ONF".format(term))
+        return False, term
+
+    terms = list(term.args)
+
+    index = 0
+    while index < len(terms):
+
+        child = terms[index]
+        kind = kind_of(child)
+
+        if kind == OR:
+
+            if child.symbol is False:
+                return True, make(AND, False, ())
+
+            elif child.symbol is True:
+                if len(terms) == 1:
+                    return True, make(AND, True, ())
+                # The next term is skipped, as by the removal during iteration
+                del terms[index]
+
+            elif not disjunction_is_onf(child):
+                return False, replace(term, terms)
+
+        elif kind in QUANTIFIERS:
+            raise ValueError("Quantifier within connective during ONF")
+
+        elif kind == AND:
+            raise ValueError("Has a conjunction nested in a conjunction")
+
+        elif not is_onf(child)[0]:
+            return False, replace(term, terms)
+
+        index += 1
+
+    return True, replace(term, terms)
+
+
+def disjunction_is_onf(term):
+
+    if term.symbol is not None:
+        LOGGER.debug("Special case: The disjunction {} is not in ONF".format(term))
+        return False
+
+    for child in term.args:
+
+        kind = kind_of(child)
+
+        if kind == AND:
+            return False
+        elif kind == OR:
+            raise ValueError("Found nested disjunction within disjunction")
+        elif kind in QUANTIFIERS:
+            raise ValueError("Found nested quantifier in disjunction!")
+        elif not is_onf(child)[0]:
+            return False
+
+    return True
+
+
+def to_onf(term):
+    '''
+    Logical.to_onf() on a node
+
+    :return Node or None
+    '''
+
+    kind = kind_of(term)
+
+    if kind == PREDICATE:
+        return term
+
+    elif kind == NOT:
+        if kind_of(term.args[0]) == PREDICATE:
+            return term
+        raise ValueError("Should have already pushed negation prior to ONF")
+
+    elif kind in QUANTIFIERS:
+        onf, term = is_onf(term)
+        if onf:
+            return term
+        return replace(term, [to_onf(term.args[0])])
+
+    elif kind == AND:
+        return conjunction_to_onf(term)
+
+    elif kind == OR:
+        return disjunction_to_onf(term)
+
+    raise missing(term, 'to_onf')
+
+
+def conjunction_to_onf(term):
+
+    onf, term = conjunction_is_onf(term)
+
+    if onf and len(term.args) > 1:
+        return term
+
+    if len(term.args) == 1:
+        return to_onf(term.args[0])
+
+    if len(term.args) == 0:
+        LOGGER.debug("Found empty conjunction!")
+        return None
+
+    new_terms = []
+
+    for child in term.args:
+
+        onf, child = is_onf(child)
+        if not onf:
+            child = to_onf(child)
+
+        if child is None:
+            LOGGER.debug("Skipping empty disjunction inside " + repr(term))
+        elif is_true(child):
+            LOGGER.debug("Skipping true disjunction " + repr(term))
+        else:
+            new_terms.append(child)
+
+    return conjunction(new_terms)
+
+
+def disjunction_to_onf(term):
+
+    if disjunction_is_onf(term) and len(term.args) > 1:
+        return term
+
+    if len(term.args) == 1:
+        return to_onf(term.args[0])
+
+    if len(term.args) == 0:
+        LOGGER.debug("Found empty disjunction!")
+        return None
+
+    # Search for the nested conjunction
+    conjunct = None
+    for index, child in enumerate(term.args):
+        if child is None:
+            raise missing(child, 'is_false')
+        elif child.kind == AND:
+            conjunct = index
+            break
+
+    # Distribute the first term that isn't the conjunct
+    distributed = distribute(term, 1 if conjunct == 0 else 0, conjunct)
+
+    if distributed is not None:
+        distributed = to_onf(distributed)
+
+    return distributed
+
+
+def distribute(term, distributive, conjunct):
+    '''
+    Connective.distribute() of a disjunction: distribute one of its terms
+    over a conjunction among its terms
+
+    :param Node term, the disjunction
+    :param int distributive, position of the term to distribute
+    :param int conjunct, position of the conjunction
+    :return Node or None
+    '''
+
+    if conjunct is None:
+        raise ValueError("Can only distribute over Connectives!")
+
+    t_one = term.args[distributive]
+    t_two = term.args[conjunct]
+
+    new_term = conjunction([disjunction([t_one, t]) for t in t_two.args])
+    new_term = replace(new_term, [t for t in new_term.args if len(t.args) > 0])
+
+    if len(new_term.args) == 0:
+        LOGGER.warning("Trying to create an empty outer {} during distribution".format(CLASS_NAMES[AND]))
+        return None
+
+    terms = [x for i, x in enumerate(term.args) if i != distributive and i != conjunct]
+    terms.append(new_term)
+
+    # If we only contain the new element return it
+    if len(terms) == 1:
+        return new_term
+
+    return replace(term, terms)
+
+
+#
+# Definitional conjunctive normal form
+#
+
+def definitional_cnf(sentence, threshold=DEFINITION_THRESHOLD):
+    '''
+    Conjunctive normal form that grows linearly instead of exponentially with
+    nested conjunctions and disjunctions. Wherever distributing a disjunction
+    would create more than threshold clauses, its largest conjunctions are
+    replaced by new predicates over their variables, each defined by the
+    clauses (~Def(x) | C) for the clauses C of the conjunction.
+
+    The result is only equisatisfiable with the formula. If no definition is
+    needed it is the same as the one of distribute_disjunctions(), as it is
+    for formulas that are not a prenex conjunction and disjunction of literals.
+
+    :param Node sentence, the formula in prenex form with pushed negations
+    :param int threshold, maximum number of clauses of a distributed disjunction
+    :return (Node, int) the formula (None if nothing is left of it) and the
+            number of definitions introduced
+    '''
+
+    prefix = []
+    matrix = sentence
+
+    while kind_of(matrix) in QUANTIFIERS:
+        prefix.append(matrix)
+        matrix = matrix.args[0]
+
+    variables = [v for q in prefix for v in q.symbol]
+    definitions = {}
+
+    clauses = clausify(matrix, max(threshold, 1), variables, definitions)
+
+    if clauses is None or len(definitions) == 0:
+        return to_onf(sentence), 0
+
+    LOGGER.debug("Introduced {} definitions for {}".format(len(definitions), sentence))
+
+    for defined, atom in definitions.items():
+        clauses += [(negation(atom),) + clause for clause in defined]
+
+    clauses = [clause for clause in [simplify_clause(c) for c in clauses] if clause is not None]
+    matrix = conjunction([clause[0] if len(clause) == 1 else disjunction(list(clause)) for clause in clauses])
+
+    for q in reversed(prefix):
+        matrix = quantifier(q.kind, q.symbol, matrix)
+
+    return matrix, len(definitions)
+
+
+def clausify(term, threshold, variables, definitions):
+    '''
+    Clauses (tuples of literals) of a conjunction and disjunction of literals,
+    adding the predicates it introduces to definitions, keyed by the clauses
+    they stand for.
+
+    :return List of Tuples, or None if the term is anything else
+    '''
+
+    kind = kind_of(term)
+
+    if kind == PREDICATE or (kind == NOT and kind_of(term.args[0]) == PREDICATE):
+        return [(term,)]
+
+    if (kind != AND and kind != OR) or term.symbol is not None:
+        return None
+
+    children = []
+
+    for child in term.args:
+        clauses = clausify(child, threshold, variables, definitions)
+        if clauses is None:
+            return None
+        children.append(clauses)
+
+    if kind == AND:
+        return [clause for clauses in children for clause in clauses]
+
+    # Define the conjunctions with most clauses until the product is small enough
+    size = functools.reduce(lambda x, y: x * len(y), children, 1)
+
+    while size > threshold:
+
+        index = max(range(len(children)), key=lambda i: len(children[i]))
+        literal = define(children[index], variables, definitions)
+
+        if literal is None:
+            break
+
+        size = size // len(children[index])
+        children[index] = [(literal,)]
+
+    clauses = [()]
+    for child in children:
+        clauses = [x + y for x in clauses for y in child]
+
+    return clauses
+
+
+def define(clauses, variables, definitions):
+    '''
+    Predicate over the variables of the clauses that stands for them, new
+    unless the same clauses have been defined before
+
+    :return Node of the predicate, or None if the clauses have no variables
+    '''
+
+    clauses = tuple(clauses)
+
+    if clauses in definitions:
+        return definitions[clauses]
+
+    used = set()
+    for clause in clauses:
+        for literal in clause:
+            atom = literal.args[0] if literal.kind == NOT else literal
+            used.update(atom.args)
+
+    arguments = [v for v in variables if v in used]
+
+    if len(arguments) == 0:
+        return None
+
+    atom = predicate(DEFINITION_PREFIX + Symbol.gen(), arguments)
+    definitions[clauses] = atom
+
+    return atom
+
+
+def simplify_clause(clause):
+    '''
+    Drop duplicate literals from a clause
+
+    :return Tuple, or None if the clause contains opposing literals
+    '''
+
+    literals = tuple(dict.fromkeys(clause))
+    positive = set(x for x in literals if x.kind == PREDICATE)
+
+    if any(x.kind == NOT and x.args[0] in positive for x in literals):
+        return None
+
+    return literals
@@ -5,6 +5,7 @@
 
 import copy
 import logging
+import sys
 
 from macleod.logical.logical import Logical
 from macleod.logical.symbol import Predicate
@@ -311,7 +312,7 @@ class Universal(Quantifier):
             if not isinstance(var, str):
                 raise ValueError('Predicate variables must be strings!')
 
-        self.variables = copy.deepcopy(variables)
+        self.variables = [sys.intern(v) for v in variables]
 
     def __repr__(self):
 
@@ -347,7 +348,7 @@ class Existential(Quantifier):
             if not isinstance(var, str):
                 raise ValueError('Predicate variables must be strings!')
 
-        self.variables = copy.deepcopy(variables)
+        self.variables = [sys.intern(v) for v in variables]
 
     def __repr__(self):
 
@@ -6,8 +6,10 @@
 from macleod.logical.logical import Logical
 
 from enum import Enum
+import contextlib
 import copy
 import logging
+import sys
 
 LOGGER = logging.getLogger(__name__)
 
@@ -32,6 +34,34 @@ def generator():
 global gen 
 gen = generator()
 
+# Whether the new names are numbered within a with statement, see numbering()
+numbered = False
+
+@contextlib.contextmanager
+def numbering():
+    '''
+    Number the new variables and predicates from the start within a with
+    statement, unless an enclosing one already does, so that their names
+    only depend on what is translated within it and not on everything that
+    the process translated before.
+    '''
+
+    global gen, numbered
+
+    if numbered:
+        yield
+        return
+
+    previous = gen
+    gen = generator()
+    numbered = True
+
+    try:
+        yield
+    finally:
+        gen = previous
+        numbered = False
+
 class Predicate(Logical):
     '''
     Representation of a FOL predicate, with convenient mappings for arity and
@@ -65,12 +95,10 @@ class Predicate(Logical):
                 raise ValueError('Predicate variables must be strings or Functions!')
 
         # Do predicate name substitution to eliminate any special symbols (like <, >= not accepted by reasoners)
-        self.name = self.SYMBOL_TRANSLATIONS.get(name, name)
+        self.name = sys.intern(self.SYMBOL_TRANSLATIONS.get(name, name))
 
         # Make sure you make a COPY of everything, no references!
-        self.variables = variables[:]
-
-        self.variable_generator = generator()
+        self.variables = [sys.intern(v) if isinstance(v, str) else v for v in variables]
 
     def same_symbol(self, other):
         '''
@@ -249,13 +277,17 @@ class Predicate(Logical):
 
     def __eq__(self, other):
         """
-        Test if two predicates are equal to each other
+        Test if two predicates are equal to each other, i.e. have the same
+        name and structurally identical arguments
 
         :param Predicate other, the predicate we compare against
         :return Boolean result
         """
 
-        return repr(self) == repr(other)
+        if not isinstance(other, Predicate):
+            return False
+
+        return self.freeze() is other.freeze()
 
 class Function(Logical):
     '''
@@ -274,9 +306,9 @@ class Function(Logical):
             if not isinstance(var, str) and not isinstance(var, type(self)):
                 raise ValueError('Function variables must be strings or functions!')
 
-        self.name = name
+        self.name = sys.intern(name)
         # Make sure you make a COPY of everything, no references!
-        self.variables = variables[:]
+        self.variables = [sys.intern(v) if isinstance(v, str) else v for v in variables]
 
     def has_functions(self):
         '''
@@ -0,0 +1,217 @@
+"""
+Symbol table of an ontology and its import closure.
+
+Every nonlogical symbol -- a predicate, function or constant of a given arity
+-- gets a small integer id when it is first added. For every id the table
+counts the occurrences of the symbol, the positive and negated occurrences of
+predicates, in total and per module. The ids by kind and arity and the names
+that are used as more than one kind of symbol are kept up to date as symbols
+are added, so that questions like "all binary predicates" or "all names used
+as a predicate and as a constant" are answered by a lookup.
+"""
+
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# Kinds of symbols
+PREDICATE = 'predicate'
+FUNCTION = 'function'
+CONSTANT = 'constant'
+
+
+class SymbolTable(object):
+    '''
+    Integer ids and usage counts of the symbols of a set of axioms
+
+    symbols   -- (name, arity, kind) of every symbol, indexed by id
+    uses      -- number of occurrences, indexed by id
+    positive  -- number of occurrences of predicates outside of a negation, indexed by id
+    negative  -- number of occurrences of predicates right inside a negation, indexed by id
+    modules   -- dict from modules to dicts from ids to [uses, positive, negative]
+    '''
+
+    def __init__(self):
+
+        self.symbols = []
+        self.ids = {}
+
+        self.uses = []
+        self.positive = []
+        self.negative = []
+        self.modules = {}
+
+        # Ids by kind and by (kind, arity)
+        self.kinds = {PREDICATE: set(), FUNCTION: set(), CONSTANT: set()}
+        self.arities = {}
+        # Ids by name and names used as two kinds of symbols (or predicates of different arities)
+        self.names = {}
+        self.overlaps = {}
+
+    def add(self, name, arity, kind, module=None, polarity=None):
+        '''
+        Count an occurrence of a symbol, giving it an id if it is new
+
+        :param String name, the name of the symbol
+        :param int arity, the number of arguments (0 for constants)
+        :param String kind, PREDICATE, FUNCTION or CONSTANT
+        :param module, the module the occurrence belongs to
+        :param Boolean polarity, True or False for positive or negated predicates
+        :return int id
+        '''
+
+        symbol = self.register(name, arity, kind)
+
+        counts = self.modules.setdefault(module, {}).get(symbol)
+        if counts is None:
+            counts = self.modules[module][symbol] = [0, 0, 0]
+
+        self.uses[symbol] += 1
+        counts[0] += 1
+
+        if polarity is True:
+            self.positive[symbol] += 1
+            counts[1] += 1
+        elif polarity is False:
+            self.negative[symbol] += 1
+            counts[2] += 1
+
+        return symbol
+
+    def register(self, name, arity, kind):
+        '''
+        Give a symbol an id if it is new, without counting an occurrence
+
+        :return int id
+        '''
+
+        key = (name, arity, kind)
+        symbol = self.ids.get(key)
+
+        if symbol is None:
+            symbol = self.ids[key] = len(self.symbols)
+            self.symbols.append(key)
+            self.uses.append(0)
+            self.positive.append(0)
+            self.negative.append(0)
+
+            self.kinds[kind].add(symbol)
+            self.arities.setdefault((kind, arity), set()).add(symbol)
+
+            others = self.names.setdefault(name, [])
+            for other in others:
+                self.overlaps.setdefault(overlap_key(kind, self.symbols[other][2]), set()).add(name)
+            others.append(symbol)
+
+        return symbol
+
+    def add_axiom(self, axiom, module=None):
+        '''
+        Count the occurrences of the symbols of an axiom
+
+        :param Axiom axiom, the axiom
+        :param module, the module the axiom belongs to
+        '''
+
+        for predicate in axiom.positive_predicates:
+            self.add(predicate.name, len(predicate.variables), PREDICATE, module, True)
+
+        for predicate in axiom.negated_predicates:
+            self.add(predicate.name, len(predicate.variables), PREDICATE, module, False)
+
+        for function in axiom.functs:
+            self.add(function.name, len(function.variables), FUNCTION, module)
+
+        for constant in axiom.consts:
+            self.add(constant, 0, CONSTANT, module)
+
+    def lookup(self, name, arity, kind):
+        '''
+        :return int, the id of the symbol or None if it does not occur
+        '''
+
+        return self.ids.get((name, arity, kind))
+
+    def of_kind(self, kind, arity=None):
+        '''
+        :param String kind, PREDICATE, FUNCTION or CONSTANT
+        :param int arity, only the symbols with this many arguments (all by default)
+        :return Set of ids, not to be modified
+        '''
+
+        if arity is None:
+            return self.kinds[kind]
+
+        return self.arities.get((kind, arity), set())
+
+    def predicates(self, arity=None):
+
+        return self.of_kind(PREDICATE, arity)
+
+    def functions(self, arity=None):
+
+        return self.of_kind(FUNCTION, arity)
+
+    def constants(self):
+
+        return self.of_kind(CONSTANT)
+
+    def overlap(self, kind, other):
+        '''
+        Names used as symbols of both kinds; for the same kind twice the
+        names used with different arities
+
+        :return Set of names, not to be modified
+        '''
+
+        return self.overlaps.get(overlap_key(kind, other), set())
+
+    def with_name(self, name):
+        '''
+        :return List of the ids of all symbols with the name
+        '''
+
+        return self.names.get(name, [])
+
+    def usage(self, symbol, module=None):
+        '''
+        :param int symbol, the id of a symbol
+        :param module, count only the occurrences in the module (all by default)
+        :return (uses, positive, negative) numbers of occurrences
+        '''
+
+        if module is None:
+            return self.uses[symbol], self.positive[symbol], self.negative[symbol]
+
+        return tuple(self.modules.get(module, {}).get(symbol, [0, 0, 0]))
+
+    def name(self, symbol):
+
+        return self.symbols[symbol][0]
+
+    def arity(self, symbol):
+
+        return self.symbols[symbol][1]
+
+    def kind(self, symbol):
+
+        return self.symbols[symbol][2]
+
+    def format(self, symbol):
+
+        name, arity, _ = self.symbols[symbol]
+
+        return "{}({})".format(name, arity)
+
+    def __len__(self):
+
+        return len(self.symbols)
+
+    def __repr__(self):
+
+        return "SymbolTable({})".format(", ".join([self.format(x) for x in range(len(self.symbols))]))
+
+
+def overlap_key(kind, other):
+
+    return (kind, other) if kind <= other else (other, kind)
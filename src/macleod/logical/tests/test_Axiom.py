@@ -1,5 +1,7 @@
 #!/bash/bin/env python
 
+import contextlib
+import io
 import unittest
 
 import macleod.Ontology as Ontology
@@ -108,5 +110,41 @@ class AxiomTest(unittest.TestCase):
         print(axiom_one.to_tptp())
         print(axiom_two.to_tptp())
 
+    def test_lazy_analysis(self):
+        a = Predicate('A', ['x', 'c'])
+        b = Predicate('B', ['y'])
+
+        axiom = Axiom(Universal(['x'], Existential(['y'], a | ~b)))
+        self.assertIsNone(axiom.analysis)
+
+        self.assertEqual(axiom.constants(), ['c'])
+        self.assertEqual(axiom.variables(), ['x', 'y'])
+        self.assertEqual(repr(axiom.binary()), '[A(x,c)]')
+        self.assertEqual(repr(axiom.negated()), '[B(y)]')
+
+        # Built once and reused
+        analysis = axiom.analysis
+        self.assertIs(axiom.get_analysis(), analysis)
+
+        # Rebuilt for a new sentence
+        axiom.sentence = Universal(['x'], b)
+        self.assertEqual(axiom.constants(), ['y'])
+
+    def test_quoted_constants(self):
+        a = Predicate('A', ['x', 'a-b'])
+        b = Predicate('B', ['x'])
+
+        axiom = Axiom(Universal(['x'], a | b), transient=True)
+        self.assertEqual(repr(axiom), '\\forall x\\;[(A(x,a-b) | B(x))]')
+        self.assertIsNone(axiom.analysis)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            axiom = Axiom(Universal(['x'], a | b))
+            pcnf = axiom.ff_pcnf()
+
+        self.assertEqual(axiom.constants(), ['a-b'])
+        self.assertEqual(repr(pcnf), "\\forall z\\;[(A(z,'a-b') | B(z))]")
+        self.assertEqual(repr(Axiom(pcnf.sentence)), repr(pcnf))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,117 @@
+#!/bash/bin/env python
+
+import contextlib
+import io
+import unittest
+
+from macleod.logical.axiom import Axiom
+from macleod.logical.clauses import ClauseSet
+from macleod.logical.connective import (Conjunction, Disjunction)
+from macleod.logical.emitter import formula_name
+from macleod.logical.quantifier import (Universal, Existential)
+from macleod.logical.symbol import (Function, Predicate)
+from macleod.parsing.parser import ClifParser
+
+class ClausesTest(unittest.TestCase):
+
+    def test_encoding(self):
+        '''
+        Ensure that literals are stored once and decoded as they were added
+        '''
+
+        clauses = ClauseSet([(Universal, ('x', 'y'))])
+
+        self.assertTrue(clauses.add([('A', True, ('x',)), ('R', False, ('x', 'y'))]))
+        self.assertTrue(clauses.add([('R', False, ('x', 'y')), ('B', True, ('y',))]))
+
+        self.assertEqual(len(clauses.literal_ids), 3)
+        self.assertEqual(clauses.symbols, ['A', 'R', 'B'])
+        self.assertEqual(clauses.terms, ['x', 'y'])
+        self.assertEqual(clauses.decode(1), ('R', False, ('x', 'y')))
+        self.assertEqual(list(clauses), [(('A', True, ('x',)), ('R', False, ('x', 'y'))),
+                                         (('R', False, ('x', 'y')), ('B', True, ('y',)))])
+
+    def test_redundant_clauses(self):
+
+        clauses = ClauseSet([(Universal, ('x',))])
+
+        self.assertTrue(clauses.add([('A', True, ('x',)), ('B', True, ('x',)), ('C', True, ('x',))]))
+
+        # Duplicate, also with the literals in a different order
+        self.assertFalse(clauses.add([('C', True, ('x',)), ('B', True, ('x',)), ('A', True, ('x',))]))
+        self.assertEqual(clauses.duplicates, 1)
+
+        # Tautology
+        self.assertFalse(clauses.add([('A', True, ('x',)), ('D', True, ('x',)), ('A', False, ('x',))]))
+        self.assertEqual(clauses.tautologies, 1)
+
+        # Backward subsumption
+        self.assertTrue(clauses.add([('A', True, ('x',)), ('C', True, ('x',))]))
+        self.assertEqual(len(clauses), 1)
+
+        # Forward subsumption
+        self.assertFalse(clauses.add([('A', True, ('x',)), ('C', True, ('x',)), ('D', True, ('x',))]))
+        self.assertEqual(clauses.subsumed, 2)
+
+        # Different arguments do not subsume each other
+        self.assertTrue(clauses.add([('A', True, ('y',))]))
+        self.assertEqual(len(clauses), 2)
+
+    def test_from_axiom(self):
+
+        clif_parser = ClifParser(preserve_conditionals=False)
+        axiom = Axiom(clif_parser.parse('(forall (x y) (iff (A x) (iff (B y) (C x))))')[0])
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            pcnf = axiom.ff_pcnf()
+
+        clauses = pcnf.clause_set()
+
+        self.assertEqual(len(clauses), 3)
+        self.assertEqual(clauses.subsumed, 2)
+        self.assertIn('A(z)', [repr(x) for x in clauses.to_logical().terms[0].terms])
+
+        # Only FF-PCNF axioms have clause sets
+        with self.assertRaises(ValueError):
+            axiom.clause_set()
+
+        with self.assertRaises(ValueError):
+            Axiom(Universal(['x'], Predicate('A', [Function('f', ['x'])]))).clause_set()
+
+    def test_split(self):
+
+        a = Predicate('A', ['x'])
+        b = Predicate('B', ['y'])
+        r = Predicate('R', ['x', 'y'])
+
+        clauses = Axiom(Universal(['x', 'y'], Conjunction([a, Disjunction([b, ~r])]))).clause_set()
+        self.assertEqual([repr(x) for x in clauses.split()], ['\\forall x\\;[A(x)]', '\\forall x,y\\;[(B(y) | ~R(x,y))]'])
+
+        # Clauses with variables of nested existentials cannot be split off
+        s = Predicate('S', ['y', 'z'])
+        clauses = Axiom(Universal(['x'], Existential(['y'], Existential(['z'], Conjunction([a, Disjunction([~s, r])]))))).clause_set()
+        self.assertEqual([repr(x) for x in clauses.split()], ['\\forall x\\;[A(x)]', '\\forall x\\;[\\exists y\\;[\\exists z\\;[(~S(y,z) | R(x,y))]]]'])
+
+    def test_output(self):
+
+        a = Predicate('A', ['x'])
+        r = Predicate('R', ['x', 'y'])
+
+        axiom = Axiom(Universal(['x', 'y'], Conjunction([a, Disjunction([~r, Predicate('=', ['x', 'y'])])])))
+        clauses = axiom.clause_set()
+
+        name = formula_name("(a(X)) & (~(r(X,Y)) | X=Y)")
+        self.assertEqual(clauses.to_tptp(), ['cnf({}_1, axiom, (a(X))).'.format(name),
+                                             'cnf({}_2, axiom, (~(r(X,Y)) | X=Y)).'.format(name)])
+        self.assertEqual(clauses.to_ladr(), '(all x all y ((A(x)) & (-(R(x,y)) | =(x,y)))).')
+
+        axiom = Axiom(Universal(['x'], Existential(['y'], r)))
+        formula = '(! [X] : ? [Y] : ((r(X,Y))))'
+        self.assertEqual(axiom.clause_set().to_tptp(), ['fof({}, axiom, {}).'.format(formula_name(formula), formula)])
+
+        # The names only depend on the clauses
+        self.assertEqual(Axiom(Universal(['x'], Existential(['y'], r))).clause_set().to_tptp(), axiom.clause_set().to_tptp())
+
+
+if __name__ == '__main__':
+    unittest.main()
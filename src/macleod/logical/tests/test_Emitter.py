@@ -0,0 +1,83 @@
+#!/bash/bin/env python
+
+import io
+import sys
+import unittest
+
+import macleod.logical.emitter as Emitters
+from macleod.logical.axiom import Axiom
+from macleod.logical.connective import (Conjunction, Disjunction, Implication)
+from macleod.logical.emitter import Emitter
+from macleod.logical.quantifier import (Universal, Existential)
+from macleod.logical.symbol import (Function, Predicate)
+
+class EmitterTest(unittest.TestCase):
+
+    def test_dialects(self):
+
+        a = Predicate('A_1', ['x', Function('f', ['c'])])
+        b = Predicate('B', ['x', 'y'])
+        e = Predicate('=', ['x', 'y'])
+
+        axiom = Axiom(Universal(['x'], Implication([a, Existential(['y'], ~b & e)])))
+
+        formula = "(! [X] :  (('a_1'(X,f(c)) => (? [Y] :  ((~(b(X,Y)) & X=Y))))))"
+        self.assertEqual(axiom.to_tptp(), "fof({}, axiom, {}).".format(Emitters.formula_name(formula), formula))
+        self.assertEqual(axiom.get_name(), Axiom(axiom.sentence).get_name())
+        self.assertEqual(axiom.to_ladr(), "(all x  (A_1(x,f(c)) -> (exists y  (-(B(x,y)) & =(x,y))))).")
+        self.assertEqual(axiom.to_latex(), "\\forall x\\;  \\left[ \\left[ \\textrm{A\\_1}(x,\\textrm{f}(c)) \\rightarrow "
+                                           "\\exists y\\;  \\left[ \\left(\\neg \\left(\\textrm{B}(x,y)\\right) \\land \\textrm{=}(x,y)\\right) \\right] \\right] \\right]")
+
+    def test_scope(self):
+        '''
+        Ensure that names are variables only within their quantifiers
+        '''
+
+        a = Predicate('A', ['x', 'y'])
+
+        sentence = Conjunction([Universal(['x'], a), Predicate('B', ['x'])])
+        self.assertEqual(Emitter(Emitters.TPTP).to_string(sentence), "((! [X] :  (a(X,y))) & b(x))")
+
+        sentence = Universal(['x'], Existential(['x'], a) | Predicate('B', ['x']))
+        self.assertEqual(Emitter(Emitters.TPTP).to_string(sentence), "(! [X] :  (((? [X] :  (a(X,y))) | b(X))))")
+
+    def test_shared_names(self):
+
+        emitter = Emitter(Emitters.TPTP)
+        out = io.StringIO()
+
+        emitter.emit(Predicate('A-B', ['x']), out)
+        emitter.emit(Predicate('A-B', ['y']), out)
+
+        self.assertEqual(out.getvalue(), "'a-b'(x)'a-b'(y)")
+        self.assertEqual(emitter.symbols, {'A-B': "'a-b'"})
+        self.assertEqual(emitter.constants, {'x': 'x', 'y': 'y'})
+
+        with self.assertRaises(ValueError):
+            emitter.to_string(Axiom(Predicate('A', ['x'])))
+
+    def test_deep_axiom(self):
+        '''
+        Ensure that the depth of an axiom is not limited by the recursion limit
+        '''
+
+        depth = sys.getrecursionlimit() * 2
+
+        # The constructors of connectives copy their terms recursively
+        sentence = Predicate('A', ['x'])
+        for i in range(depth):
+            connective = Conjunction if i % 2 else Disjunction
+            term = connective.__new__(connective)
+            term.terms = [Predicate('B', ['x']), sentence]
+            term.is_true = term.is_false = False
+            sentence = term
+
+        axiom = Axiom(Universal(['x'], sentence), transient=True)
+
+        self.assertTrue(axiom.to_tptp().endswith("a(X)" + ")" * (depth + 3) + "."))
+        self.assertEqual(axiom.to_ladr().count('B(x)'), depth)
+        self.assertEqual(axiom.to_latex().count('\\textrm{B}(x)'), depth)
+
+
+if __name__ == '__main__':
+    unittest.main()
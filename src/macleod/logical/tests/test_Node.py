@@ -0,0 +1,94 @@
+#!/bash/bin/env python
+
+import copy
+import pickle
+import unittest
+
+import macleod.logical.node as node
+from macleod.logical.connective import (Conjunction, Disjunction, Implication)
+from macleod.logical.negation import Negation
+from macleod.logical.quantifier import (Universal, Existential)
+from macleod.logical.symbol import (Function, Predicate)
+
+class NodeTest(unittest.TestCase):
+
+    def test_hash_consing(self):
+        '''
+        Ensure that structurally identical formulas have the very same node
+        '''
+
+        alpha = Universal(['x'], Predicate('A', ['x', Function('f', ['x'])]) | ~Predicate('B', ['x']))
+        beta = Universal(['x'], Predicate('A', ['x', Function('f', ['x'])]) | ~Predicate('B', ['x']))
+        gamma = Universal(['y'], Predicate('A', ['y', Function('f', ['y'])]) | ~Predicate('B', ['y']))
+
+        self.assertIs(alpha.freeze(), beta.freeze())
+        self.assertIsNot(alpha.freeze(), gamma.freeze())
+        self.assertEqual(hash(alpha.freeze()), hash(beta.freeze()))
+
+        # Identical subformulas are shared
+        delta = Conjunction([Predicate('A', ['x']), Predicate('B', ['x'])]).freeze()
+        epsilon = Disjunction([Predicate('A', ['x']), Predicate('C', ['x'])]).freeze()
+        self.assertIs(delta.args[0], epsilon.args[0])
+
+    def test_repr(self):
+        '''
+        Ensure that nodes print like the Logicals they were created from
+        '''
+
+        alpha = Existential(['x', 'y'], Implication([Predicate('<', ['x', 'y']), ~Predicate('B', [Function('F', ['y'])])]))
+        self.assertEqual(repr(alpha.freeze()), repr(alpha))
+
+        beta = Conjunction([Predicate('A', ['x']), ~Predicate('A', ['x'])])
+        self.assertEqual(repr(beta.freeze()), 'False')
+
+    def test_immutable(self):
+
+        alpha = Predicate('A', ['x']).freeze()
+
+        with self.assertRaises(AttributeError):
+            alpha.symbol = 'B'
+
+        self.assertIs(copy.deepcopy(alpha), alpha)
+
+    def test_thaw(self):
+        '''
+        Ensure that thawing gives back a fresh, equivalent Logical
+        '''
+
+        alpha = Universal(['x'], Conjunction([Predicate('A', ['x']), Disjunction([Predicate('B', ['x']), Negation(Predicate('C', ['x']))])]))
+        thawed = node.thaw(alpha.freeze())
+
+        self.assertIsNot(thawed, alpha)
+        self.assertEqual(type(thawed), Universal)
+        self.assertEqual(repr(thawed), repr(alpha))
+        self.assertIs(thawed.freeze(), alpha.freeze())
+
+    def test_pickle(self):
+        '''
+        Ensure that unpickled nodes are hash-consed again
+        '''
+
+        alpha = (Predicate('A', ['x']) & Predicate('B', ['y'])).freeze()
+
+        self.assertIs(pickle.loads(pickle.dumps(alpha)), alpha)
+
+    def test_predicate_equality(self):
+
+        self.assertEqual(Predicate('A', ['x', Function('f', ['y'])]), Predicate('A', ['x', Function('f', ['y'])]))
+        self.assertNotEqual(Predicate('A', ['x', Function('f', ['y'])]), Predicate('A', ['x', Function('f', ['x'])]))
+        self.assertNotEqual(Predicate('A', ['x']), Negation(Predicate('A', ['x'])))
+
+        self.assertTrue(Negation(Predicate('A', ['x', 'y'])).is_negation_of(Predicate('A', ['x', 'y'])))
+        self.assertFalse(Negation(Predicate('A', ['x', 'y'])).is_negation_of(Predicate('A', ['y', 'x'])))
+
+    def test_redundant_terms(self):
+
+        alpha = Conjunction([Predicate('A', ['x']), Predicate('B', ['x']), Predicate('A', ['x'])])
+        self.assertEqual(repr(alpha), '(A(x) & B(x))')
+
+        beta = Disjunction([Predicate('A', ['x']), Predicate('B', ['x']), ~Predicate('B', ['x'])])
+        self.assertEqual(repr(beta), 'True')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,316 @@
+#!/bash/bin/env python
+
+import contextlib
+import io
+import itertools
+import random
+import unittest
+
+import macleod.logical.normal_form as NormalForm
+import macleod.logical.symbol as Symbol
+from macleod.logical.axiom import Axiom
+from macleod.logical.connective import (Conjunction, Disjunction)
+from macleod.logical.quantifier import (Universal, Existential)
+from macleod.logical.node import (FUNCTION, PREDICATE, NOT, AND, OR, IF, IFF, FORALL, EXISTS)
+from macleod.logical.symbol import (Function, Predicate)
+from macleod.parsing.parser import ClifParser
+from macleod.scripts.benchmark_pcnf import (copying_ff_pcnf, rescoped_ff_pcnf)
+
+def random_formula(rng, depth):
+
+    def term(depth):
+        if depth <= 0 or rng.random() < 0.75:
+            return rng.choice(['x', 'y', 'z', 'w', 'c'])
+        return '(f{} {})'.format(rng.randint(0, 2), ' '.join(term(depth - 1) for _ in range(rng.randint(1, 2))))
+
+    if depth <= 0 or rng.random() < 0.25:
+        return '(P{} {})'.format(rng.randint(0, 2), ' '.join(term(1) for _ in range(rng.randint(1, 2))))
+
+    kind = rng.choice(['not', 'and', 'or', 'if', 'iff', 'forall', 'exists'])
+
+    if kind == 'not':
+        return '(not {})'.format(random_formula(rng, depth - 1))
+    elif kind in ('and', 'or'):
+        return '({} {})'.format(kind, ' '.join(random_formula(rng, depth - 1) for _ in range(rng.randint(1, 3))))
+    elif kind in ('if', 'iff'):
+        return '({} {} {})'.format(kind, random_formula(rng, depth - 1), random_formula(rng, depth - 1))
+
+    return '({} ({}) {})'.format(kind, ' '.join(rng.sample(['x', 'y', 'z', 'w'], rng.randint(1, 2))),
+                                 random_formula(rng, depth - 1))
+
+
+def outcome(pcnf, axiom):
+    '''
+    Everything observable about a translation: the axioms, their ids, errors and printed output
+    '''
+
+    Symbol.gen = Symbol.generator()
+    Axiom.axiom_id = 1
+    output = io.StringIO()
+
+    with contextlib.redirect_stdout(output):
+        try:
+            cnf = pcnf(axiom)
+            result = (repr(cnf), cnf.id, [(repr(x), x.id) for x in cnf.extra_sentences])
+        except Exception as e:
+            result = (type(e), str(e))
+
+    return result, output.getvalue(), Axiom.axiom_id
+
+
+def evaluate(term, model):
+    '''
+    Truth of a formula in a domain of a single element, where model holds the true predicates
+    '''
+
+    if term.kind == PREDICATE:
+        return term.symbol in model
+    elif term.kind == NOT:
+        return not evaluate(term.args[0], model)
+    elif term.kind in (FORALL, EXISTS):
+        return evaluate(term.args[0], model)
+    elif term.symbol is not None:
+        return term.symbol
+    elif term.kind == AND:
+        return all(evaluate(x, model) for x in term.args)
+
+    return any(evaluate(x, model) for x in term.args)
+
+
+def interpret(term, model, assignment):
+    '''
+    Value of a term or truth of a formula in a model over the domain [0, 1], where model
+    maps names and arities of predicates to their extensions and of functions to their values
+    '''
+
+    if isinstance(term, str):
+        return assignment.get(term, len(term) % 2)
+
+    kind = term.kind
+    args = term.args
+
+    if kind in (PREDICATE, FUNCTION):
+        values = tuple(interpret(x, model, assignment) for x in args)
+        value = model.get((term.symbol, len(values)), {}).get(values, False)
+        return int(value) if kind == FUNCTION else value
+    elif kind == NOT:
+        return not interpret(args[0], model, assignment)
+    elif kind == IF:
+        return not interpret(args[0], model, assignment) or interpret(args[1], model, assignment)
+    elif kind == IFF:
+        return interpret(args[0], model, assignment) == interpret(args[1], model, assignment)
+    elif kind in (FORALL, EXISTS):
+        values = [interpret(args[0], model, dict(assignment, **dict(zip(term.symbol, x))))
+                  for x in itertools.product([0, 1], repeat=len(term.symbol))]
+        return all(values) if kind == FORALL else any(values)
+    elif term.symbol is not None:
+        return term.symbol
+    elif kind == AND:
+        return all(interpret(x, model, assignment) for x in args)
+
+    return any(interpret(x, model, assignment) for x in args)
+
+
+class NormalFormTest(unittest.TestCase):
+
+    def assertSameTranslation(self, axiom):
+
+        (translated, printed, axiom_id) = outcome(rescoped_ff_pcnf, axiom)
+        (expected, _, expected_id) = outcome(copying_ff_pcnf, axiom)
+
+        if expected[0] is NotImplementedError:
+            # The original leaves the ONF of conditionals unimplemented, the nodes name the missing one
+            self.assertIs(translated[0], AttributeError, repr(axiom))
+            self.assertRegex(translated[1], r"^'(Implication|Biconditional)' object has no attribute '(is|to)_onf'$")
+            self.assertEqual(axiom_id, expected_id, repr(axiom))
+        else:
+            self.assertEqual((translated, axiom_id), (expected, expected_id), repr(axiom))
+        # Unlike the original, the steps on nodes only log their diagnostics
+        self.assertEqual(printed, '', repr(axiom))
+
+    def test_fixtures(self):
+
+        a = Predicate('A', ['x'])
+        b = Predicate('B', ['y'])
+        c = Predicate('C', ['z'])
+        f = Predicate('C', ['z', Function('F', ['z'])])
+
+        self.assertSameTranslation(Axiom(Universal(['x','y','z'], a | b & c)))
+        self.assertSameTranslation(Axiom(Universal(['x','y','z'], (a | b) & c)))
+        self.assertSameTranslation(Axiom(Universal(['x','y','z'], a | b & f)))
+        self.assertSameTranslation(Axiom(Universal(['x'], Existential(['y'], a & b) | Universal(['z'], c))))
+        self.assertSameTranslation(Axiom(Universal(['x'], ~(Universal(['y'], a | b) & Existential(['z'], ~c)))))
+
+    def test_random_axioms(self):
+
+        rng = random.Random(7)
+
+        for preserve_conditionals in (True, False):
+            clif_parser = ClifParser(preserve_conditionals)
+            for _ in range(40):
+                text = '(forall (x y z) {})'.format(random_formula(rng, 3))
+                self.assertSameTranslation(Axiom(clif_parser.parse(text)[0]))
+
+    def test_no_modification(self):
+        '''
+        Ensure that the steps neither modify nor copy what they do not change
+        '''
+
+        a = Predicate('A', ['x'])
+        b = Predicate('B', ['y'])
+        c = Predicate('C', ['x', Function('f', ['y'])])
+
+        axiom = Axiom(Universal(['x'], ~Existential(['y'], a & ~(b | c))))
+        sentence = axiom.sentence.freeze()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            axiom.ff_pcnf()
+
+        self.assertIs(axiom.sentence.freeze(), sentence)
+
+        # Already in negation normal form
+        unchanged = Conjunction([Disjunction([a, ~b]), c]).freeze()
+        self.assertIs(NormalForm.push_negation(unchanged), unchanged)
+
+        # Only the negated part is rebuilt
+        pushed = NormalForm.push_negation(Conjunction([Disjunction([a, ~b]), ~(a & b)]).freeze())
+        self.assertIs(pushed.args[0], unchanged.args[0])
+        self.assertEqual(repr(pushed), '(A(x) | ~B(y)) & (~A(x) | ~B(y))'.join('()'))
+
+    def test_prenex(self):
+        '''
+        Ensure that the single pass prenex forms are equivalent to the formulas
+        '''
+
+        rng = random.Random(5)
+
+        for preserve_conditionals in (True, False):
+            clif_parser = ClifParser(preserve_conditionals)
+            for _ in range(40):
+
+                text = '(and (P0 z) {})'.format(random_formula(rng, 3))
+                sentence = clif_parser.parse(text)[0].freeze()
+
+                for order in (NormalForm.UNIVERSALS_FIRST, NormalForm.EXISTENTIALS_FIRST):
+
+                    prenex = NormalForm.create_prenex(sentence, order)
+
+                    matrix = prenex
+                    variables = 0
+                    while matrix.kind in (FORALL, EXISTS):
+                        variables += len(matrix.symbol)
+                        matrix = matrix.args[0]
+
+                    self.assertNotIn('\\exists', repr(matrix), text)
+                    self.assertNotIn('\\forall', repr(matrix), text)
+
+                    # Too many assignments to check
+                    if variables > 10:
+                        continue
+
+                    for _ in range(4):
+                        model = dict(((name, arity), dict((x, rng.random() < 0.5) for x in itertools.product([0, 1], repeat=arity)))
+                                     for name in ['P0', 'P1', 'P2', 'f0', 'f1', 'f2'] for arity in (1, 2, 3))
+                        self.assertEqual(interpret(prenex, model, {}), interpret(sentence, model, {}), text)
+
+    def test_prenex_order(self):
+
+        clif_parser = ClifParser(preserve_conditionals=False)
+        sentence = clif_parser.parse('(and (forall (x) (exists (y) (R x y))) (exists (x) (A x)) (A x))')[0].freeze()
+
+        self.assertEqual(repr(NormalForm.create_prenex(sentence, NormalForm.UNIVERSALS_FIRST)),
+                         '\\forall x1\\;[\\exists x2,y\\;[(R(x1,y) & A(x2) & A(x))]]')
+        self.assertEqual(repr(NormalForm.create_prenex(sentence, NormalForm.EXISTENTIALS_FIRST)),
+                         '\\exists x2\\;[\\forall x1\\;[\\exists y\\;[(R(x1,y) & A(x2) & A(x))]]]')
+
+        # Like quantifiers share their variables where they distribute over the connective
+        sentence = clif_parser.parse('(and (forall (x) (A x)) (forall (y z) (B y z)))')[0].freeze()
+        self.assertEqual(repr(NormalForm.create_prenex(sentence)), '\\forall y,z\\;[(A(y) & B(y,z))]')
+
+        sentence = clif_parser.parse('(or (forall (x) (A x)) (forall (y) (B y)))')[0].freeze()
+        self.assertEqual(repr(NormalForm.create_prenex(sentence)), '\\forall x,y\\;[(A(x) | B(y))]')
+
+        with self.assertRaises(ValueError):
+            NormalForm.create_prenex(sentence, 'miniscope')
+
+        # The prenex form of the original implementation is only a reference for the tests
+        with self.assertRaises(ValueError):
+            NormalForm.create_prenex(sentence, 'rescope')
+
+    def test_definitional_cnf(self):
+        '''
+        Ensure that definitions keep the number of clauses small
+        '''
+
+        clif_parser = ClifParser(preserve_conditionals=False)
+        text = '(forall (x y) (iff (A x) (iff (B y) (iff (C x) (iff (D x y) (iff (E y) (F x)))))))'
+        axiom = Axiom(clif_parser.parse(text)[0])
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            naive = axiom.ff_pcnf()
+            definitional = axiom.ff_pcnf(NormalForm.DEFINITIONAL, 4)
+
+        self.assertEqual(naive.definitions, 0)
+        self.assertGreater(definitional.definitions, 0)
+        self.assertLess(len(definitional.sentence.terms[0].terms), len(naive.sentence.terms[0].terms) // 5)
+
+        # Nothing to define
+        axiom = Axiom(Universal(['x'], Predicate('A', ['x']) | Predicate('B', ['x']) & Predicate('C', ['x'])))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(repr(axiom.ff_pcnf(NormalForm.DEFINITIONAL)), repr(axiom.ff_pcnf()))
+
+        with self.assertRaises(ValueError):
+            axiom.ff_pcnf('tseitin')
+
+    def test_definitional_equisatisfiable(self):
+        '''
+        Ensure that every model of an axiom is one of its definitional CNF
+        once the new predicates are made true where their definitions hold
+        '''
+
+        rng = random.Random(3)
+        clif_parser = ClifParser(preserve_conditionals=False)
+
+        for _ in range(40):
+
+            text = '(forall (x y z) {})'.format(random_formula(rng, 4))
+            axiom = Axiom(clif_parser.parse(text)[0])
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    naive = axiom.ff_pcnf()
+                except Exception:
+                    continue
+                definitional = axiom.ff_pcnf(NormalForm.DEFINITIONAL, 1)
+
+            naive = naive.sentence.freeze()
+            definitional = definitional.sentence.freeze()
+
+            matrix = definitional
+            while matrix.kind in (FORALL, EXISTS):
+                matrix = matrix.args[0]
+
+            # Clauses of the new predicates, which are introduced innermost first
+            clauses = matrix.args if matrix.kind == AND else [matrix]
+            defined = {}
+            for clause in clauses:
+                literals = clause.args if clause.kind == OR else [clause]
+                for literal in literals:
+                    if literal.kind == NOT and literal.args[0].symbol.startswith(NormalForm.DEFINITION_PREFIX):
+                        rest = [x for x in literals if x is not literal]
+                        defined.setdefault(literal.args[0].symbol, []).append(NormalForm.disjunction(rest))
+
+            predicates = sorted(set(['P0', 'P1', 'P2']))
+
+            for values in itertools.product([True, False], repeat=len(predicates)):
+                model = set(p for p, v in zip(predicates, values) if v)
+                for name in sorted(defined, key=lambda n: int(n[len(NormalForm.DEFINITION_PREFIX):])):
+                    if all(evaluate(x, model) for x in defined[name]):
+                        model.add(name)
+
+                self.assertEqual(evaluate(definitional, model), evaluate(naive, model), text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/bash/bin/env python
+
+import unittest
+
+import macleod.logical.symbol_table as Symbols
+from macleod.logical.axiom import Axiom
+from macleod.logical.quantifier import (Universal, Existential)
+from macleod.logical.symbol import (Function, Predicate)
+from macleod.logical.symbol_table import SymbolTable
+
+class SymbolTableTest(unittest.TestCase):
+
+    def test_ids(self):
+
+        table = SymbolTable()
+
+        r = table.add('R', 2, Symbols.PREDICATE, 'a', True)
+        self.assertEqual(table.add('R', 2, Symbols.PREDICATE, 'b', False), r)
+        self.assertNotEqual(table.add('R', 1, Symbols.PREDICATE, 'b', True), r)
+
+        self.assertEqual(table.lookup('R', 2, Symbols.PREDICATE), r)
+        self.assertIsNone(table.lookup('R', 2, Symbols.FUNCTION))
+        self.assertEqual(table.format(r), 'R(2)')
+
+        self.assertEqual(table.usage(r), (2, 1, 1))
+        self.assertEqual(table.usage(r, 'a'), (1, 1, 0))
+        self.assertEqual(table.usage(r, 'c'), (0, 0, 0))
+
+    def test_axioms(self):
+
+        table = SymbolTable()
+
+        a = Predicate('A', ['x'])
+        r = Predicate('R', ['x', Function('f', ['c'])])
+
+        table.add_axiom(Axiom(Universal(['x'], ~a | r)), 'first')
+        table.add_axiom(Axiom(Existential(['x'], a & Predicate('A', ['c']))), 'second')
+        table.add_axiom(Axiom(Predicate('S', ['x', 'y', 'f'])), 'second')
+
+        self.assertEqual([table.name(x) for x in table.predicates(1)], ['A'])
+        self.assertEqual([table.name(x) for x in table.predicates(2)], ['R'])
+        self.assertEqual(len(table.predicates()), 3)
+        self.assertEqual(sorted(table.name(x) for x in table.constants()), ['c', 'f', 'x', 'y'])
+
+        self.assertEqual(table.usage(table.lookup('A', 1, Symbols.PREDICATE)), (3, 2, 1))
+        self.assertEqual(table.usage(table.lookup('A', 1, Symbols.PREDICATE), 'first'), (1, 0, 1))
+
+        self.assertEqual(table.overlap(Symbols.FUNCTION, Symbols.CONSTANT), {'f'})
+        self.assertEqual(table.overlap(Symbols.CONSTANT, Symbols.FUNCTION), {'f'})
+        self.assertEqual(table.overlap(Symbols.PREDICATE, Symbols.CONSTANT), set())
+
+        table.add('A', 2, Symbols.PREDICATE)
+        self.assertEqual(table.overlap(Symbols.PREDICATE, Symbols.PREDICATE), {'A'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -88,13 +88,10 @@ def quote_constants(term, constants):
         else:
             return type(term)([substitute_constants_in_term(x, constants) for x in term.get_term()])
 
-    constants_copy = copy.deepcopy(constants)
+    # Skip plain names and constants that are already in quotation marks
+    constants_copy = [c for c in constants if not c.isalnum() and not (len(c) > 1 and c[0] == c[-1] == "'")]
     constants_copy.sort(key=len, reverse=True)
 
-    for c in constants_copy:
-        if c.isalnum():
-            constants_copy.remove(c)
-
     #print("Constants: " + str(constants_copy))
 
     if len(constants_copy) == 0:
@@ -0,0 +1,425 @@
+"""
+Persistent, content-addressed cache of parsed modules.
+
+Each entry holds the parsed and analyzed Axiom objects of a single CLIF module
+together with its imports. Entries are keyed by a hash of the file content and
+the parser options, so an entry can never be stale: a changed file simply hashes
+to a different key, and the old entry eventually drops out through the LRU
+eviction that keeps the cache below its size limit.
+
+A FragmentCache keeps the translations of single modules to TPTP or LADR the
+same way, so that only changed modules are translated again, and a
+ResultCache the results of reasoners on their translated input files.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+
+from pathlib import Path
+
+LOGGER = logging.getLogger(__name__)
+
+# Bump whenever the pickled object structure changes to orphan older entries
+CACHE_VERSION = 3
+
+# Default size limit of the cache in MB
+DEFAULT_SIZE_LIMIT = 512
+
+# Endings of the entries of ParseCache, FragmentCache and ResultCache, which
+# share a folder and its size limit
+ENDINGS = ('.pickle', '.fragment', '.result')
+
+
+def read_option(key):
+    """
+    Read an option of the cache section of the configuration file. Unlike
+    Filemgt.read_config(), this neither requires a configuration file nor
+    warns about an option that is not set, as every option has a default.
+
+    :return String, the value of the option, None if there is no configuration file or the option is not set
+    """
+
+    import macleod.Filemgt
+
+    if not os.path.isfile(macleod.Filemgt.find_config_file()):
+        return None
+
+    config = macleod.Filemgt.MacleodConfigParser()
+    if not config.has_option('cache', key):
+        return None
+
+    return config.get('cache', key)
+
+
+def default_folder():
+    """
+    :return String, the configured folder of the cache, by default the subfolder cache of the macleod home directory
+    """
+
+    folder = read_option('folder')
+    if folder is None:
+        folder = str(Path.home().joinpath('macleod', 'cache'))
+
+    return os.path.abspath(folder)
+
+
+class ParseCache(object):
+    """
+    On-disk store of parsed modules. Reading an entry marks it as recently
+    used; writing an entry evicts the least recently used ones until the cache
+    fits into its size limit, which includes the entries of the other caches
+    sharing the folder.
+
+    :param String folder, directory of the cache (defaults to the configured folder)
+    :param int size_limit, maximum size of the cache in MB (defaults to the configured limit)
+    """
+
+    ENDING = '.pickle'
+
+    def __init__(self, folder=None, size_limit=None):
+
+        if folder is None:
+            folder = default_folder()
+
+        if size_limit is None:
+            size_limit = read_option('size_limit')
+        if size_limit is None:
+            size_limit = DEFAULT_SIZE_LIMIT
+
+        self.folder = os.path.abspath(folder)
+        self.size_limit = int(float(size_limit) * 1024 * 1024)
+
+        os.makedirs(self.folder, exist_ok=True)
+
+    @staticmethod
+    def key(content, preserve_conditionals):
+        """
+        Compute the key of a module from its text and the parser options.
+
+        :param String content, the text of the CLIF file
+        :param Boolean preserve_conditionals, parser option
+        :return String key, hexadecimal digest
+        """
+
+        digest = hashlib.sha256()
+        digest.update(content.encode('utf-8'))
+        digest.update("\0{}\0{}".format(CACHE_VERSION, preserve_conditionals).encode('utf-8'))
+
+        return digest.hexdigest()
+
+    def get_entry_path(self, key):
+
+        return os.path.join(self.folder, key + self.ENDING)
+
+    def load(self, key):
+        """
+        Look up a module.
+
+        :param String key, as computed by ParseCache.key()
+        :return Tuple (axioms, imports) or None if the module is not cached
+        """
+
+        entry_path = self.get_entry_path(key)
+
+        try:
+            with open(entry_path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            LOGGER.warning("Discarding unreadable cache entry " + entry_path + ": " + str(e))
+            self.remove(entry_path)
+            return None
+
+        # Reading an entry counts as a use for the LRU eviction
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        LOGGER.debug("Loaded cache entry " + entry_path)
+        return entry
+
+    def store(self, key, axioms, imports):
+        """
+        Store a module and evict the least recently used entries if the cache
+        grew beyond its size limit.
+
+        :param String key, as computed by ParseCache.key()
+        :param List axioms, the parsed Axiom objects
+        :param List imports, the imported URIs
+        """
+
+        self.write(key, (axioms, imports))
+
+    def write(self, key, entry):
+        """
+        Store any picklable entry, see store()
+        """
+
+        entry_path = self.get_entry_path(key)
+
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.folder)
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except (OSError, pickle.PicklingError, RecursionError) as e:
+            LOGGER.warning("Could not write cache entry " + entry_path + ": " + str(e))
+            self.remove(temp_path)
+            return
+
+        LOGGER.debug("Stored cache entry " + entry_path)
+        self.evict()
+
+    def entries(self, endings=None):
+        """
+        :param Tuple endings, of the entries to list, only those of this cache by default
+        :return List entries, tuples (last use, size, path) of all cache entries
+        """
+
+        if endings is None:
+            endings = self.ENDING
+
+        entries = []
+
+        for name in os.listdir(self.folder):
+            if name.endswith(endings):
+                entry_path = os.path.join(self.folder, name)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits into its size limit.
+        The limit holds for the entries of all caches in the folder (see ENDINGS).
+        """
+
+        entries = sorted(self.entries(ENDINGS))
+        size = sum(entry[1] for entry in entries)
+
+        while entries and size > self.size_limit:
+            _, entry_size, entry_path = entries.pop(0)
+            LOGGER.debug("Evicting cache entry " + entry_path)
+            self.remove(entry_path)
+            size -= entry_size
+
+    def invalidate(self, path=None):
+        """
+        Remove the entries of a single CLIF file (for its current content) or,
+        if no file is given, all entries.
+
+        :param String path, CLIF file whose entries should be removed
+        :return int count, number of removed entries
+        """
+
+        if path is None:
+            entry_paths = [entry[2] for entry in self.entries()]
+        else:
+            with open(path, 'r') as f:
+                content = f.read()
+            entry_paths = [self.get_entry_path(key) for key in self.keys(content)]
+
+        count = 0
+        for entry_path in entry_paths:
+            if self.remove(entry_path):
+                count += 1
+
+        return count
+
+    def keys(self, content):
+        """
+        :return List keys, of all possible entries of a CLIF file with the content
+        """
+
+        return [ParseCache.key(content, preserve) for preserve in (True, False)]
+
+    @staticmethod
+    def remove(entry_path):
+
+        try:
+            os.remove(entry_path)
+            return True
+        except OSError:
+            return False
+
+
+class FragmentCache(ParseCache):
+    """
+    On-disk store of the translations of single modules into an output format:
+    the translated formulas of the axioms of a module, in order and without the
+    names of the axioms, which are only given when the output of a closure is
+    assembled. Entries are keyed by the key of the module in the parse cache
+    (its content and the parser options) and the output format, and are
+    evicted the same way.
+
+    :param String folder, directory of the cache (defaults to the configured folder)
+    :param int size_limit, maximum size of the cache in MB (defaults to the configured limit)
+    """
+
+    ENDING = '.fragment'
+
+    # Output formats of the fragments
+    DIALECTS = ['tptp', 'ladr']
+
+    @staticmethod
+    def key(digest, dialect):
+        """
+        Compute the key of the fragment of a module.
+
+        :param String digest, key of the module as computed by ParseCache.key()
+        :param String dialect, the output format
+        :return String key, hexadecimal digest
+        """
+
+        return hashlib.sha256("{}\0{}\0{}".format(digest, CACHE_VERSION, dialect).encode('utf-8')).hexdigest()
+
+    def store(self, key, formulas):
+        """
+        Store the fragment of a module.
+
+        :param String key, as computed by FragmentCache.key()
+        :param List formulas, the translations of the axioms of the module
+        """
+
+        self.write(key, formulas)
+
+    def keys(self, content):
+
+        return [FragmentCache.key(digest, dialect) for digest in ParseCache.keys(self, content)
+                for dialect in FragmentCache.DIALECTS]
+
+
+class ResultCache(ParseCache):
+    """
+    On-disk store of the results of reasoners, so that a reasoner is not run
+    again on an identical input. Entries are keyed by the content of the input
+    files of the reasoner (the files among its arguments), its name, its other
+    arguments except for its time limit, and its version (see version()).
+
+    A decisive result (a proof, a model, an inconsistency) holds whatever the
+    time limit. An unknown result (the reasoner gave up or ran out of time) is
+    kept separately together with its time limit and only reused as long as
+    the time limit is not longer, so that a longer time limit runs the reasoner
+    again.
+
+    :param String folder, directory of the cache (defaults to the configured folder)
+    :param int size_limit, maximum size of the cache in MB (defaults to the configured limit)
+    """
+
+    ENDING = '.result'
+
+    # Appended to the key of unknown results
+    UNKNOWN = '.unknown'
+
+    @staticmethod
+    def key(name, args, timeout_position=None):
+        """
+        Compute the key of the result of a reasoner.
+
+        :param String name, the name of the reasoner
+        :param List args, the command that runs the reasoner
+        :param int timeout_position, position of the time limit in args (see Reasoner.timeout_position)
+        :return String key, hexadecimal digest
+        """
+
+        digest = hashlib.sha256()
+        digest.update("{}\0{}\0{}".format(CACHE_VERSION, name, version(args[0])).encode('utf-8'))
+
+        for position, arg in enumerate(args[1:], 1):
+            if position == timeout_position:
+                arg = '{timeout}'
+            elif os.path.isfile(arg):
+                arg = file_digest(arg)
+            digest.update(("\0" + arg).encode('utf-8'))
+
+        return digest.hexdigest()
+
+    def lookup(self, key, timeout):
+        """
+        Look up the result of a reasoner.
+
+        :param String key, as computed by ResultCache.key()
+        :param int timeout, the time limit of the reasoner in seconds
+        :return dict, the entry (see store()) or None if the reasoner needs to run
+        """
+
+        entry = self.load(key)
+
+        if entry is None:
+            entry = self.load(key + self.UNKNOWN)
+            if entry is not None and entry['timeout'] < timeout:
+                LOGGER.debug("Retrying unknown result with a longer time limit: " + key)
+                return None
+
+        return entry
+
+    def store(self, key, entry, decisive):
+        """
+        Store the result of a reasoner.
+
+        :param String key, as computed by ResultCache.key()
+        :param dict entry, the result: the output code of the reasoner, its status, time limit,
+                           wall and CPU time, peak memory and the text of its output file
+        :param Boolean decisive, whether the result holds whatever the time limit
+        """
+
+        if decisive:
+            self.write(key, entry)
+            # an unknown result with a shorter time limit is out of date
+            self.remove(self.get_entry_path(key + self.UNKNOWN))
+        else:
+            self.write(key + self.UNKNOWN, entry)
+
+    def clear(self, unknown=False):
+        """
+        Remove all entries or only the unknown results.
+
+        :return int count, number of removed entries
+        """
+
+        count = 0
+
+        for _, _, entry_path in self.entries():
+            if unknown and not entry_path.endswith(self.UNKNOWN + self.ENDING):
+                continue
+            if self.remove(entry_path):
+                count += 1
+
+        return count
+
+
+def version(command):
+    """
+    :return String, identifies the executable of a command by its location, size and modification time
+    """
+
+    path = shutil.which(command)
+
+    if path is None:
+        return command
+
+    stat = os.stat(path)
+
+    return "{}\0{}\0{}".format(path, stat.st_size, stat.st_mtime_ns)
+
+
+def file_digest(path):
+
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
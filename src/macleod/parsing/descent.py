@@ -0,0 +1,267 @@
+"""
+Hand-written parsing engine for Common Logic files.
+
+A single regular expression scans the text in one pass into the same tokens
+as the PLY lexer in parser.py; the tokens are grouped into s-expressions and
+each top-level s-expression is turned by a recursive-descent builder into the
+same Logical objects that the PLY grammar actions produce.
+
+The engine only handles well-formed input. On anything else it raises
+DescentError and leaves it to ClifParser to re-parse the text with the PLY
+engine, so that syntax errors are reported with exactly the same messages.
+"""
+
+import itertools
+import re
+
+import macleod.parsing.parser as clif
+from macleod.logical.connective import (Conjunction, Disjunction, Implication, Biconditional)
+from macleod.logical.negation import Negation
+from macleod.logical.quantifier import (Universal, Existential)
+from macleod.logical.symbol import (Function, Predicate)
+
+
+class DescentError(Exception):
+    """
+    Raised by the descent engine when the text is not well-formed Common Logic
+    """
+    pass
+
+
+# One alternative per token, in the order in which the PLY lexer tries them
+SCANNER = re.compile('|'.join([
+    r'(?P<IGNORE>[{}]+)'.format(re.escape(clif.t_ignore)),
+    r'(?P<LPAREN>{})'.format(clif.t_LPAREN.__doc__),
+    r'(?P<RPAREN>{})'.format(clif.t_RPAREN.__doc__),
+    r'(?P<URI>{})'.format(clif.t_URI.__doc__),
+    r'(?P<NONLOGICAL>{})'.format(clif.t_NONLOGICAL.__doc__),
+    r'(?P<QUOTED_STRING>{})'.format(clif.t_QUOTED_STRING),
+    r'(?P<COMMENT>{})'.format(clif.t_COMMENT),
+]), re.UNICODE)
+
+
+def scan(buff):
+    """
+    Split a string into (type, value) tokens, skipping whitespace.
+
+    :param String buff, the text to be scanned
+    :return Generator tokens, tuples of token type and token text
+    """
+
+    reserved = clif.reserved
+    position = 0
+
+    for match in SCANNER.finditer(buff):
+
+        # The PLY lexer reports and skips unknown characters, leave that to it
+        if match.start() != position:
+            raise DescentError("Unknown character at position {}".format(position))
+        position = match.end()
+
+        kind = match.lastgroup
+        if kind == 'IGNORE':
+            continue
+
+        value = match.group()
+        if kind == 'NONLOGICAL':
+            kind = reserved.get(value, kind)
+
+        yield (kind, value)
+
+    if position != len(buff):
+        raise DescentError("Unknown character at position {}".format(position))
+
+
+def read(tokens):
+    """
+    Group tokens into s-expressions. Every top-level statement is yielded as
+    soon as its closing parenthesis has been read: as a list of its tokens
+    and nested lists. The statements of a (cl-text URI ...) wrapper count as
+    top-level statements; a leading block comment is dropped.
+
+    :param Iterable tokens, as produced by scan()
+    :return Generator statements, one nested list per top-level statement
+    """
+
+    tokens = iter(tokens)
+    head = list(itertools.islice(tokens, 3))
+
+    if head and head[0][0] == 'COMMENT':
+        head = head[1:] + list(itertools.islice(tokens, 1))
+
+    wrapped = len(head) > 1 and head[0][0] == 'LPAREN' and head[1][0] == 'START'
+    if wrapped:
+        if len(head) < 3 or head[2][0] != 'URI':
+            raise DescentError("Missing URI of cl-text")
+        head = []
+
+    stack = []
+    statements = 0
+    closed = False
+
+    for token in itertools.chain(head, tokens):
+
+        kind = token[0]
+
+        if closed:
+            raise DescentError("Unexpected {} after the end of the text".format(kind))
+
+        if kind == 'LPAREN':
+
+            stack.append([])
+
+        elif kind == 'RPAREN':
+
+            if not stack:
+                if wrapped and statements > 0:
+                    closed = True
+                    continue
+                raise DescentError("Unbalanced closing parenthesis")
+
+            expression = stack.pop()
+            if not expression:
+                raise DescentError("Empty s-expression")
+
+            if stack:
+                stack[-1].append(expression)
+            else:
+                statements += 1
+                yield expression
+
+        elif stack:
+
+            stack[-1].append(token)
+
+        else:
+            raise DescentError("Unexpected {} outside of a statement".format(kind))
+
+    if stack or statements == 0 or wrapped != closed:
+        raise DescentError("Unexpectedly reached end of file")
+
+
+class DescentParser(object):
+    """
+    Recursive-descent builder turning the s-expressions produced by read()
+    into Logicals for axioms, strings for imports and None for comments and
+    modules, like the grammar actions of the PLY engine.
+
+    :param Boolean preserve_conditionals, keep conditionals as is (True, default) or convert to disjunctions
+    """
+
+    def __init__(self, preserve_conditionals=True):
+
+        self.preserve_conditionals = preserve_conditionals
+
+    def parse(self, buff, emit=None):
+        """
+        Parse a string containing Common Logic text.
+
+        :param String buff, the text to be parsed
+        :param Function emit, if given, called with each top-level statement as soon as
+                              it is built; the statements are then not collected
+        :return List parsed_objects, Logicals for axioms and strings for imports
+        """
+
+        statements = []
+
+        for expression in read(scan(buff)):
+
+            statement = self.statement(expression)
+
+            if emit is None:
+                statements.append(statement)
+            elif statement is not None:
+                emit(statement)
+
+        return statements
+
+    def statement(self, expression):
+
+        kind = expression[0][0] if isinstance(expression[0], tuple) else None
+
+        if kind == 'IMPORT':
+            if len(expression) == 2 and expression[1][0] == 'URI':
+                return expression[1][1]
+
+        elif kind == 'CLCOMMENT':
+            if len(expression) == 2 and expression[1][0] == 'QUOTED_STRING':
+                return None
+
+        elif kind == 'CLMODULE':
+            if (len(expression) == 3 and expression[1][0] == 'NONLOGICAL'
+                    and isinstance(expression[2], list) and len(expression[2]) == 2
+                    and expression[2][0][0] == 'IMPORT' and expression[2][1][0] == 'URI'):
+                return None
+
+        else:
+            return self.axiom(expression)
+
+        raise DescentError("Malformed {} statement".format(kind))
+
+    def axiom(self, expression):
+
+        if not isinstance(expression, list) or not isinstance(expression[0], tuple):
+            raise DescentError("Expected a formula")
+
+        kind = expression[0][0]
+        length = len(expression)
+
+        if kind == 'NONLOGICAL' and length > 1:
+            return Predicate(expression[0][1], [self.term(x) for x in expression[1:]])
+
+        elif kind == 'NOT' and length == 2:
+            return Negation(self.axiom(expression[1]))
+
+        elif kind == 'AND' and length > 1:
+            return Conjunction([self.axiom(x) for x in expression[1:]])
+
+        elif kind == 'OR' and length > 1:
+            return Disjunction([self.axiom(x) for x in expression[1:]])
+
+        elif kind == 'IF' and length == 3:
+            antecedent = self.axiom(expression[1])
+            consequent = self.axiom(expression[2])
+            if self.preserve_conditionals:
+                return Implication([antecedent, consequent])
+            return Disjunction([Negation(antecedent), consequent])
+
+        elif kind == 'IFF' and length == 3:
+            left = self.axiom(expression[1])
+            right = self.axiom(expression[2])
+            if self.preserve_conditionals:
+                return Biconditional([left, right])
+            return Conjunction([Disjunction([Negation(left), right]),
+                                Disjunction([Negation(right), left])
+                               ])
+
+        elif kind == 'FORALL' and length == 3:
+            return Universal(self.variables(expression[1]), self.axiom(expression[2]))
+
+        elif kind == 'EXISTS' and length == 3:
+            return Existential(self.variables(expression[1]), self.axiom(expression[2]))
+
+        raise DescentError("Malformed {} formula".format(kind))
+
+    def variables(self, expression):
+
+        if not isinstance(expression, list):
+            raise DescentError("Expected a list of variables")
+
+        variables = []
+        for token in expression:
+            if not isinstance(token, tuple) or token[0] != 'NONLOGICAL':
+                raise DescentError("Expected a variable")
+            variables.append(token[1])
+
+        return variables
+
+    def term(self, expression):
+
+        if isinstance(expression, tuple):
+            if expression[0] == 'NONLOGICAL':
+                return expression[1]
+
+        elif isinstance(expression[0], tuple) and expression[0][0] == 'NONLOGICAL' and len(expression) > 1:
+            return Function(expression[0][1], [self.term(x) for x in expression[1:]])
+
+        raise DescentError("Expected a term")
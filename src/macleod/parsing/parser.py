@@ -1,12 +1,18 @@
+import copy
+import hashlib
 import logging
 import os
 import ply.lex as lex
 import ply.yacc as yacc
+import queue
 import re
+import sys
+import threading
 
 from pathlib import Path
 
 import macleod.Ontology
+from macleod.parsing.cache import (ParseCache, default_folder)
 from macleod.logical.connective import (Conjunction, Disjunction, Connective, Implication, Biconditional)
 from macleod.logical.logical import Logical
 from macleod.logical.negation import Negation
@@ -15,14 +21,24 @@ from macleod.logical.symbol import (Function, Predicate)
 
 LOGGER = logging.getLogger(__name__)
 
-global parser
-
-# Boolean switch to determine whether to maintain (True) or substitute (False) (bi)conditionals
-global conditionals
-
 class ParseError(Exception):
 	pass
 
+class StreamCancelled(Exception):
+    """
+    Raised inside a streaming parse to stop it once its consumer is gone
+    """
+    pass
+
+# Maximum number of parsed top-level statements waiting to be consumed by ClifParser.iter_parse()
+STREAM_BUFFER = 64
+
+# Number of characters read at a time when parsing from a file, see segments()
+STREAM_CHUNK = 1 << 16
+
+# Available parsing engines: the PLY grammar below and the hand-written engine in descent.py
+ENGINES = ['ply', 'descent']
+
 tokens = [
     "LPAREN",
     "RPAREN",
@@ -137,30 +153,31 @@ def p_ontology_error(p):
 
 def p_statement(p):
     """
-    statement : axiom statement
-    statement : import statement
-    statement : comment statement
-    statement : module statement
+    statement : statement axiom
+    statement : statement import
+    statement : statement comment
+    statement : statement module
     statement : axiom
     statement : import
     statement : comment
     statement : module
     """
 
+    # Left recursion: the statement list is reduced once per top-level statement and appended to in place
     if len(p) == 3:
-
-        statements = [p[1]]
-
-        if isinstance(p[2], list):
-            statements += p[2]
-        else:
-            statements.append(p[2])
-
-        p[0] = statements
-
+        statements = p[1]
+        item = p[2]
     else:
+        statements = []
+        item = p[1]
 
-        p[0] = [p[1]]
+    if p.parser.emit is None:
+        statements.append(item)
+    elif item is not None:
+        # Streaming parse: hand the statement over right away instead of collecting it
+        p.parser.emit(item)
+
+    p[0] = statements
 
 
 def p_comment(p):
@@ -264,20 +281,14 @@ def p_disjunction_error(p):
 
 def p_axiom_list(p):
     """
-    axiom_list : axiom axiom_list
+    axiom_list : axiom_list axiom
     axiom_list : axiom
     """
 
     if len(p) == 3:
 
-        axioms = [p[1]]
-
-        if isinstance(p[2], list):
-            axioms += p[2]
-        else:
-            axioms.append(p[2])
-
-        p[0] = axioms
+        p[1].append(p[2])
+        p[0] = p[1]
 
     else:
 
@@ -289,7 +300,7 @@ def p_implication(p):
     implication : LPAREN IF axiom axiom RPAREN
     """
 
-    if conditionals:
+    if p.parser.preserve_conditionals:
         p[0] = Implication([p[3], p[4]])
     else:
         p[0] = Disjunction([Negation(p[3]), p[4]])
@@ -311,7 +322,7 @@ def p_biconditional(p):
     biconditional : LPAREN IFF axiom axiom RPAREN
     """
 
-    if conditionals:
+    if p.parser.preserve_conditionals:
         p[0] = Biconditional([p[3], p[4]])
     else:
         p[0] = Conjunction([Disjunction([Negation(p[3]), p[4]]),
@@ -395,35 +406,20 @@ def p_predicate_error(p):
 
 def p_parameter(p):
     """
-    parameter : function parameter
-    parameter : nonlogicals parameter
+    parameter : parameter function
+    parameter : parameter NONLOGICAL
     parameter : function
-    parameter : nonlogicals
+    parameter : NONLOGICAL
     """
 
     if len(p) == 3:
 
-        if isinstance(p[1], list):
-            parameters = p[1]
-            if isinstance(p[2], list):
-                parameters += p[2]
-            else:
-                parameters.append(p[2])
-        else:
-            parameters = [p[1]]
-            if isinstance(p[2], list):
-                parameters += p[2]
-            else:
-                parameters.append(p[2])
-
-        p[0] = parameters
+        p[1].append(p[2])
+        p[0] = p[1]
 
     else:
 
-        if isinstance(p[1], list):
-            p[0] = p[1]
-        else:
-            p[0] = [p[1]]
+        p[0] = [p[1]]
 
 
 def p_function(p):
@@ -444,20 +440,14 @@ def p_function_error(p):
 
 def p_nonlogicals(p):
     """
-    nonlogicals : NONLOGICAL nonlogicals
+    nonlogicals : nonlogicals NONLOGICAL
     nonlogicals : NONLOGICAL
     """
 
     if len(p) == 3:
 
-        nonlogicals = [p[1]]
-
-        if isinstance(p[2], list):
-            nonlogicals += p[2]
-        else:
-            nonlogicals.append(p[2])
-
-        p[0] = nonlogicals
+        p[1].append(p[2])
+        p[0] = p[1]
 
     else:
 
@@ -466,18 +456,22 @@ def p_nonlogicals(p):
 
 def p_error(p):
 
-    global parser
-
     if p is None:
         raise TypeError("Unexpectedly reached end of file (EOF)")
 
-    # Note the location of the error before trying to lookahead
+    # The parser running this parse is attached to its lexer by ClifParser.parse
+    parser = p.lexer.parser
+
+    # Note the location of the error before trying to lookahead, which may move a StreamLexer on to the next piece of the text
     error_pos = p.lexpos
+    text = p.lexer.lexdata
+    error_line = getattr(p.lexer, 'lines_before', 0) + get_line_number(text, error_pos)
 
     # A little stack manipulation here to get everything we need
     stack = [symbol for symbol in parser.symstack][1:]
 
-    index_current_axiom = next((stack.index(x) for x in stack[::-1] if x.type == 'axiom'), len(stack))
+    # The preceding axioms of the text are on the stack as a single statement (a list), see p_statement
+    index_current_axiom = next((len(stack) - i for i, x in enumerate(stack[::-1]) if x.type in ('axiom', 'statement')), 0)
     current_axiom = stack[index_current_axiom:]
     current_axiom.append(p)
 
@@ -511,12 +505,11 @@ def p_error(p):
             for sub_token in raw_token:
                 axiom_string.append(sub_token + ' ')
 
-    string_up_to_error = p.lexer.lexdata[:error_pos]
     types = [symbol.type for symbol in stack]
     #logging.getLogger(__name__).error()
     print("""Error at line {}! in: {}""".format(
-        string_up_to_error.count("\n"),
-        p.lexer.lexdata))
+        error_line,
+        text))
 
     print("""Unexpected Token: '{}' :: "{}"\n{}""".format(
         p.value,
@@ -526,67 +519,438 @@ def p_error(p):
     return p
 
 
-def parse_file(path, sub, base, resolve=False, name=None, preserve_conditionals = True):
+# Starts of the tokens that may contain parentheses, see segments()
+UNSAFE = re.compile(r"/\*|'|" + t_URI.__doc__)
+
+
+def segments(f, size=None):
     """
-    Accepts a path to a Common Logic file and parses it to return an Ontology object.
+    Read a Common Logic text in pieces that end right after a parenthesis
+    outside of comments, quoted strings and URIs, so that each piece can be
+    lexed on its own. A token that does not end within a chunk (e.g. a very
+    long comment) makes the piece longer.
 
-    :param path, path to common logic file
-    :param sub, path component to be substituted
-    :param base, new path component
-    :param resolve, resolve imports?
-    :param name, for overriding the default naming
-    :param preserve_conditionals, keep conditionals as it (True, default) or convert to disjunctions
-    :return Ontology onto, newly constructed ontology object
+    :param File f, text file
+    :param int size, number of characters read at a time (STREAM_CHUNK by default)
+    :return Generator pieces, Strings that add up to the text
     """
 
-    path = os.path.normpath(os.path.join(base, path))
+    if size is None:
+        size = STREAM_CHUNK
 
-    if not os.path.isfile(path):
-        LOGGER.warning("Attempted to parse non-existent file: " + path)
-        return None
+    carry = ''
 
-    global parser
-    global conditionals
-    conditionals = preserve_conditionals
-    #if conditionals:
-    #    LOGGER.info("Preserving all conditionals")
-    #else:
-    #    LOGGER.info("Eliminating all conditionals")
+    while True:
 
-    ontology = macleod.Ontology(path, preserve_conditionals = conditionals)
+        chunk = f.read(size)
+        if not chunk:
+            if carry:
+                yield carry
+            return
 
-    if name is not None:
-        ontology.name = name
+        text = carry + chunk
+        cut = 0
+        pos = 0
 
+        while True:
+            match = UNSAFE.search(text, pos)
+            end = match.start() if match else len(text)
+            cut = max(cut, text.rfind('(', pos, end) + 1, text.rfind(')', pos, end) + 1)
 
-    with open(path, 'r') as f:
-        buff = f.read()
+            if match is None:
+                break
+            if match.group() == '/*':
+                found = text.find('*/', match.end())
+                pos = found + 2 if found >= 0 else -1
+            elif match.group() == "'":
+                found = text.find("'", match.end())
+                pos = found + 1 if found >= 0 else -1
+            else:
+                pos = match.end()
+
+            # The token may continue in the next chunk
+            if pos < 0 or pos == len(text):
+                break
+
+        if cut:
+            yield text[:cut]
+        carry = text[cut:]
+
+
+class StreamLexer(object):
+    """
+    Hands the pieces of a text file (see segments()) to a PLY lexer one after
+    the other, so that only the current piece of the text is held in memory.
+    The tokens refer to the PLY lexer and their positions to the current piece.
+    """
+
+    def __init__(self, lexer, f):
+
+        self.lexer = lexer
+        self.pieces = segments(f)
+
+        # Number of lines in the pieces before the current one, see p_error
+        self.lexer.lines_before = 0
+        self.lexer.input('')
+
+    def input(self, text):
+
+        raise ValueError("A StreamLexer reads its text from a file")
+
+    def token(self):
+
+        while True:
+            token = self.lexer.token()
+            if token is not None:
+                return token
+
+            piece = next(self.pieces, None)
+            if piece is None:
+                return None
 
-    if not buff:
-        return None
+            self.lexer.lines_before += self.lexer.lexdata.count('\n')
+            self.lexer.input(piece)
 
-    lex.lex(reflags=re.UNICODE)
-    parser = yacc.yacc()
 
-    parsed_objects = yacc.parse(buff)
+class Skipper(object):
+    """
+    Emit callback that drops the first statements and forwards the rest
+    """
+
+    def __init__(self, emit, count):
+
+        self.emit = emit
+        self.count = count
+
+    def __call__(self, statement):
+
+        if self.count > 0:
+            self.count -= 1
+        else:
+            self.emit(statement)
+
+
+class ClifParser(object):
+    """
+    Reentrant parser for Common Logic files. The lexer and the LALR tables are
+    built only once per process and shared by all instances; every call to
+    parse() works on its own clone of the lexer and its own parser state, so a
+    single ClifParser (or several of them) can be used from multiple threads.
+
+    The 'descent' engine is a faster hand-written alternative to the PLY
+    engine for well-formed input; it hands any text it cannot parse over to
+    the PLY engine, so syntax errors are reported the same way by both.
+
+    :param Boolean preserve_conditionals, keep conditionals as is (True, default) or convert to disjunctions
+    :param ParseCache cache, on-disk cache of parsed modules (None disables caching)
+    :param String engine, parsing engine, one of ENGINES ('ply' by default)
+    """
+
+    # Shared lexer and parser templates, see build_tables()
+    lexer = None
+    parser = None
+    lock = threading.Lock()
+
+    def __init__(self, preserve_conditionals=True, cache=None, engine='ply'):
+
+        if engine not in ENGINES:
+            raise ValueError("Unknown parsing engine '{}', expected one of {}".format(engine, ENGINES))
+
+        self.preserve_conditionals = preserve_conditionals
+        self.cache = cache
+        self.engine = engine
+
+        ClifParser.build_tables()
+
+    @classmethod
+    def build_tables(cls):
+        """
+        Build the lexer and the LALR tables if that has not happened yet in
+        this process. The tables are kept in the cache folder (see
+        cache.default_folder()) under a name derived from the grammar in this
+        module and the PLY version, so that later processes only need to load
+        them. A new table file is written under a private name and then renamed,
+        so that processes starting at the same time never read a partial file;
+        if the cache folder is not writable, the tables are only built in memory.
+        """
+
+        with cls.lock:
+
+            if cls.parser is None:
+
+                module = sys.modules[__name__]
+                cls.lexer = lex.lex(module=module, reflags=re.UNICODE)
+                cls.parser = cls.load_tables(module)
+
+    @staticmethod
+    def load_tables(module, folder=None):
+        """
+        Load the LALR tables of the grammar in module from folder (the cache folder by default), building them if necessary
+
+        :return LRParser, the parser template
+        """
+
+        with open(module.__file__, 'rb') as f:
+            digest = hashlib.sha256(f.read())
+        digest.update(yacc.__tabversion__.encode('utf-8'))
+
+        if folder is None:
+            folder = default_folder()
+        path = os.path.join(folder, 'parsetab-' + digest.hexdigest()[:16] + '.tables')
+
+        if os.path.isfile(path):
+            return yacc.yacc(module=module, debug=False, write_tables=False, picklefile=path)
+
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError:
+            pass
+
+        if not os.access(folder, os.W_OK):
+            LOGGER.debug("Cannot store the parse tables in " + folder)
+            return yacc.yacc(module=module, debug=False, write_tables=False)
+
+        temp_path = "{}.{}.{}".format(path, os.getpid(), threading.get_ident())
+        parser = yacc.yacc(module=module, debug=False, write_tables=False, picklefile=temp_path)
+
+        try:
+            os.replace(temp_path, path)
+        except OSError as e:
+            LOGGER.debug("Could not store the parse tables: " + str(e))
+
+        return parser
+
+    def parse(self, buff, emit=None):
+        """
+        Parse a string or a text file containing Common Logic text. The PLY engine
+        reads a file piece by piece (see StreamLexer), the descent engine reads it at once.
+
+        :param buff, the text to be parsed, a String or a text file
+        :param Function emit, if given, called with each top-level statement as soon as
+                              it is reduced; the statements are then not collected
+        :return List parsed_objects, Logicals for axioms and strings for imports
+        """
+
+        if self.engine == 'descent':
+
+            from macleod.parsing.descent import (DescentParser, DescentError)
+
+            # The descent engine works on the whole text
+            if not isinstance(buff, str):
+                buff = buff.read()
+
+            emitted = [0]
+
+            def forward(statement):
+                emitted[0] += 1
+                emit(statement)
+
+            try:
+                return DescentParser(self.preserve_conditionals).parse(buff, forward if emit else None)
+            except (DescentError, RecursionError) as e:
+                LOGGER.debug("Descent engine gave up ({}), parsing with PLY".format(e))
+
+            if emitted[0]:
+                # The statements before the error have been handed over already, don't repeat them
+                return self.parse_ply(buff, Skipper(emit, emitted[0]))
+
+        return self.parse_ply(buff, emit)
+
+    def parse_ply(self, buff, emit=None):
+        """
+        Parse a string or a text file containing Common Logic text with the PLY engine.
+        A file is read piece by piece, see StreamLexer.
+
+        :param buff, the text to be parsed, a String or a text file
+        :param Function emit, see parse()
+        :return List parsed_objects, Logicals for axioms and strings for imports
+        """
+
+        # Per-call copies keep the parsing state (token position, symbol stack) private
+        lexer = ClifParser.lexer.clone()
+        lexer.lineno = 1
+        lexer.lines_before = 0
+
+        parser = copy.copy(ClifParser.parser)
+        parser.preserve_conditionals = self.preserve_conditionals
+        parser.emit = emit
+        lexer.parser = parser
+
+        if not isinstance(buff, str):
+            return parser.parse(None, lexer=StreamLexer(lexer, buff))
+
+        return parser.parse(buff, lexer=lexer)
+
+    def iter_parse(self, buff):
+        """
+        Parse a string containing Common Logic text, yielding every top-level
+        statement (a Logical for an axiom, a string for an import) as soon as
+        it has been reduced. The parse runs in a background thread that is
+        never more than STREAM_BUFFER statements ahead of the consumer, so the
+        parsed objects of a large file never have to be held in memory at once,
+        nor does the text of a file with the PLY engine (see parse()).
+
+        :param buff, the text to be parsed, a String or a text file
+        :return Generator statements, Logicals and import strings in file order
+        """
+
+        statements = queue.Queue(maxsize=STREAM_BUFFER)
+        cancelled = threading.Event()
+        done = object()
+
+        def put(entry):
+            # Wait for room in the queue, but give up once the consumer is gone
+            while True:
+                if cancelled.is_set():
+                    raise StreamCancelled()
+                try:
+                    statements.put(entry, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def produce():
+            try:
+                self.parse(buff, lambda statement: put((statement, None)))
+                put((done, None))
+            except StreamCancelled:
+                pass
+            except Exception as e:
+                try:
+                    put((None, e))
+                except StreamCancelled:
+                    pass
+
+        producer = threading.Thread(target=produce, name="ClifParser.iter_parse", daemon=True)
+        producer.start()
+
+        try:
+            while True:
+                statement, error = statements.get()
+                if error is not None:
+                    raise error
+                if statement is done:
+                    break
+                yield statement
+        finally:
+            cancelled.set()
+            producer.join()
+
+    def parse_file(self, path, sub, base, resolve=False, name=None, parallel=False):
+        """
+        Accepts a path to a Common Logic file and parses it to return an Ontology object.
+
+        :param path, path to common logic file
+        :param sub, path component to be substituted
+        :param base, new path component
+        :param resolve, resolve imports?
+        :param name, for overriding the default naming
+        :param parallel, resolve imports on a pool of worker processes
+        :return Ontology onto, newly constructed ontology object
+        """
+
+        path = os.path.normpath(os.path.join(base, path))
+
+        if not os.path.isfile(path):
+            LOGGER.warning("Attempted to parse non-existent file: " + path)
+            return None
+
+        ontology = macleod.Ontology(path, basepath=(sub, base), preserve_conditionals=self.preserve_conditionals)
+
+        if name is not None:
+            ontology.name = name
+
+        with open(path, 'r') as f:
+            buff = f.read()
+
+        if not buff:
+            return None
+
+        ontology.basepath = (sub, base)
+        ontology.cache = self.cache
+        ontology.engine = self.engine
+
+        # Identifies the parsed module, e.g. for the caches of translations
+        key = ParseCache.key(buff, self.preserve_conditionals)
+
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.load(key)
+
+        if entry is not None:
+
+            # Unchanged module: reuse the already parsed and analyzed axioms
+            axioms, imports = entry
+
+            for axiom in axioms:
+                ontology.adopt_axiom(axiom)
+
+            for uri in imports:
+                ontology.add_import(uri)
 
-    ontology.basepath = (sub, base)
+        else:
+
+            parsed_objects = self.parse(buff)
+
+            for logical_thing in parsed_objects:
+
+                if isinstance(logical_thing, Logical):
 
-    for logical_thing in parsed_objects:
+                    ontology.add_axiom(logical_thing)
 
-        if isinstance(logical_thing, Logical):
+                elif isinstance(logical_thing, str):
 
-            ontology.add_axiom(logical_thing)
+                    ontology.add_import(logical_thing)
 
-        elif isinstance(logical_thing, str):
+            if self.cache is not None:
+                self.cache.store(key, ontology.axioms, list(ontology.imports))
 
-            ontology.add_import(logical_thing)
+        ontology.set_digest(key)
 
-    if resolve:
+        if resolve:
 
-        ontology.resolve_imports()
+            ontology.resolve_imports(parallel)
 
-    return ontology
+        return ontology
+
+
+def parse_file(path, sub, base, resolve=False, name=None, preserve_conditionals = True, parallel=False, cache=None, engine='ply'):
+    """
+    Accepts a path to a Common Logic file and parses it to return an Ontology object.
+
+    :param path, path to common logic file
+    :param sub, path component to be substituted
+    :param base, new path component
+    :param resolve, resolve imports?
+    :param name, for overriding the default naming
+    :param preserve_conditionals, keep conditionals as it (True, default) or convert to disjunctions
+    :param parallel, resolve imports on a pool of worker processes
+    :param cache, ParseCache to load unchanged modules from (None disables caching)
+    :param engine, parsing engine, 'ply' (default) or the faster 'descent'
+    :return Ontology onto, newly constructed ontology object
+    """
+
+    return ClifParser(preserve_conditionals, cache, engine).parse_file(path, sub, base, resolve, name, parallel)
+
+
+def iter_axioms(path, preserve_conditionals = True, engine='ply'):
+    """
+    Accepts a path to a Common Logic file and yields its sentences one by one as
+    soon as each has been parsed, without building an Ontology. Imports are
+    skipped. Suited for streaming very large files into a writer, e.g.
+    Axiom(logical).to_tptp() for every yielded sentence; with the PLY engine,
+    the file is also read piece by piece.
+
+    :param path, path to common logic file
+    :param preserve_conditionals, keep conditionals as it (True, default) or convert to disjunctions
+    :param engine, parsing engine, 'ply' (default) or the faster 'descent'
+    :return Generator logicals, the Logical of each top-level sentence
+    """
+
+    with open(path, 'r') as f:
+        for statement in ClifParser(preserve_conditionals, engine=engine).iter_parse(f):
+            if isinstance(statement, Logical):
+                yield statement
 
 
 def get_line_number(string, pos):
@@ -596,10 +960,6 @@ def get_line_number(string, pos):
 def is_error(obj):
     return isinstance(obj, yacc.YaccSymbol) and obj.type == "error"
 
-def reset_parser():
-    global parser
-    parser = None
-
 if __name__ == '__main__':
 
     LOGGER.error('This is not the module to be used directly for parsing a file. Instead, use scripts/parser.py to call the parser.')
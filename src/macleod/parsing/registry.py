@@ -0,0 +1,178 @@
+"""
+Registry of parsed modules shared between the ontologies of one process.
+
+Resolving the imports of an ontology looks up every imported module in a
+ModuleRegistry before parsing it, so that base theories imported by many
+ontologies are parsed once per process. To keep batch jobs from holding on to
+every module they ever parsed, the registry keeps only the most recently used
+modules alive (up to its capacity); older modules remain shared for as long as
+another ontology still imports them, through weak references.
+
+The registry of an ontology is either passed explicitly (Ontology.registry)
+or the one of the current context, see scope() and current().
+"""
+
+import collections
+import contextlib
+import contextvars
+import logging
+import weakref
+
+LOGGER = logging.getLogger(__name__)
+
+# Default number of modules that are kept alive by the registry
+DEFAULT_CAPACITY = 64
+
+
+class ModuleRegistry(object):
+    """
+    Parsed modules by key (see Ontology.module_key), with LRU eviction
+
+    :param int capacity, number of modules kept alive by the registry (None for no limit)
+
+    hits      -- lookups that found a parsed module
+    misses    -- lookups that did not
+    evictions -- modules the registry stopped keeping alive
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+
+        self.capacity = capacity
+
+        # Strongly referenced, most recently used last
+        self.recent = collections.OrderedDict()
+        # All modules that are still alive
+        self.modules = weakref.WeakValueDictionary()
+        # Modules that are being parsed, to recognize cyclic imports
+        self.pending = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Look up a parsed module and mark it as recently used
+
+        :return Ontology or None if the module is not (or no longer) in the registry
+        """
+
+        module = self.recent.get(key)
+        if module is None:
+            module = self.modules.get(key)
+
+        if module is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.keep(key, module)
+
+        return module
+
+    def is_pending(self, key):
+        """
+        :return Boolean, True if the module is being parsed, i.e. it is imported cyclically
+        """
+
+        return key in self.pending
+
+    def reserve(self, key):
+        """
+        Record that a module is being parsed
+        """
+
+        self.pending.add(key)
+
+    def put(self, key, module):
+        """
+        Add a parsed module, evicting the least recently used ones beyond the capacity
+        """
+
+        self.pending.discard(key)
+
+        if module is None:
+            return
+
+        self.modules[key] = module
+        self.keep(key, module)
+
+    def keep(self, key, module):
+
+        self.recent[key] = module
+        self.recent.move_to_end(key)
+
+        while self.capacity is not None and len(self.recent) > self.capacity:
+            evicted, _ = self.recent.popitem(last=False)
+            self.evictions += 1
+            LOGGER.debug("Evicted module " + repr(evicted) + " from the registry")
+
+    def discard(self, key):
+
+        self.pending.discard(key)
+        self.recent.pop(key, None)
+        self.modules.pop(key, None)
+
+    def clear(self):
+
+        self.recent.clear()
+        self.modules.clear()
+        self.pending.clear()
+
+    def __contains__(self, key):
+
+        return key in self.pending or key in self.recent or key in self.modules
+
+    def __len__(self):
+
+        return len(self.modules)
+
+    def statistics(self):
+        """
+        :return dict, numbers of hits, misses, evictions and of kept and alive modules
+        """
+
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'kept': len(self.recent),
+                'alive': len(self.modules)}
+
+    def __repr__(self):
+
+        return "ModuleRegistry({})".format(", ".join(["{}={}".format(k, v) for k, v in self.statistics().items()]))
+
+    @contextlib.contextmanager
+    def scope(self):
+        """
+        Make this the current registry within a with statement
+        """
+
+        token = CURRENT.set(self)
+        try:
+            yield self
+        finally:
+            CURRENT.reset(token)
+
+
+CURRENT = contextvars.ContextVar('macleod.parsing.registry', default=None)
+
+# Registry of the process, used outside of any scope
+default = None
+
+
+def current():
+    """
+    :return ModuleRegistry, the registry of the current scope or else the default registry of the process
+    """
+
+    global default
+
+    registry = CURRENT.get()
+
+    if registry is None:
+        if default is None:
+            default = ModuleRegistry()
+        registry = default
+
+    return registry
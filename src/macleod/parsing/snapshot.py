@@ -0,0 +1,519 @@
+"""
+Binary snapshots of parsed ontologies and their import closures.
+
+A snapshot stores everything that parsing and analyzing a closure produce, so
+that the closure can be rebuilt without parsing any CLIF text:
+
+- a table of all strings (names of symbols, variables, modules and imports)
+- the modules in topological order with their imports and the range of their axioms
+- the axioms as a flat array of hash-consed nodes (see node.py), every node
+  after its children, so that formulas shared between axioms are stored once
+- the root node of every axiom; its module follows from the ranges
+- the symbol table of the closure with the usage counts per module
+
+All numbers are 32-bit little-endian integers, kept in sections whose offsets
+are listed in the header:
+
+    magic (8 bytes), version, number of sections, then (offset, length) of every section as 64-bit integers
+
+A node is stored as its kind, the number of its symbol entries and the entries
+(the name of a predicate or function, the variables of a quantifier, the
+truth value of a conjunction or disjunction), then the number of its children
+and the children: the index of a node or -1 - the index of a string.
+
+By default load() materializes all axioms right away. With lazy=True the file
+is memory-mapped instead and the axioms are only built from their nodes when
+they are accessed, see SnapshotAxioms; the symbol table is available
+without building a single axiom.
+
+The analysis of each axiom (see Axiom.get_analysis) is not stored: it is built
+in one walk over the sentence, no slower than restoring it would be, and stays
+lazy as for parsed axioms.
+"""
+
+import array
+import collections.abc
+import logging
+import mmap
+import os
+import struct
+import sys
+
+import macleod.logical.symbol_table as Symbols
+from macleod.logical import node as Nodes
+
+LOGGER = logging.getLogger(__name__)
+
+MAGIC = b'MCLDSNAP'
+
+# Bump whenever the layout changes; older snapshots are rejected
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct('<8sII')
+SECTION = struct.Struct('<QQ')
+
+# Sections, in the order of the header
+STRINGS = 0
+META = 1
+MODULES = 2
+NODE_OFFSETS = 3
+NODES = 4
+AXIOMS = 5
+SYMBOLS = 6
+USAGE = 7
+SECTIONS = 8
+
+KINDS = [Nodes.FUNCTION, Nodes.PREDICATE, Nodes.NOT, Nodes.AND, Nodes.OR, Nodes.IF, Nodes.IFF, Nodes.FORALL, Nodes.EXISTS]
+KIND_CODES = dict((kind, code) for code, kind in enumerate(KINDS))
+
+TRUTH = [None, True, False]
+
+SYMBOL_KINDS = [Symbols.PREDICATE, Symbols.FUNCTION, Symbols.CONSTANT]
+
+# Native arrays are stored as they are on little-endian machines, swapped otherwise
+SWAP = sys.byteorder != 'little'
+
+
+class Strings(object):
+    '''
+    Indexes of the strings of a snapshot that is written
+    '''
+
+    def __init__(self):
+
+        self.ids = {}
+        self.strings = []
+
+    def __call__(self, string):
+
+        if string is None:
+            return -1
+
+        index = self.ids.get(string)
+        if index is None:
+            index = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+
+        return index
+
+
+def save(ontology, path):
+    '''
+    Write a snapshot of an ontology and, if its imports are resolved, of its import closure
+
+    :param Ontology ontology, the root of the snapshot
+    :param String path, the file to write
+    :return String path
+    '''
+
+    # The parser option of all modules, a global of macleod.Ontology (the package exports the class under that name)
+    conditionals = sys.modules['macleod.Ontology'].conditionals
+
+    closure = ontology.get_closure()
+    symbol_table = ontology.get_symbol_table()
+
+    strings = Strings()
+    positions = dict((id(module), position) for position, module in enumerate(closure.modules))
+
+    modules = array.array('i')
+    for position, module in enumerate(closure.modules):
+        sub, base = module.basepath
+        imports = [(uri, positions.get(id(imported), -1) if imported is not None else -1) for uri, imported in module.imports.items()]
+
+        modules.extend([strings(module.name), strings(closure.paths[position]), strings(sub), strings(base),
+                        int(module.resolve), strings(module.get_digest()), int(module.nontrivial),
+                        closure.offsets[position], closure.offsets[position + 1] - closure.offsets[position], len(imports)])
+        for uri, imported in imports:
+            modules.extend([strings(uri), imported])
+
+    nodes, offsets, roots = flatten([axiom.sentence.freeze() for axiom in closure.axioms], strings)
+
+    symbols = array.array('i')
+    for symbol, (name, arity, kind) in enumerate(symbol_table.symbols):
+        symbols.extend([strings(name), arity, SYMBOL_KINDS.index(kind),
+                        symbol_table.uses[symbol], symbol_table.positive[symbol], symbol_table.negative[symbol]])
+
+    paths = dict((name, position) for position, name in enumerate(closure.paths))
+    usage = array.array('i')
+    for module, counts in symbol_table.modules.items():
+        for symbol, (uses, positive, negative) in counts.items():
+            usage.extend([paths.get(module, -1), symbol, uses, positive, negative])
+
+    meta = array.array('i', [int(bool(conditionals)), int(closure.resolve), len(closure.modules), len(closure.axioms), len(offsets) - 1])
+
+    sections = [None] * SECTIONS
+    sections[STRINGS] = "\0".join(strings.strings).encode('utf-8')
+    sections[META] = meta
+    sections[MODULES] = modules
+    sections[NODE_OFFSETS] = offsets
+    sections[NODES] = nodes
+    sections[AXIOMS] = roots
+    sections[SYMBOLS] = symbols
+    sections[USAGE] = usage
+
+    data = [x if isinstance(x, bytes) else to_bytes(x) for x in sections]
+
+    position = HEADER.size + SECTION.size * SECTIONS
+    table = []
+    for section in data:
+        table.append(SECTION.pack(position, len(section)))
+        position += len(section)
+
+    temporary = "{}.{}.tmp".format(path, os.getpid())
+
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, SECTIONS))
+        f.write(b''.join(table))
+        for section in data:
+            f.write(section)
+
+    os.replace(temporary, path)
+
+    LOGGER.info("Saved {} axioms of {} modules ({} nodes) to {}".format(len(closure.axioms), len(closure.modules), len(offsets) - 1, path))
+
+    return path
+
+
+def flatten(sentences, strings):
+    '''
+    Number the distinct nodes of the sentences, every node after its children
+
+    :return (nodes, offsets, roots) arrays of the encoded nodes, the start
+            of each node in nodes and the index of the node of each sentence
+    '''
+
+    indexes = {}
+    nodes = array.array('i')
+    offsets = array.array('i')
+    roots = array.array('i')
+
+    for sentence in sentences:
+
+        stack = [(sentence, False)]
+
+        while stack:
+            current, expanded = stack.pop()
+
+            if id(current) in indexes:
+                continue
+
+            if not expanded:
+                stack.append((current, True))
+                stack.extend((x, False) for x in current.args if not isinstance(x, str) and id(x) not in indexes)
+                continue
+
+            indexes[id(current)] = len(offsets)
+            offsets.append(len(nodes))
+
+            kind = current.kind
+            if kind in (Nodes.FUNCTION, Nodes.PREDICATE):
+                symbol = [strings(current.symbol)]
+            elif kind in (Nodes.FORALL, Nodes.EXISTS):
+                symbol = [strings(x) for x in current.symbol]
+            elif kind in (Nodes.AND, Nodes.OR):
+                symbol = [TRUTH.index(current.symbol)]
+            else:
+                symbol = []
+
+            nodes.append(KIND_CODES[kind])
+            nodes.append(len(symbol))
+            nodes.extend(symbol)
+            nodes.append(len(current.args))
+            nodes.extend([-1 - strings(x) if isinstance(x, str) else indexes[id(x)] for x in current.args])
+
+        roots.append(indexes[id(sentence)])
+
+    offsets.append(len(nodes))
+
+    return nodes, offsets, roots
+
+
+def to_bytes(numbers):
+
+    if SWAP:
+        numbers = array.array('i', numbers)
+        numbers.byteswap()
+
+    return numbers.tobytes()
+
+
+class Snapshot(object):
+    '''
+    The sections of a snapshot file and the nodes and axioms built from them so far
+
+    :param String path, the snapshot file
+    :param Boolean lazy, memory-map the file instead of reading it
+    '''
+
+    def __init__(self, path, lazy=False):
+
+        self.path = path
+        self.mapped = None
+
+        with open(path, 'rb') as f:
+            if lazy and not SWAP:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                data = memoryview(self.mapped)
+            else:
+                data = memoryview(f.read())
+
+        if len(data) < HEADER.size:
+            raise ValueError("Not a macleod snapshot: " + path)
+
+        magic, version, count = HEADER.unpack_from(data, 0)
+
+        if magic != MAGIC:
+            raise ValueError("Not a macleod snapshot: " + path)
+        if version != SNAPSHOT_VERSION or count != SECTIONS:
+            raise ValueError("Unsupported version {} of the snapshot {}, expected version {}".format(version, path, SNAPSHOT_VERSION))
+
+        sections = []
+        for i in range(SECTIONS):
+            start, length = SECTION.unpack_from(data, HEADER.size + SECTION.size * i)
+            sections.append(data[start:start + length])
+
+        self.strings = [sys.intern(x) for x in bytes(sections[STRINGS]).decode('utf-8').split("\0")]
+
+        self.meta = numbers(sections[META])
+        self.modules = numbers(sections[MODULES])
+        self.symbols = numbers(sections[SYMBOLS])
+        self.usage = numbers(sections[USAGE])
+
+        # The bulk of the snapshot, only read as far as it is used when memory-mapped
+        self.offsets = numbers(sections[NODE_OFFSETS])
+        self.nodes = numbers(sections[NODES])
+        self.roots = numbers(sections[AXIOMS])
+
+        self.conditionals, self.resolve, self.module_count, self.axiom_count, self.node_count = self.meta[:5]
+
+        self.built_nodes = [None] * self.node_count
+        self.built_axioms = [None] * self.axiom_count
+
+    def node(self, index):
+        '''
+        :return Node, built together with all of its descendants not built yet
+        '''
+
+        built = self.built_nodes
+
+        if built[index] is not None:
+            return built[index]
+
+        # Children have smaller indexes, so building the missing nodes in increasing order builds every child first
+        missing = set()
+        stack = [index]
+        while stack:
+            current = stack.pop()
+            if current in missing:
+                continue
+            missing.add(current)
+            for child in self.children(current):
+                if child >= 0 and built[child] is None:
+                    stack.append(child)
+
+        for current in sorted(missing):
+            built[current] = self.build(current)
+
+        return built[index]
+
+    def children(self, index):
+
+        start = self.offsets[index]
+        symbols = self.nodes[start + 1]
+        count = self.nodes[start + 2 + symbols]
+
+        return self.nodes[start + 3 + symbols:start + 3 + symbols + count]
+
+    def build(self, index):
+
+        nodes = self.nodes
+        strings = self.strings
+        built = self.built_nodes
+
+        start = self.offsets[index]
+        kind = KINDS[nodes[start]]
+        count = nodes[start + 1]
+        entries = nodes[start + 2:start + 2 + count]
+
+        if kind in (Nodes.FUNCTION, Nodes.PREDICATE):
+            symbol = strings[entries[0]]
+        elif kind in (Nodes.FORALL, Nodes.EXISTS):
+            symbol = tuple([strings[x] for x in entries])
+        elif kind in (Nodes.AND, Nodes.OR):
+            symbol = TRUTH[entries[0]]
+        else:
+            symbol = None
+
+        args = tuple([strings[-1 - x] if x < 0 else built[x] for x in self.children(index)])
+
+        return Nodes.make(kind, symbol, args)
+
+    def axiom(self, index):
+        '''
+        :return Axiom, built on first access
+        '''
+
+        from macleod.logical.axiom import Axiom
+
+        axiom = self.built_axioms[index]
+
+        if axiom is None:
+            axiom = self.built_axioms[index] = Axiom(Nodes.thaw(self.node(self.roots[index])))
+
+        return axiom
+
+    def materialized(self):
+        '''
+        :return int, number of axioms built so far
+        '''
+
+        return sum(1 for x in self.built_axioms if x is not None)
+
+    def symbol_table(self, paths):
+        '''
+        :param List paths, the names of the modules, which the usage counts are kept by
+        :return SymbolTable
+        '''
+
+        table = Symbols.SymbolTable()
+        symbols = self.symbols
+
+        for start in range(0, len(symbols), 6):
+            name, arity, kind, uses, positive, negative = symbols[start:start + 6]
+            symbol = table.register(self.strings[name], arity, SYMBOL_KINDS[kind])
+            table.uses[symbol] = uses
+            table.positive[symbol] = positive
+            table.negative[symbol] = negative
+
+        usage = self.usage
+        for start in range(0, len(usage), 5):
+            module, symbol, uses, positive, negative = usage[start:start + 5]
+            table.modules.setdefault(paths[module] if module >= 0 else None, {})[symbol] = [uses, positive, negative]
+
+        return table
+
+
+def numbers(data):
+    '''
+    Integers of a section: a view of the memory-mapped file or a copy of the read bytes
+    '''
+
+    if isinstance(data.obj, mmap.mmap):
+        return data.cast('i')
+
+    result = array.array('i')
+    result.frombytes(data)
+    if SWAP:
+        result.byteswap()
+
+    return result
+
+
+class SnapshotAxioms(collections.abc.MutableSequence):
+    '''
+    List of axioms that are built from a snapshot only as they are accessed
+
+    items -- the axioms, as the index of the axiom in the snapshot until it is built
+    '''
+
+    def __init__(self, snapshot, start, stop):
+
+        self.snapshot = snapshot
+        self.items = list(range(start, stop))
+
+    def get(self, item):
+
+        return self.snapshot.axiom(item) if isinstance(item, int) else item
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [self.get(x) for x in self.items[index]]
+
+        return self.get(self.items[index])
+
+    def __setitem__(self, index, value):
+
+        self.items[index] = value
+
+    def __delitem__(self, index):
+
+        del self.items[index]
+
+    def __len__(self):
+
+        return len(self.items)
+
+    def insert(self, index, value):
+
+        self.items.insert(index, value)
+
+    def __repr__(self):
+
+        return "SnapshotAxioms({} of {} built)".format(sum(1 for x in self.items if not isinstance(x, int)), len(self.items))
+
+
+def load(path, lazy=False):
+    '''
+    Rebuild an ontology and its import closure from a snapshot
+
+    :param String path, the snapshot file
+    :param Boolean lazy, memory-map the file and build each axiom only when it is accessed
+    :return Ontology, the root of the snapshot
+    '''
+
+    # Cyclic imports are kind of painful in Python
+    from macleod.Ontology import ClosureIndex, Ontology
+
+    snapshot = Snapshot(path, lazy)
+    strings = snapshot.strings
+    data = snapshot.modules
+
+    modules = []
+    paths = []
+    offsets = []
+    imports = []
+    digests = []
+
+    def string(index):
+        return strings[index] if index >= 0 else None
+
+    position = 0
+    for _ in range(snapshot.module_count):
+        name, module_path, sub, base, resolve, digest, nontrivial, first, count, import_count = data[position:position + 10]
+        position += 10
+
+        module = Ontology(strings[name], basepath=(strings[sub], strings[base]), resolve=bool(resolve), preserve_conditionals=bool(snapshot.conditionals))
+        module.nontrivial = bool(nontrivial)
+
+        if lazy:
+            module.axioms = SnapshotAxioms(snapshot, first, first + count)
+        else:
+            module.axioms = [snapshot.axiom(i) for i in range(first, first + count)]
+
+        modules.append(module)
+        paths.append(strings[module_path])
+        offsets.append(first)
+        digests.append(string(digest))
+        imports.append([(strings[data[position + 2 * i]], data[position + 2 * i + 1]) for i in range(import_count)])
+        position += 2 * import_count
+
+    offsets.append(snapshot.axiom_count)
+
+    for module, module_imports, digest in zip(modules, imports, digests):
+        for uri, imported in module_imports:
+            module.imports[uri] = modules[imported] if imported >= 0 else None
+        if digest is not None:
+            module.set_digest(digest)
+
+    if lazy:
+        axioms = SnapshotAxioms(snapshot, 0, snapshot.axiom_count)
+    else:
+        axioms = [axiom for module in modules for axiom in module.axioms]
+
+    root = modules[0]
+    root.closure = ClosureIndex.restore(modules, paths, axioms, offsets, bool(snapshot.resolve), snapshot.symbol_table(paths))
+
+    LOGGER.info("Loaded {} axioms of {} modules from {}".format(snapshot.axiom_count, len(modules), path))
+
+    return root
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from macleod.logical.axiom import Axiom
+from macleod.logical.quantifier import Universal
+from macleod.logical.symbol import Predicate
+from macleod.parsing.cache import (FragmentCache, ParseCache, ResultCache, default_folder)
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+
+        self.folder.cleanup()
+
+    def test_key_depends_on_content_and_options(self):
+
+        self.assertEqual(ParseCache.key('(P x)', True), ParseCache.key('(P x)', True))
+        self.assertNotEqual(ParseCache.key('(P x)', True), ParseCache.key('(P x)', False))
+        self.assertNotEqual(ParseCache.key('(P x)', True), ParseCache.key('(P y)', True))
+
+    def test_default_folder(self):
+
+        # Without a configuration file the cache is in the macleod home directory
+        with mock.patch.object(Path, 'home', return_value=Path(self.folder.name)):
+            self.assertEqual(default_folder(), os.path.join(self.folder.name, 'macleod', 'cache'))
+
+            cache = ParseCache()
+            self.assertEqual(cache.folder, os.path.join(self.folder.name, 'macleod', 'cache'))
+            self.assertTrue(os.path.isdir(cache.folder))
+
+    def test_store_and_load(self):
+
+        cache = ParseCache(self.folder.name, 1)
+        axiom = Axiom(Universal(['x'], ~Predicate('A', ['x']) | Predicate('B', ['x'])))
+        key = ParseCache.key('text', True)
+
+        self.assertEqual(cache.load(key), None)
+        cache.store(key, [axiom], ['http://colore.oor.net/other.clif'])
+
+        axioms, imports = cache.load(key)
+        self.assertEqual(repr(axioms[0]), repr(axiom))
+        self.assertEqual(repr(axioms[0].unary()), repr(axiom.unary()))
+        self.assertEqual(imports, ['http://colore.oor.net/other.clif'])
+
+    def test_lru_eviction(self):
+
+        # Room for two entries of about 100KB each
+        cache = ParseCache(self.folder.name, 0.25)
+        payload = ['x' * 100000]
+
+        for name in ['one', 'two']:
+            cache.store(ParseCache.key(name, True), payload, [])
+            time.sleep(0.01)
+
+        # Using the oldest entry makes the other one the least recently used
+        cache.load(ParseCache.key('one', True))
+        cache.store(ParseCache.key('three', True), payload, [])
+
+        self.assertNotEqual(cache.load(ParseCache.key('one', True)), None)
+        self.assertEqual(cache.load(ParseCache.key('two', True)), None)
+        self.assertNotEqual(cache.load(ParseCache.key('three', True)), None)
+
+    def test_invalidate(self):
+
+        cache = ParseCache(self.folder.name, 1)
+        path = os.path.join(self.folder.name, 'module.clif')
+        with open(path, 'w') as f:
+            f.write('(P x)')
+
+        cache.store(ParseCache.key('(P x)', True), [], [])
+        cache.store(ParseCache.key('(Q x)', True), [], [])
+
+        self.assertEqual(cache.invalidate(path), 1)
+        self.assertEqual(cache.load(ParseCache.key('(P x)', True)), None)
+        self.assertEqual(cache.invalidate(), 1)
+        self.assertEqual(cache.entries(), [])
+
+    def test_fragments(self):
+
+        cache = ParseCache(self.folder.name, 1)
+        fragments = FragmentCache(self.folder.name, 1)
+
+        digest = ParseCache.key('(P x)', True)
+        self.assertNotEqual(FragmentCache.key(digest, 'tptp'), FragmentCache.key(digest, 'ladr'))
+
+        cache.store(digest, [], [])
+        fragments.store(FragmentCache.key(digest, 'tptp'), ['p(x)'])
+
+        self.assertEqual(fragments.load(FragmentCache.key(digest, 'tptp')), ['p(x)'])
+        self.assertEqual(fragments.load(FragmentCache.key(digest, 'ladr')), None)
+
+        # Both caches share the folder but not their entries
+        self.assertEqual(len(cache.entries()), 1)
+        self.assertEqual(len(fragments.entries()), 1)
+
+        path = os.path.join(self.folder.name, 'module.clif')
+        with open(path, 'w') as f:
+            f.write('(P x)')
+
+        self.assertEqual(fragments.invalidate(path), 1)
+        self.assertEqual(len(cache.entries()), 1)
+
+    def test_result_key(self):
+
+        path = os.path.join(self.folder.name, 'module.tptp')
+        with open(path, 'w') as f:
+            f.write('fof(a, axiom, p).')
+
+        key = ResultCache.key('vampire', ['vampire', '-t', '60', '--input_file', path], 2)
+
+        # Only the time limit at its position is left out
+        self.assertEqual(ResultCache.key('vampire', ['vampire', '-t', '10', '--input_file', path], 2), key)
+        self.assertNotEqual(ResultCache.key('vampire', ['vampire', '-t', '60', '--input_file', path], None), key)
+        self.assertNotEqual(ResultCache.key('mace4', ['mace4', '-t60', '-n60', path], 1),
+                            ResultCache.key('mace4', ['mace4', '-t60', '-n10', path], 1))
+
+        # The input file counts by its content
+        with open(path, 'w') as f:
+            f.write('fof(a, axiom, q).')
+
+        self.assertNotEqual(ResultCache.key('vampire', ['vampire', '-t', '60', '--input_file', path], 2), key)
+
+    def test_shared_size_limit(self):
+
+        # Room for two entries of about 100KB each, whichever cache they belong to
+        cache = ParseCache(self.folder.name, 0.25)
+        fragments = FragmentCache(self.folder.name, 0.25)
+        results = ResultCache(self.folder.name, 0.25)
+        payload = ['x' * 100000]
+
+        cache.store(ParseCache.key('one', True), payload, [])
+        time.sleep(0.01)
+        fragments.store(FragmentCache.key('one', 'tptp'), payload)
+        time.sleep(0.01)
+        results.store(ResultCache.key('mace4', ['mace4']), payload, True)
+
+        self.assertEqual(cache.entries(), [])
+        self.assertEqual(len(fragments.entries()) + len(results.entries()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import contextlib
+import io
+import random
+import re
+import unittest
+
+from macleod.parsing.descent import (DescentParser, DescentError)
+from macleod.parsing.parser import (ClifParser, ParseError)
+
+VALID = [
+    "(P x)",
+    "(forall (x) (P x))",
+    "/* leading comment */ (exists (x y) (and (P x) (Q y) (= x y)))",
+    "(cl-text http://colore.oor.net/test.clif (cl-imports http://colore.oor.net/other.clif) (P a))",
+    "(cl-comment 'a comment, with (parens) and = signs') (not (P x))",
+    "(cl-module M (cl-imports http://colore.oor.net/m.clif)) (R (f x (g y)) z)",
+    "(forall (x y) (if (and (P x y) (P y x)) (= x y)))",
+    "(forall (x) (iff (Q x) (or (P x) (exists (y) (R x y)))))",
+    "(<= x y) (>= (f x) y) (< a b) (> a b)",
+]
+
+INVALID = [
+    "",
+    "(P)",
+    "(P x",
+    "(P x))",
+    "(forall (x) (P x) (Q x))",
+    "(forall x (P x))",
+    "(exists (x) )",
+    "(and)",
+    "(if (P x))",
+    "(iff (P x) (Q x) (R x))",
+    "(not (P x) (Q x))",
+    "(cl-imports notauri)",
+    "(cl-comment missing quotes)",
+    "(cl-module M)",
+    "(cl-text http://colore.oor.net/test.clif)",
+    "(P x) /* late comment */",
+    "(P 'quoted')",
+    "(P x) ? (Q x)",
+    "((P x))",
+    "(P (and x))",
+]
+
+
+def random_term(rng, depth):
+
+    if depth <= 0 or rng.random() < 0.6:
+        return rng.choice(["x", "y", "z", "a1"])
+
+    return "(f{} {})".format(rng.randint(0, 2),
+                             " ".join(random_term(rng, depth - 1) for _ in range(rng.randint(1, 3))))
+
+
+def random_formula(rng, depth):
+
+    if depth <= 0 or rng.random() < 0.25:
+        return "(P{} {})".format(rng.randint(0, 3),
+                                 " ".join(random_term(rng, 2) for _ in range(rng.randint(1, 3))))
+
+    kind = rng.choice(['not', 'and', 'or', 'if', 'iff', 'forall', 'exists'])
+
+    if kind == 'not':
+        return "(not {})".format(random_formula(rng, depth - 1))
+    elif kind in ('and', 'or'):
+        return "({} {})".format(kind, " ".join(random_formula(rng, depth - 1) for _ in range(rng.randint(1, 4))))
+    elif kind in ('if', 'iff'):
+        return "({} {} {})".format(kind, random_formula(rng, depth - 1), random_formula(rng, depth - 1))
+    else:
+        return "({} ({}) {})".format(kind, " ".join(rng.sample(["x", "y", "z"], rng.randint(1, 3))),
+                                     random_formula(rng, depth - 1))
+
+
+def outcome(engine, text, preserve_conditionals=True):
+    """
+    Everything observable about a parse: the result or the raised error, and the printed output
+    """
+
+    # Building the first parser may read the configuration, which starts logging
+    parser = ClifParser(preserve_conditionals, engine=engine)
+    output = io.StringIO()
+
+    with contextlib.redirect_stdout(output):
+        try:
+            result = ('result', [repr(x) for x in parser.parse(text)])
+        except (TypeError, ParseError) as e:
+            # Some messages contain the address of a PLY object
+            result = (type(e), re.sub(r' at 0x[0-9a-f]+', '', str(e)))
+
+    return result, output.getvalue()
+
+
+class DescentTest(unittest.TestCase):
+
+    def assertSameOutcome(self, text, preserve_conditionals=True):
+
+        self.assertEqual(outcome('descent', text, preserve_conditionals),
+                         outcome('ply', text, preserve_conditionals),
+                         text)
+
+    def test_valid(self):
+
+        for text in VALID:
+            DescentParser().parse(text)
+            self.assertSameOutcome(text)
+            self.assertSameOutcome(text, preserve_conditionals=False)
+
+    def test_random_formulas(self):
+
+        rng = random.Random(1)
+
+        for _ in range(200):
+            text = "\n".join(random_formula(rng, 5) for _ in range(3))
+            self.assertSameOutcome(text)
+            self.assertSameOutcome(text, preserve_conditionals=False)
+
+    def test_invalid(self):
+
+        for text in INVALID:
+            with self.assertRaises(DescentError):
+                DescentParser().parse(text)
+            self.assertSameOutcome(text)
+
+    def test_streaming_fallback(self):
+
+        text = "(P x) (Q y) (R z"
+        ply = ClifParser(engine='ply')
+        descent = ClifParser(engine='descent')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+
+            emitted = []
+            with self.assertRaises(TypeError):
+                descent.parse(text, emitted.append)
+
+            expected = []
+            with self.assertRaises(TypeError):
+                ply.parse(text, expected.append)
+
+        self.assertEqual([repr(x) for x in emitted], [repr(x) for x in expected])
+
+    def test_unknown_engine(self):
+
+        with self.assertRaises(ValueError):
+            ClifParser(engine='antlr')
+
+if __name__ == '__main__':
+    unittest.main()
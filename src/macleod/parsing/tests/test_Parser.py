@@ -0,0 +1,159 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+import macleod.parsing.parser as Parser
+from macleod.logical.connective import (Conjunction, Disjunction, Implication, Biconditional)
+from macleod.parsing.parser import ClifParser, iter_axioms
+
+TEXT = """
+(cl-text http://colore.oor.net/test.clif
+(cl-imports http://colore.oor.net/other.clif)
+(cl-comment 'transitivity')
+(forall (x y z) (if (and (P x y) (P y z)) (P x z)))
+(forall (x) (iff (Q x) (exists (y) (P x y))))
+)
+"""
+
+class ParserTest(unittest.TestCase):
+
+    def test_parse_statements(self):
+
+        parsed = ClifParser().parse(TEXT)
+
+        self.assertEqual(parsed[0], 'http://colore.oor.net/other.clif')
+        self.assertEqual(parsed[1], None)
+        self.assertEqual(len(parsed), 4)
+        self.assertTrue(isinstance(parsed[2].terms[0], Implication))
+        self.assertTrue(isinstance(parsed[3].terms[0], Biconditional))
+
+    def test_preserve_conditionals_per_instance(self):
+
+        preserving = ClifParser(preserve_conditionals=True)
+        eliminating = ClifParser(preserve_conditionals=False)
+
+        self.assertTrue(isinstance(eliminating.parse(TEXT)[2].terms[0], Disjunction))
+        self.assertTrue(isinstance(preserving.parse(TEXT)[2].terms[0], Implication))
+        self.assertTrue(isinstance(eliminating.parse(TEXT)[3].terms[0], Conjunction))
+
+    def test_parse_from_threads(self):
+
+        parser = ClifParser(preserve_conditionals=False)
+        expected = [repr(x) for x in parser.parse(TEXT)]
+        results = []
+
+        def work():
+            for _ in range(10):
+                results.append([repr(x) for x in parser.parse(TEXT)])
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 40)
+        self.assertTrue(all(result == expected for result in results))
+
+    def test_tables(self):
+
+        module = sys.modules[ClifParser.__module__]
+
+        with tempfile.TemporaryDirectory() as folder:
+
+            built = ClifParser.load_tables(module, folder)
+            [tables] = os.listdir(folder)
+            self.assertTrue(tables.endswith('.tables'))
+
+            # A later process loads the stored tables instead of building them again
+            loaded = ClifParser.load_tables(module, folder)
+            self.assertEqual(loaded.action, built.action)
+            self.assertEqual(os.listdir(folder), [tables])
+
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(module.__file__), 'parsetab.py')))
+
+    def test_syntax_error(self):
+
+        with self.assertRaises(TypeError):
+            ClifParser().parse("(forall (x) (P x) (Q x)))")
+
+    def test_syntax_error_report(self):
+
+        text = "\n".join(["(cl-text http://x/err.clif",
+                          "(forall (x) (if (A x) (B x)))",
+                          "(forall (x y) (if (R x y) (R y x)))",
+                          "(forall x (if (B x) (C x)))",
+                          "(forall (x) (if (C x) (E x)))",
+                          ")"])
+
+        for chunk in [None, 16]:
+            report = io.StringIO()
+            with unittest.mock.patch.object(Parser, 'STREAM_CHUNK', chunk or Parser.STREAM_CHUNK):
+                with self.assertRaises(TypeError), contextlib.redirect_stdout(report):
+                    ClifParser().parse(io.StringIO(text))
+
+            # The whole axiom around the unexpected token is reported, not only the token
+            self.assertIn("Error at line 4!", report.getvalue())
+            self.assertIn('"( forall x\u0332 ( if ( B x ) ( C x ) ) ) "', report.getvalue())
+
+    def test_segments(self):
+
+        text = "/* (a) */ (cl-text http://x/(a).clif (cl-comment 'b (c) d') (forall (x) (P x)))" * 3
+        pieces = list(Parser.segments(io.StringIO(text), size=7))
+
+        self.assertEqual(''.join(pieces), text)
+        self.assertGreater(len(pieces), 3)
+
+        ClifParser.build_tables()
+
+        def tokens(text):
+            lexer = ClifParser.lexer.clone()
+            lexer.input(text)
+            return [(x.type, x.value) for x in iter(lexer.token, None)]
+
+        self.assertEqual([x for piece in pieces for x in tokens(piece)], tokens(text))
+
+    def test_iter_parse(self):
+
+        parser = ClifParser()
+        expected = [repr(x) for x in parser.parse(TEXT) if x is not None]
+
+        self.assertEqual([repr(x) for x in parser.iter_parse(TEXT)], expected)
+
+    def test_iter_parse_closed_early(self):
+
+        text = "\n".join("(forall (x) (P{} x))".format(i) for i in range(500))
+        statements = ClifParser().iter_parse(text)
+
+        self.assertEqual(repr(next(statements)), repr(ClifParser().parse(text)[0]))
+        statements.close()
+
+    def test_iter_parse_syntax_error(self):
+
+        with self.assertRaises(TypeError):
+            list(ClifParser().iter_parse("(forall (x) (P x) (Q x)))"))
+
+    def test_iter_axioms(self):
+
+        with tempfile.NamedTemporaryFile('w', suffix='.clif', delete=False) as f:
+            f.write(TEXT)
+
+        try:
+            logicals = list(iter_axioms(f.name, preserve_conditionals=False))
+            # The file is read in pieces
+            with unittest.mock.patch.object(Parser, 'STREAM_CHUNK', 8):
+                pieces = list(iter_axioms(f.name, preserve_conditionals=False))
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(len(logicals), 2)
+        self.assertTrue(isinstance(logicals[0].terms[0], Disjunction))
+        self.assertEqual([repr(x) for x in pieces], [repr(x) for x in logicals])
+
+if __name__ == '__main__':
+    unittest.main()
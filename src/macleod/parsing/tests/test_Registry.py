@@ -0,0 +1,78 @@
+import gc
+import unittest
+
+import macleod.parsing.registry as Registry
+from macleod.parsing.registry import ModuleRegistry
+
+class Module(object):
+    '''
+    Stand-in for a parsed Ontology
+    '''
+
+    def __init__(self, name):
+
+        self.name = name
+
+class RegistryTest(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+
+        registry = ModuleRegistry()
+        one = Module('one')
+
+        self.assertIsNone(registry.get('one'))
+
+        registry.reserve('one')
+        self.assertTrue(registry.is_pending('one'))
+        self.assertIn('one', registry)
+
+        registry.put('one', one)
+        self.assertFalse(registry.is_pending('one'))
+        self.assertIs(registry.get('one'), one)
+
+        self.assertEqual(registry.statistics(), {'hits': 1, 'misses': 1, 'evictions': 0, 'kept': 1, 'alive': 1})
+
+        # A module that could not be parsed
+        registry.reserve('two')
+        registry.discard('two')
+        self.assertNotIn('two', registry)
+
+    def test_capacity(self):
+
+        registry = ModuleRegistry(capacity=2)
+        modules = dict((name, Module(name)) for name in ['one', 'two', 'three'])
+
+        registry.put('one', modules['one'])
+        registry.put('two', modules['two'])
+        registry.get('one')
+        registry.put('three', modules['three'])
+
+        # The least recently used module is no longer kept alive, but still shared while in use
+        self.assertEqual(list(registry.recent), ['one', 'three'])
+        self.assertEqual(registry.evictions, 1)
+        self.assertIs(registry.get('two'), modules['two'])
+
+        del modules
+        gc.collect()
+
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(registry.statistics()['kept'], 2)
+
+    def test_scope(self):
+
+        registry = ModuleRegistry()
+
+        self.assertIsNot(Registry.current(), registry)
+
+        with registry.scope():
+            self.assertIs(Registry.current(), registry)
+            with ModuleRegistry().scope() as inner:
+                self.assertIs(Registry.current(), inner)
+            self.assertIs(Registry.current(), registry)
+
+        self.assertIs(Registry.current(), Registry.current())
+        self.assertIsNot(Registry.current(), registry)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+import macleod.logical.symbol_table as Symbols
+import macleod.parsing.parser as Parser
+import macleod.parsing.snapshot as Snapshot
+from macleod.Ontology import Ontology
+from macleod.parsing.registry import ModuleRegistry
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+        self.write('b.clif', '(cl-imports http://x/c.clif) (forall (x) (if (B x) (exists (y) (R x y))))')
+        self.write('c.clif', '(forall (x) (if (B x) (C x))) (C a)')
+        path = self.write('a.clif', '(cl-imports http://x/b.clif) (forall (x) (if (A x) (B x))) (not (A (f a)))')
+
+        with ModuleRegistry().scope():
+            self.ontology = Parser.parse_file(path, 'http://x/', self.folder + os.sep, resolve=True)
+
+        self.snapshot = os.path.join(self.folder, 'a.snapshot')
+        self.ontology.save_snapshot(self.snapshot)
+
+    def write(self, name, text):
+
+        path = os.path.join(self.folder, name)
+
+        with open(path, 'w') as f:
+            f.write('(cl-text http://x/{} {})'.format(name, text))
+
+        return path
+
+    def test_load(self):
+
+        loaded = Ontology.load_snapshot(self.snapshot)
+        closure = loaded.get_closure()
+        original = self.ontology.get_closure()
+
+        self.assertEqual(loaded.name, self.ontology.name)
+        self.assertEqual(closure.paths, original.paths)
+        self.assertEqual([repr(x) for x in closure.axioms], [repr(x) for x in original.axioms])
+        self.assertEqual(list(closure.offsets), list(original.offsets))
+
+        # The imports are restored between the loaded modules
+        self.assertIs(loaded.imports['http://x/b.clif'], closure.modules[1])
+
+        table = loaded.get_symbol_table()
+        b = table.lookup('B', 1, Symbols.PREDICATE)
+        self.assertEqual(table.usage(b), self.ontology.get_symbol_table().usage(b))
+        self.assertEqual(table.usage(b, 'http://x/c.clif'), self.ontology.get_symbol_table().usage(b, 'http://x/c.clif'))
+        self.assertEqual(table.overlap(Symbols.FUNCTION, Symbols.CONSTANT), set())
+
+        self.assertEqual(loaded.to_tptp(), self.ontology.to_tptp())
+
+    def test_lazy(self):
+
+        loaded = Ontology.load_snapshot(self.snapshot, lazy=True)
+        closure = loaded.get_closure()
+        snapshot = closure.axioms.snapshot
+
+        # The symbol table does not need any axiom
+        self.assertEqual(len(loaded.get_symbol_table().predicates()), 4)
+        self.assertEqual(len(closure.axioms), 5)
+        self.assertEqual(snapshot.materialized(), 0)
+
+        self.assertEqual(repr(closure.axioms[-1]), repr(self.ontology.get_closure().axioms[-1]))
+        self.assertEqual(snapshot.materialized(), 1)
+
+        # The modules share the axioms built for the closure
+        self.assertIs(closure.module_axioms(2)[-1], closure.axioms[-1])
+
+        self.assertEqual(loaded.to_tptp(), self.ontology.to_tptp())
+        self.assertEqual(snapshot.materialized(), 5)
+
+    def test_version(self):
+
+        with open(self.snapshot, 'r+b') as f:
+            f.seek(8)
+            f.write(b'\xff')
+
+        with self.assertRaises(ValueError):
+            Snapshot.load(self.snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import macleod.parsing.parser as Parser
+from macleod.parsing.registry import ModuleRegistry
+from macleod.parsing.watch import Watcher
+
+class WatchTest(unittest.TestCase):
+
+    def setUp(self):
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def write(self, name, text):
+
+        path = os.path.join(self.folder, name)
+
+        with open(path, 'w') as f:
+            f.write('(cl-text http://x/{} {})'.format(name, text))
+
+        # Make sure the change is noticed even on file systems with coarse timestamps
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        return path
+
+    def test_update(self):
+
+        a = self.write('a.clif', '(cl-imports http://x/b.clif) (forall (x) (A x))')
+        b = self.write('b.clif', '(cl-imports http://x/c.clif) (forall (x) (B x))')
+        self.write('c.clif', '(forall (x) (C x))')
+        d = self.write('d.clif', '(forall (x) (D x))')
+
+        watcher = Watcher(ModuleRegistry())
+
+        with watcher.registry.scope():
+            first = Parser.parse_file(a, 'http://x/', self.folder + os.sep, resolve=True)
+            second = Parser.parse_file(d, 'http://x/', self.folder + os.sep, resolve=True)
+
+        watcher.watch(first)
+        watcher.watch(second)
+
+        self.assertEqual(len(watcher.stamps), 4)
+        self.assertEqual(watcher.poll(), [])
+
+        c_module = first.get_closure().modules[-1]
+        first.to_tptp()
+
+        # Only the changed module is parsed again, and only the ontology importing it is affected
+        self.write('b.clif', '(cl-imports http://x/c.clif) (forall (x) (E x))')
+        self.assertEqual(watcher.poll(), [b])
+        self.assertEqual(watcher.update(watcher.poll()), [first])
+        self.assertEqual(watcher.poll(), [])
+
+        self.assertIsNone(first.tptp_output)
+        self.assertEqual([repr(x) for x, _ in first.get_all_axioms()], ['\\forall x\\;[A(x)]', '\\forall x\\;[E(x)]', '\\forall x\\;[C(x)]'])
+        self.assertIs(first.get_closure().modules[-1], c_module)
+
+        # A watched ontology that changes is parsed again
+        self.write('d.clif', '(cl-imports http://x/c.clif) (forall (x) (F x))')
+        updated = watcher.update(watcher.poll())
+        self.assertEqual([x.name for x in updated], [d])
+        self.assertIsNot(updated[0], second)
+        self.assertIs(watcher.ontologies[1], updated[0])
+        self.assertIs(updated[0].get_closure().modules[-1], c_module)
+        self.assertEqual(len(watcher.stamps), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
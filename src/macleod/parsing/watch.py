@@ -0,0 +1,208 @@
+"""
+Watching the files of parsed ontologies for changes.
+
+A Watcher polls the files of the import closures of the ontologies it
+watches. A changed module is parsed again on its own (its imports are reused
+through the ModuleRegistry) and takes the place of the old module in the
+imports of every module of the watched closures that imported it. This
+invalidates the closure indexes (see Ontology.get_closure) of exactly the
+ontologies whose closure includes the module, so that only their
+translations and checks need to be redone. A watched ontology whose own file
+changed is parsed again, with its imports from the registry.
+
+Files are polled by their modification time and size, which works on every
+platform and file system (including network shares, where inotify and the
+like do not report changes).
+"""
+
+import logging
+import os
+import time
+
+import macleod.parsing.registry
+
+LOGGER = logging.getLogger(__name__)
+
+# Default number of seconds between two polls
+DEFAULT_INTERVAL = 1.0
+
+
+class Watcher(object):
+    """
+    Keeps parsed ontologies and their import closures up to date with their files
+
+    :param ModuleRegistry registry, the registry the imports are shared
+           through (the one of the current context by default)
+    :param float interval, number of seconds between two polls in run()
+    :param Boolean preserve_conditionals, parser option for the watched ontologies
+
+    ontologies -- the watched ontologies, updated as they are parsed again
+    stamps     -- (modification time, size) of every watched file, None for missing files
+    """
+
+    def __init__(self, registry=None, interval=DEFAULT_INTERVAL, preserve_conditionals=True):
+
+        self.registry = registry if registry is not None else macleod.parsing.registry.current()
+        self.interval = interval
+        self.preserve_conditionals = preserve_conditionals
+
+        self.ontologies = []
+        self.stamps = {}
+
+    def watch(self, ontology):
+        """
+        Start watching an ontology and the modules of its closure
+        """
+
+        self.ontologies.append(ontology)
+        self.scan()
+
+    def modules(self):
+        """
+        :return List of (module, importing modules) of the closures of all
+                watched ontologies, with every module once
+        """
+
+        modules = {}
+        importers = {}
+
+        for ontology in self.ontologies:
+            for module in ontology.get_closure().modules:
+                modules[id(module)] = module
+                for imported in module.imports.values():
+                    if imported is not None:
+                        importers.setdefault(id(imported), []).append(module)
+
+        return [(module, importers.get(key, [])) for key, module in modules.items()]
+
+    def scan(self):
+        """
+        Record the current state of the files of all watched modules
+        """
+
+        self.stamps = dict((module.name, stamp(module.name)) for module, _ in self.modules())
+
+    def poll(self):
+        """
+        :return List of the names of the watched files that changed since the last scan
+        """
+
+        return [name for name, last in self.stamps.items() if stamp(name) != last]
+
+    def update(self, names):
+        """
+        Parse the changed files again and replace their modules
+
+        :param List names, the changed files (see poll())
+        :return List of the watched ontologies whose closure changed, in the
+                order they are watched
+        """
+
+        # Cyclic imports are kind of painful in Python
+        import macleod.parsing.parser as Parser
+
+        if not names:
+            return []
+
+        changed = set(names)
+        modules = self.modules()
+        closures = [set(id(x) for x in ontology.get_closure().modules) for ontology in self.ontologies]
+        affected = set()
+
+        with self.registry.scope():
+
+            for module, importers in modules:
+
+                if module.name not in changed:
+                    continue
+
+                LOGGER.info("Parsing changed module " + module.name)
+
+                sub, base = module.basepath
+
+                try:
+                    new_module = Parser.parse_file(module.name, sub, base, module.resolve, preserve_conditionals=self.conditionals(module, importers),
+                                                   cache=module.cache, engine=module.engine)
+                except TypeError as e:
+                    LOGGER.error("Error parsing " + module.name + ": " + str(e))
+                    continue
+
+                if new_module is None:
+                    LOGGER.error("Could not parse changed module " + module.name)
+                    continue
+
+                new_module.basepath = module.basepath
+                new_module.fragments = module.fragments
+
+                # Every module that imported the old module imports the new one instead
+                for importer in importers:
+                    for path, imported in importer.imports.items():
+                        if imported is module:
+                            importer.imports[path] = new_module
+                            importer.changed()
+                            self.registry.put(importer.module_key(path), new_module)
+
+                for position, ontology in enumerate(self.ontologies):
+                    if ontology is module:
+                        self.ontologies[position] = new_module
+                        affected.add(position)
+                    elif id(module) in closures[position]:
+                        affected.add(position)
+
+        result = [ontology for position, ontology in enumerate(self.ontologies) if position in affected]
+
+        for ontology in result:
+            # Translations of the old closure are out of date
+            ontology.forget_translations()
+
+        self.scan()
+
+        return result
+
+    def conditionals(self, module, importers):
+        """
+        :return Boolean, whether the module was parsed preserving conditionals (see Ontology.module_key)
+        """
+
+        for importer in importers:
+            for path, imported in importer.imports.items():
+                if imported is module:
+                    return importer.module_key(path)[1]
+
+        return self.preserve_conditionals
+
+    def run(self, callback):
+        """
+        Poll the files until interrupted and call callback(ontology) for
+        every watched ontology whose closure changed, within the scope of
+        the registry
+        """
+
+        LOGGER.info("Watching {} files, press Ctrl+C to stop".format(len(self.stamps)))
+
+        try:
+            while True:
+                time.sleep(self.interval)
+                for ontology in self.update(self.poll()):
+                    try:
+                        with self.registry.scope():
+                            callback(ontology)
+                    except (Exception, SystemExit) as e:
+                        # The scripts exit on errors, which should not end watching
+                        LOGGER.error("Could not process " + ontology.name + ": " + repr(e))
+        except KeyboardInterrupt:
+            LOGGER.info("Stopped watching")
+
+
+def stamp(name):
+    """
+    :return (modification time, size) of a file, None if it does not exist
+    """
+
+    try:
+        result = os.stat(name)
+    except OSError:
+        return None
+
+    return (result.st_mtime_ns, result.st_size)
+
@@ -0,0 +1,85 @@
+import argparse
+import logging
+import random
+import sys
+import timeit
+
+LOGGER = logging.getLogger(__name__)
+
+from macleod.parsing.descent import (scan, read)
+from macleod.parsing.parser import (ClifParser, ENGINES)
+
+def generate_text(axioms, seed=0):
+    '''
+    Generate a large Common Logic text of random, well-formed axioms
+    '''
+
+    rng = random.Random(seed)
+
+    def term(depth):
+        if depth <= 0 or rng.random() < 0.7:
+            return rng.choice(['x', 'y', 'z', 'w'])
+        return '(f{} {})'.format(rng.randint(0, 9), ' '.join(term(depth - 1) for _ in range(rng.randint(1, 2))))
+
+    def formula(depth):
+        if depth <= 0 or rng.random() < 0.2:
+            return '(P{} {})'.format(rng.randint(0, 49), ' '.join(term(2) for _ in range(rng.randint(1, 3))))
+        kind = rng.choice(['not', 'and', 'or', 'if', 'iff'])
+        if kind == 'not':
+            return '(not {})'.format(formula(depth - 1))
+        if kind in ('and', 'or'):
+            return '({} {})'.format(kind, ' '.join(formula(depth - 1) for _ in range(rng.randint(2, 4))))
+        return '({} {} {})'.format(kind, formula(depth - 1), formula(depth - 1))
+
+    lines = ['(forall (x y z w) {})'.format(formula(4)) for _ in range(axioms)]
+
+    return '(cl-text http://colore.oor.net/benchmark.clif\n' + '\n'.join(lines) + '\n)\n'
+
+
+def main():
+    '''
+    Compare the speed of the parsing engines on a large Common Logic text
+    '''
+
+    LOGGER.info('Called script benchmark_parser')
+    # Setup the command line arguments to the program
+    parser = argparse.ArgumentParser(description='Compare the parsing engines on Common Logic Interchange Format (.clif) text.')
+
+    optionalArguments = parser.add_argument_group('optional arguments')
+    optionalArguments.add_argument('-f', '--file', type=str, help='Clif file to parse (a random text is generated otherwise)', default=None)
+    optionalArguments.add_argument('-n', '--axioms', type=int, help='Number of axioms in the generated text', default=5000)
+    optionalArguments.add_argument('-r', '--repeat', type=int, help='Number of timed runs per engine (the best one is reported)', default=3)
+
+    # Parse the command line arguments
+    args = parser.parse_args()
+
+    if args.file is not None:
+        with open(args.file, 'r') as f:
+            text = f.read()
+    else:
+        text = generate_text(args.axioms)
+
+    print("Parsing {} characters, best of {} runs".format(len(text), args.repeat))
+
+    results = {}
+    times = {}
+
+    for engine in ENGINES:
+        clif_parser = ClifParser(engine=engine)
+        results[engine] = [repr(x) for x in clif_parser.parse(text)]
+        times[engine] = min(timeit.repeat(lambda: clif_parser.parse(text), number=1, repeat=args.repeat))
+        print("{:>8}: {:8.3f} s".format(engine, times[engine]))
+
+    # Without building the Logical objects, which costs the same for both engines
+    syntax = min(timeit.repeat(lambda: list(read(scan(text))), number=1, repeat=args.repeat))
+    print("{:>8}: {:8.3f} s (scanning and grouping only)".format('descent', syntax))
+
+    if any(results[engine] != results[ENGINES[0]] for engine in ENGINES):
+        print("The engines produced different results!")
+        return 1
+
+    print("Speedup of descent over ply: {:.1f}x".format(times['ply'] / times['descent']))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
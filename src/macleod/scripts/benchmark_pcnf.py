@@ -0,0 +1,704 @@
+import argparse
+import contextlib
+import copy
+import functools
+import io
+import logging
+import random
+import sys
+import timeit
+
+LOGGER = logging.getLogger(__name__)
+
+import macleod.logical.normal_form as NormalForm
+import macleod.logical.symbol as Symbol
+import macleod.logical.utils as Util
+from macleod.logical.axiom import Axiom
+from macleod.logical.connective import Connective
+from macleod.logical.node import (make, thaw, PREDICATE, NOT, AND, OR, FORALL, EXISTS)
+from macleod.logical.normal_form import (CLASS_NAMES, CONNECTIVES, QUANTIFIERS, kind_of, missing, replace,
+                                         connective, quantifier, conjunction, disjunction)
+from macleod.logical.quantifier import (Universal, Quantifier)
+from macleod.logical.symbol import (Function, Predicate)
+from macleod.parsing.parser import ClifParser
+
+def copying_ff_pcnf(axiom):
+    '''
+    The original implementation of Axiom.ff_pcnf() on the mutable Logicals,
+    which copies the formula before and within every step. Kept as the
+    reference the node based steps in normal_form.py are timed against here
+    and compared to in logical/tests/test_NormalForm.py.
+
+    :param Axiom axiom, the axiom to translate
+    :return Axiom, in FF-PCNF with the function declarations as extra sentences
+    '''
+
+    copied = copy.deepcopy(axiom)
+
+    # Function substitution
+    functions = []
+    function_free = Axiom(Util.dfs_functions(copy.deepcopy(copied.sentence), functions, None))
+
+    declarations = []
+    for function in {f.name for f in functions if len(f.variables) == 2}:
+        term_one = ~(Predicate(function, ['a', 'b']))
+        term_two = ~(Predicate(function, ['a', 'c']))
+        equality = Predicate('=', ['c', 'b'])
+        declarations.append(Axiom(Universal(['a', 'b', 'c'], term_one | term_two | equality)))
+
+    # Variable standardization, negation
+    unique_variables = Axiom(Util.dfs_standardize(copy.deepcopy(function_free.sentence), Util.generator(), []))
+    distributed_negation = Axiom(Util.dfs_negate(copy.deepcopy(unique_variables.sentence)))
+
+    # Prenex form
+    ret_obj = copy.deepcopy(distributed_negation.sentence)
+
+    for term, parent in Util.reverse_bfs(ret_obj):
+
+        if isinstance(term, Connective):
+
+            coalesced_term = term.coalesce()
+
+            if isinstance(coalesced_term, Connective):
+                scoped_term = coalesced_term.rescope(parent)
+            else:
+                scoped_term = coalesced_term
+
+            if not parent is None:
+                parent.remove_term(term)
+                parent.set_term(scoped_term)
+            else:
+                ret_obj = scoped_term
+
+    if isinstance(ret_obj, Quantifier):
+        ret_obj = ret_obj.simplify()
+
+    prenex_form = Axiom(ret_obj)
+
+    # Distribution
+    cnf = Axiom(copy.deepcopy(prenex_form.sentence).to_onf())
+    cnf.extra_sentences = declarations
+
+    return cnf
+
+
+def rescoped_prenex(sentence):
+    '''
+    Pull all quantifiers to the front like the original implementation.
+    Connectives are coalesced and rescoped bottom up, in the reverse breadth
+    first order of Util.reverse_bfs(); a rescoped connective takes the place
+    of the original after the other terms of its parent. This can take time
+    quadratic in the number of quantified terms of a connective.
+
+    Only a reference for the tests and the benchmark: like the original, it
+    drops disjuncts of some formulas. Where the original is defined by the
+    order in which it modifies its working copy -- broadening nested
+    quantifiers in Quantifier.rescope() and absorbing like quantifiers in
+    Quantifier.simplify() -- the modifications are replayed on a small
+    scratch tree of Cells instead.
+
+    :param Node sentence, the formula
+    :return Node
+    '''
+
+    # Breadth first order of the positions in the formula
+    nodes = [sentence]
+    parents = [None]
+    children = [[]]
+
+    index = 0
+    while index < len(nodes):
+        current = nodes[index]
+        if current.kind != PREDICATE:
+            for term in current.args:
+                children[index].append(len(nodes))
+                nodes.append(term)
+                parents.append(index)
+                children.append([])
+        index += 1
+
+    # Term at every position once everything below it has been processed
+    results = [None] * len(nodes)
+
+    for index in reversed(range(len(nodes))):
+
+        term = nodes[index]
+        kind = term.kind
+
+        if kind == PREDICATE:
+            results[index] = term
+            continue
+
+        if kind not in CONNECTIVES:
+            results[index] = replace(term, [results[x] for x in children[index]])
+            continue
+
+        # Rescoped connective children have been removed and re-added at the end, last one first
+        terms = [results[x] for x in children[index] if nodes[x].kind not in CONNECTIVES]
+        for child in reversed([x for x in children[index] if nodes[x].kind in CONNECTIVES]):
+            terms = set_term(kind, terms, results[child])
+
+        term = replace(term, terms)
+
+        parent = parents[index]
+        parent_kind = nodes[parent].kind if parent is not None else None
+
+        coalesced = coalesce(term)
+
+        if kind_of(coalesced) in CONNECTIVES:
+            scoped = rescope(coalesced, parent_kind)
+        else:
+            scoped = coalesced
+
+        if parent_kind == NOT:
+            # Negations cannot have their term removed
+            raise missing(nodes[parent], 'remove_term')
+
+        results[index] = scoped
+
+    prenex = results[0]
+
+    if kind_of(prenex) in QUANTIFIERS:
+        prenex = simplify(prenex)
+
+    return prenex
+
+
+def set_term(kind, terms, term):
+    '''
+    Connective.set_term(): the terms of the connective after adding another
+    one, or the terms of a connective of the same kind
+    '''
+
+    terms = list(terms)
+    added = term.args if kind_of(term) == kind else [term]
+
+    for t in added:
+        # Predicates compare structurally, a copy of anything else is new
+        if kind_of(t) != PREDICATE or t not in terms:
+            terms.append(t)
+
+    return terms
+
+
+def coalesce(term):
+    '''
+    Connective.coalesce(): coalesce or merge the like quantifiers held as
+    terms of the connective. Conjunctions coalesce Universals and merge
+    Existentials, disjunctions the other way round.
+    '''
+
+    kind = term.kind
+    args = term.args
+
+    # Short circuit case where we have only one quantifier
+    if sum(1 for x in args if kind_of(x) in QUANTIFIERS) == 1:
+        return term
+
+    to_coalesce = FORALL if kind == AND else EXISTS
+    to_merge = FORALL if kind == OR else EXISTS
+
+    coalescing = [x for x in args if kind_of(x) == to_coalesce]
+    merging = [x for x in args if kind_of(x) == to_merge]
+
+    coalesced = None
+    merged = None
+
+    if len(coalescing) > 1:
+        coalesced = functools.reduce(coalesce_quantifiers, coalescing)
+
+    if len(merging) > 1:
+
+        variables = []
+        terms = []
+
+        for quant in merging:
+            variables.extend(quant.symbol)
+            terms.extend(quant.args)
+
+        merged = quantifier(to_merge, variables, connective(kind, terms))
+
+    other_terms = [x for x in args if kind_of(x) != to_coalesce and kind_of(x) != to_merge]
+
+    # Ensure we reduce the resulting connective in the new quantifier
+    if coalesced is not None:
+        coalesced = reduce(coalesced)
+
+    if merged is not None:
+        merged = reduce(merged)
+
+    if coalesced is None and merged is None:
+        return term
+
+    if len(other_terms) == 0:
+
+        if merged is None:
+            return coalesced
+        elif coalesced is None:
+            return merged
+
+        return connective(kind, [coalesced, merged])
+
+    if coalesced is not None:
+        other_terms.append(coalesced)
+
+    if merged is not None:
+        other_terms.append(merged)
+
+    return connective(kind, other_terms)
+
+
+def coalesce_quantifiers(first, other):
+    '''
+    Quantifier.coalesce(): a single quantifier over the conjunction
+    (Universal) or disjunction (Existential) of the terms of two quantifiers
+    '''
+
+    if first is True:
+        raise AttributeError("'bool' object has no attribute 'coalesce'")
+
+    if other.kind != first.kind:
+        raise ValueError("Can't coalesce quantifiers of different types {} {}".format(repr(first), repr(other)))
+
+    less, more = (first, other) if len(first.symbol) < len(other.symbol) else (other, first)
+    translation = dict(zip(less.symbol, more.symbol))
+
+    terms = [rename(less.args[0], translation), more.args[0]]
+
+    if first.kind == FORALL:
+        return quantifier(FORALL, more.symbol, conjunction(terms))
+
+    disjoined = disjunction(terms)
+    if len(disjoined.args) > 0:
+        return quantifier(EXISTS, more.symbol, disjoined)
+
+    # empty disjunction
+    return True
+
+
+def rename(term, translation):
+    '''
+    Quantifier.rename(): rename the variables of all predicates
+    '''
+
+    if term.kind == PREDICATE:
+        return replace(term, [translation.get(v, v) if isinstance(v, str) else v for v in term.args])
+
+    return replace(term, [rename(x, translation) for x in term.args])
+
+
+def reduce(term):
+    '''
+    Quantifier.reduce(): coalesce and rescope the connective below a chain of
+    quantifiers
+    '''
+
+    if term is True:
+        raise AttributeError("'bool' object has no attribute 'reduce'")
+
+    child = term.args[0]
+    kind = kind_of(child)
+
+    if kind == PREDICATE or kind == NOT:
+        return term
+
+    elif kind in QUANTIFIERS:
+        return replace(term, [reduce(child)])
+
+    child = coalesce(child)
+    kind = kind_of(child)
+
+    if kind in QUANTIFIERS:
+        child = rescope_quantifier(child)
+    elif kind in CONNECTIVES:
+        child = rescope(child, term.kind)
+    else:
+        raise ValueError("Never again will I choose Ontologies")
+
+    return replace(term, [child])
+
+
+def rescope(term, parent=None):
+    '''
+    Connective.rescope(): promote the quantifier terms of a connective that
+    has already had its like quantifiers coalesced.
+
+    :param Node term, the connective
+    :param String parent, kind of the enclosing connective or quantifier
+    :return Node
+    '''
+
+    args = term.args
+    positions = [i for i, x in enumerate(args) if kind_of(x) in QUANTIFIERS]
+
+    if len(positions) == 0:
+
+        return term
+
+    elif len(positions) == 1:
+
+        position = positions[0]
+        quant = args[position]
+
+        terms = [quant.args[0]] + [x for i, x in enumerate(args) if i != position]
+        rescoped = rescope(connective(term.kind, terms))
+
+        return quantifier(quant.kind, quant.symbol, rescoped)
+
+    elif len(positions) == 2:
+
+        # Two quantifiers requires that a lookahead be specified
+        if parent is None:
+            raise ValueError("More than one choice of quantifier, require lookahead value")
+
+        if parent == AND or parent == FORALL:
+            q_type = FORALL
+        elif parent == OR or parent == EXISTS:
+            q_type = EXISTS
+        else:
+            raise ValueError("Something Borked itself in a great but terrible way!")
+
+        dominant = [i for i in positions if args[i].kind == q_type]
+        weaker = [i for i in positions if args[i].kind != q_type]
+
+        if len(dominant) != 1 or len(weaker) != 1:
+            raise ValueError("More than a single type of quantifier found, did you coalesce?")
+
+        stronger = args[dominant[0]]
+        weak = args[weaker[0]]
+
+        terms = [stronger.args[0], weak.args[0]]
+        terms.extend([x for i, x in enumerate(args) if i not in positions])
+        new_connective = connective(term.kind, terms)
+
+        coalesced = coalesce(new_connective)
+
+        if kind_of(coalesced) in QUANTIFIERS:
+            rescoped = rescope_quantifier(coalesced)
+        else:
+            rescoped = rescope(coalesced, weak.kind)
+
+        return quantifier(stronger.kind, stronger.symbol, quantifier(weak.kind, weak.symbol, rescoped))
+
+    # This only happens when the parsed axioms has a Connective with > 2 axioms at the leaf level
+    return rescope(term, coalesce(term).kind)
+
+
+class Cell(object):
+    '''
+    Mutable stand-in for a Logical while replaying the modifications of
+    Quantifier.rescope() and Quantifier.simplify(). Predicates stay nodes.
+
+    kind   -- node kind
+    symbol -- list of variables of a quantifier, symbol of the node otherwise
+    terms  -- list of Cells and predicate nodes
+    '''
+
+    __slots__ = ('kind', 'symbol', 'terms')
+
+    def __init__(self, kind, symbol, terms):
+
+        self.kind = kind
+        self.symbol = symbol
+        self.terms = terms
+
+
+def to_cells(term):
+
+    if kind_of(term) in (PREDICATE, None):
+        return term
+
+    symbol = list(term.symbol) if term.kind in QUANTIFIERS else term.symbol
+    return Cell(term.kind, symbol, [to_cells(x) for x in term.args])
+
+
+def copy_cells(cell):
+
+    if not isinstance(cell, Cell):
+        return cell
+
+    symbol = list(cell.symbol) if cell.kind in QUANTIFIERS else cell.symbol
+    return Cell(cell.kind, symbol, [copy_cells(x) for x in cell.terms])
+
+
+def from_cells(cell):
+
+    if not isinstance(cell, Cell):
+        return cell
+
+    symbol = tuple(cell.symbol) if cell.kind in QUANTIFIERS else cell.symbol
+    return make(cell.kind, symbol, tuple([from_cells(x) for x in cell.terms]))
+
+
+def is_quantifier_cell(cell):
+
+    return isinstance(cell, Cell) and cell.kind in QUANTIFIERS
+
+
+def remove_cell(parent, cell):
+
+    if parent.kind in QUANTIFIERS:
+        parent.terms = None
+    elif parent.kind in CONNECTIVES:
+        parent.terms.remove(cell)
+    else:
+        raise ValueError('Cannot remove a term of a {}'.format(CLASS_NAMES[parent.kind]))
+
+
+def add_cells(parent, cells):
+
+    if parent.kind in QUANTIFIERS:
+        parent.terms = [copy_cells(x) for x in cells]
+    else:
+        for cell in cells:
+            if cell not in parent.terms:
+                parent.terms.append(copy_cells(cell))
+
+
+def add_variables(cell, variables):
+
+    temp = cell.symbol + list(variables)
+    cell.symbol += [x for x in temp if x not in cell.symbol]
+
+
+def rescope_quantifier(term):
+    '''
+    Quantifier.rescope(): broaden the quantifiers nested below a quantifier
+    to the top, breadth first
+    '''
+
+    root = to_cells(term)
+    quantifier = [root]
+
+    def broaden(symbol, parent):
+
+        top_q = quantifier[0]
+
+        if parent is not None and is_quantifier_cell(symbol):
+
+            remove_cell(parent, symbol)
+            add_cells(parent, symbol.terms)
+
+            if symbol.kind == top_q.kind:
+                add_variables(top_q, symbol.symbol)
+
+            else:
+                if len(top_q.terms) != 1:
+                    raise ValueError('{} must be over a list of Logical'.format(CLASS_NAMES[symbol.kind]))
+
+                new_quantifier = Cell(symbol.kind, list(symbol.symbol), top_q.terms)
+                top_q.terms = [new_quantifier]
+                quantifier[0] = new_quantifier
+
+    left = [(root, None)]
+    for item in root.terms:
+        left.append((item, None))
+
+    while left != []:
+
+        # Need to broaden children who may share quantifier first
+        current_parent = left[0][1]
+        stack = [x for x in left if x[1] == current_parent]
+
+        for item in stack:
+            if isinstance(item[0], Cell) and item[0].kind == quantifier[0].kind:
+                broaden(item[0], item[1])
+                left.remove(item)
+                for term in item[0].terms:
+                    left.append((term, item[0]))
+                stack.remove(item)
+
+        for item in stack:
+            broaden(item[0], item[1])
+            left.remove(item)
+            if isinstance(item[0], Cell):
+                for term in [x for x in item[0].terms if isinstance(x, Cell)]:
+                    left.append((term, item[0]))
+
+    return from_cells(root)
+
+
+def simplify(term):
+    '''
+    Quantifier.simplify(): absorb like quantifiers depth first, restarting
+    with a new root at every differently typed quantifier
+    '''
+
+    root = to_cells(term)
+
+    def dfs_simplify(current, parent, root):
+
+        if parent is not current and parent is not None and is_quantifier_cell(current):
+
+            if current.kind == root.kind:
+
+                # Absorb like children
+                add_variables(root, current.symbol)
+                remove_cell(parent, current)
+                add_cells(parent, current.terms)
+
+                for term in [x for x in parent.terms if isinstance(x, Cell)]:
+                    dfs_simplify(term, parent, root)
+
+            else:
+                # Reset our root
+                root = current
+
+        for term in [x for x in current.terms if isinstance(x, Cell)]:
+            dfs_simplify(term, current, root)
+
+    dfs_simplify(root, None, root)
+
+    return from_cells(root)
+
+
+def rescoped_ff_pcnf(axiom):
+    '''
+    Axiom.ff_pcnf() with the prenex form of the original implementation
+    (rescoped_prenex), which gives the same axioms as
+    copying_ff_pcnf() on nodes
+
+    :param Axiom axiom, the axiom to translate
+    :return Axiom, in FF-PCNF with the function declarations as extra sentences
+    '''
+
+    with Symbol.numbering():
+
+        function_free, declaration = axiom.substitute_functions(transient=True)
+        unique_variables = function_free.standardize_variables(transient=True)
+        distributed_negation = unique_variables.push_negation(transient=True)
+        prenex_form = Axiom(thaw(rescoped_prenex(distributed_negation.sentence.freeze())), True)
+        cnf = prenex_form.distribute_disjunctions()
+
+        if declaration is not None:
+            cnf.extra_sentences = declaration
+
+        return cnf
+
+
+def fixtures():
+    '''
+    The axioms translated to FF-PCNF in logical/tests/test_Axiom.py
+    '''
+
+    a = Predicate('A', ['x'])
+    b = Predicate('B', ['y'])
+    c = Predicate('C', ['z'])
+    f = Predicate('C', ['z', Function('F', ['z'])])
+
+    return [Axiom(Universal(['x','y','z'], a | b & c)),
+            Axiom(Universal(['x','y','z'], (a | b) & c)),
+            Axiom(Universal(['x','y','z'], a | b & f))]
+
+
+def generate_axioms(axioms, depth, seed=0):
+    '''
+    Generate large random axioms, keeping those that can be translated
+    '''
+
+    rng = random.Random(seed)
+
+    def term(depth):
+        if depth <= 0 or rng.random() < 0.8:
+            return rng.choice(['x', 'y', 'z', 'w'])
+        return '(f{} {})'.format(rng.randint(0, 2), term(depth - 1))
+
+    def formula(depth):
+        if depth <= 0 or rng.random() < 0.1:
+            return '(P{} {})'.format(rng.randint(0, 9), ' '.join(term(1) for _ in range(rng.randint(1, 2))))
+        kind = rng.choice(['not', 'and', 'or', 'and', 'or', 'if', 'exists'])
+        if kind == 'not':
+            return '(not {})'.format(formula(depth - 1))
+        if kind in ('and', 'or'):
+            return '({} {})'.format(kind, ' '.join(formula(depth - 1) for _ in range(rng.randint(2, 3))))
+        if kind == 'if':
+            return '(if {} {})'.format(formula(depth - 1), formula(depth - 1))
+        return '(exists ({}) {})'.format(rng.choice(['u', 'v']), formula(depth - 1))
+
+    clif_parser = ClifParser(preserve_conditionals=False)
+    generated = []
+
+    while len(generated) < axioms:
+        axiom = Axiom(clif_parser.parse('(forall (x y z w) {})'.format(formula(depth)))[0])
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                axiom.ff_pcnf()
+        except Exception:
+            continue
+        generated.append(axiom)
+
+    return generated
+
+
+def translate(pcnf, axioms):
+
+    results = []
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for axiom in axioms:
+            # Same names for the variables replacing functions in both translations
+            Symbol.gen = Symbol.generator()
+            cnf = pcnf(axiom)
+            results.append((repr(cnf), [repr(x) for x in cnf.extra_sentences]))
+
+    return results
+
+
+def compare(name, axioms, repeat):
+    '''
+    Time both translations on the same axioms, return the speedup or None if their results differ
+    '''
+
+    copying = copying_ff_pcnf
+    nodes = rescoped_ff_pcnf
+    single_pass = lambda axiom: axiom.ff_pcnf(prenex=NormalForm.UNIVERSALS_FIRST)
+
+    if translate(copying, axioms) != translate(nodes, axioms):
+        print("{}: the translations produced different results!".format(name))
+        return None
+
+    before = min(timeit.repeat(lambda: translate(copying, axioms), number=1, repeat=repeat))
+    after = min(timeit.repeat(lambda: translate(nodes, axioms), number=1, repeat=repeat))
+    pulled = min(timeit.repeat(lambda: translate(single_pass, axioms), number=1, repeat=repeat))
+
+    print("{:>10}: {:8.3f} s copying, {:8.3f} s nodes, speedup {:.1f}x, {:8.3f} s with single pass prenex form".format(name, before, after, before / after, pulled))
+
+    return before / after
+
+
+def main():
+    '''
+    Compare the FF-PCNF translation on nodes with the original copying implementation
+    '''
+
+    LOGGER.info('Called script benchmark_pcnf')
+    # Setup the command line arguments to the program
+    parser = argparse.ArgumentParser(description='Compare the speed of the FF-PCNF translations of axioms.')
+
+    optionalArguments = parser.add_argument_group('optional arguments')
+    optionalArguments.add_argument('-f', '--file', type=str, help='Clif file whose axioms are translated as well', default=None)
+    optionalArguments.add_argument('-n', '--axioms', type=int, help='Number of generated axioms', default=100)
+    optionalArguments.add_argument('-d', '--depth', type=int, help='Nesting depth of the generated axioms', default=6)
+    optionalArguments.add_argument('-r', '--repeat', type=int, help='Number of timed runs (the best one is reported)', default=3)
+
+    # Parse the command line arguments
+    args = parser.parse_args()
+
+    sets = [('fixtures', fixtures() * 100),
+            ('generated', generate_axioms(args.axioms, args.depth))]
+
+    if args.file is not None:
+        with open(args.file, 'r') as f:
+            sets.append((args.file, [Axiom(x) for x in ClifParser(preserve_conditionals=False).parse(f.read())
+                                     if x is not None and not isinstance(x, str)]))
+
+    print("Translating to FF-PCNF, best of {} runs".format(args.repeat))
+
+    speedups = [compare(name, axioms, args.repeat) for name, axioms in sets]
+
+    if None in speedups:
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import argparse
+import json
 import logging
 import sys, os
 
@@ -6,7 +7,12 @@ import sys, os
 LOGGER = logging.getLogger(__name__)
 
 import macleod.Filemgt
+import macleod.parsing.parser as Parser
 import macleod.scripts.parser as parser_script
+from macleod.Repository import Repository
+from macleod.parsing.cache import (ParseCache, ResultCache)
+from macleod.parsing.registry import ModuleRegistry
+from macleod.parsing.watch import (DEFAULT_INTERVAL, Watcher)
 
 #print(os.path.dirname(os.path.abspath(__file__)))
 #sys.path.append(os.path.dirname(os.path.abspath(__file__))+"/../")
@@ -30,6 +36,13 @@ def main():
     optionalArguments = parser.add_argument_group('optional arguments')
     optionalArguments.add_argument('-out', '--output', action='store_true', help='Write output to file', default=True)
     optionalArguments.add_argument('--resolve', action="store_true", help='Automatically resolve imports', default=False)
+    optionalArguments.add_argument('--parallel', action="store_true", help='Resolve imports on several processes (only relevant when option --resolve is turned on)', default=False)
+    optionalArguments.add_argument('--cache', action="store_true", help='Load unchanged modules from (and store newly parsed ones in) the parse cache', default=False)
+    optionalArguments.add_argument('--results', action="store_true", help='Reuse the results of reasoners on identical inputs from (and store new ones in) the result cache; unknown results are only reused if the time limit is not longer', default=False)
+    optionalArguments.add_argument('--engine', choices=Parser.ENGINES, help='Parsing engine: ply (default) or the faster hand-written descent engine', default='ply')
+    optionalArguments.add_argument('--watch', nargs='?', const=DEFAULT_INTERVAL, default=None, type=float, metavar='SECONDS', help='Keep running and check again whenever the file or one of its imports changes (checking every SECONDS, default 1)')
+    optionalArguments.add_argument('--reasoners', default=None, type=int, metavar='N', help='Number of reasoners running at the same time when checking a folder (default: number of CPUs)')
+    optionalArguments.add_argument('--summary', default=None, type=str, metavar='FILE', help='Write the results of checking a folder as JSON to FILE (default: print them)')
     optionalArguments.add_argument('--stats', action="store_true", help='Present detailed statistics (including definitions) about the ontology', default=True)
     optionalArguments.add_argument('-n', '--nontrivial', action="store_true", default=False, help='Instantiate all predicates to check for nontrivial consistency')
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
@@ -61,7 +74,10 @@ def main():
     # TODO need to substitute base path
     full_path = args.file
 
-    if os.path.isfile(full_path):
+    if os.path.isfile(full_path) and args.watch is not None:
+        watch(full_path, args)
+
+    elif os.path.isfile(full_path):
         logging.getLogger(__name__).info("Starting to parse " + args.file)
         # Creation of the ModuleSet is from the old deprecated approach
         #m = ClifModuleSet(full_path)
@@ -69,8 +85,7 @@ def main():
 
     elif os.path.isdir(full_path):
         logging.getLogger(__name__).info("Starting to parse all CLIF files in folder " + args.file)
-        # TODO need function for checking consistency of a folder
-        # convert_folder(full_path, args=args)
+        check_folder(full_path, args)
     else:
         logging.getLogger(__name__).error("Attempted to check consistency of non-existent file or directory: " + full_path)
 
@@ -81,7 +96,7 @@ def consistent(filename, args):
     ontology = parser_script.convert_file(filename, args, preserve_conditionals=True)
 
     if args.resolve:
-        ontology.resolve_imports()
+        ontology.resolve_imports(args.parallel)
 
     ontology.analyze_ontology()
 
@@ -96,7 +111,7 @@ def consistent(filename, args):
         # as part of the args, it is communicated whether to resolve the ontology or not
 
 
-        (return_value, fastest_reasoner) = ontology.check_consistency()
+        (return_value, fastest_reasoner) = ontology.check_consistency(results=ResultCache() if args.results else None)
 
         if return_value == macleod.Ontology.CONSISTENT:
             if args.nontrivial:
@@ -104,7 +119,7 @@ def consistent(filename, args):
             else:
                 print(fastest_reasoner.name + " proved consistency of " + ontology.name)
             print("Results saved to " + fastest_reasoner.output_file)
-        exit(0)
+        return (return_value, ontology)
     elif args.full:
         # TODO not yet working again
         # Run the parsing script first to translate to TPTP and LADR
@@ -143,6 +158,55 @@ def consistent(filename, args):
     # return (None, m)
 
 
+def check_folder(folder, args):
+    '''
+    Check the consistency of all CLIF files in a folder and its subfolders,
+    bottom-up along their imports (see macleod.Repository)
+
+    :return dict, the summary of the results
+    '''
+
+    cache = ParseCache() if args.cache else None
+    results = ResultCache() if args.results else None
+    repository = Repository(folder, args.sub, args.base, nontrivial=args.nontrivial, cache=cache, engine=args.engine, results=results)
+
+    for result in repository.check(args.reasoners):
+        if result['propagated_from'] is not None:
+            print(result['result'].upper() + ": " + result['module'] + " (imports " + result['propagated_from'] + ")")
+        elif result['reasoner'] is not None:
+            print(result['result'].upper() + ": " + result['module'] + " (" + result['reasoner'] + ")")
+        else:
+            print(result['result'].upper() + ": " + result['module'])
+
+    summary = repository.summary()
+
+    if args.summary:
+        repository.write_summary(args.summary)
+        print("Summary saved to " + args.summary)
+    else:
+        print(json.dumps(summary, indent=2))
+
+    return summary
+
+
+def watch(filename, args):
+    '''
+    Check the consistency of a file, then keep its parsed imports in memory
+    and check it again whenever the file or one of its imports changes
+    '''
+
+    # The parsed imports are shared through the registry of the watcher
+    watcher = Watcher(ModuleRegistry(), args.watch)
+
+    with watcher.registry.scope():
+        _, ontology = consistent(filename, args)
+
+    watcher.watch(ontology)
+
+    # The file itself is parsed again for every check since checking may add axioms to it (see --nontrivial)
+    watcher.run(lambda ontology: consistent(ontology.name, args))
+
+
 if __name__ == '__main__':
     sys.exit(main())
 
@@ -1,50 +1,47 @@
-import os
+import argparse
 import sys
-import macleod.scripts.licence 
-import macleod.scripts.check_consistency
+
+import macleod.Filemgt
+import macleod.scripts.licence
+from macleod.Repository import Repository
+from macleod.parsing.cache import ResultCache
 
 def main():
     """Entrypoint for check consistency all"""
 
-    licence.print_terms()
-
-    #print(os.path.dirname(os.path.abspath(__file__)))
-    sys.path.append(os.path.dirname(os.path.abspath(__file__))+"/../")
-
-    #ignores = ["theorems", "generated", "output","consistency"]
-    ignores = ["theorems", "generated", "output"]
-    #necessary = "_nontrivial"
-    necessary = False
-
-    good = 0
-    bad = 0
-    neutral = 0
-    for directory, subdirs, files in os.walk(sys.argv[1]):
-
-        subdirs.sort()
-        files.sort()
-
-        if any(ignore in directory for ignore in ignores):
-            pass
-        else:
-            for single_file in files:
-                print(single_file)
-                if single_file.endswith('.clif'):
-                    if necessary and necessary not in single_file:
-                        pass
-                    filename = os.path.join(directory.replace('qs\\',''), single_file)
-#                    print filename
-                    (result, _) = check_consistency.consistent(filename, options=['-simple'])
-                    if result is True:
-                        good += 1
-                    elif result is False:
-                        bad += 1
-                    else:
-                        neutral += 1
-    print(str(good+bad+neutral) + " files in total")
-    print(str(good) + " consistent")
-    print(str(neutral) + " unknown")
-    print(str(bad) + " inconsistent")
+    macleod.scripts.licence.print_terms()
+
+    parser = argparse.ArgumentParser(description='Check the consistency of all ontologies (.clif files) in a folder and its subfolders, bottom-up along their imports.')
+    parser.add_argument('folder', type=str, help='Folder with the Clif files')
+    parser.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; can also be set in configuration file)')
+    parser.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports')
+    parser.add_argument('-n', '--nontrivial', action="store_true", default=False, help='Instantiate all predicates to check for nontrivial consistency')
+    parser.add_argument('--reasoners', default=None, type=int, metavar='N', help='Number of reasoners running at the same time (default: number of CPUs)')
+    parser.add_argument('--results', action="store_true", default=False, help='Reuse the results of reasoners on identical inputs from (and store new ones in) the result cache')
+    parser.add_argument('--summary', default=None, type=str, metavar='FILE', help='Write the results as JSON to FILE')
+    args = parser.parse_args()
+
+    default_basepath = macleod.Filemgt.get_ontology_basepath()
+    if args.sub is None:
+        args.sub = default_basepath[0]
+    if args.base is None:
+        args.base = default_basepath[1]
+
+    repository = Repository(args.folder, args.sub, args.base, nontrivial=args.nontrivial, results=ResultCache() if args.results else None)
+
+    for result in repository.check(args.reasoners):
+        print(result['result'].upper() + ": " + result['module'])
+
+    summary = repository.summary()
+
+    if args.summary:
+        repository.write_summary(args.summary)
+
+    counts = summary['counts']
+    print(str(summary['modules']) + " files in total")
+    print(str(counts['consistent']) + " consistent")
+    print(str(counts['unknown']) + " unknown")
+    print(str(counts['inconsistent']) + " inconsistent (" + str(summary['propagated']) + " by their imports)")
 
 if __name__ == '__main__':
     sys.exit(main())
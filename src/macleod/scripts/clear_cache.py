@@ -0,0 +1,41 @@
+import argparse
+import logging
+import sys
+
+LOGGER = logging.getLogger(__name__)
+
+from macleod.parsing.cache import (FragmentCache, ParseCache, ResultCache)
+
+def main():
+    '''
+    Remove parsed modules and their translations from the cache
+    '''
+
+    LOGGER.info('Called script clear_cache')
+    # Setup the command line arguments to the program
+    parser = argparse.ArgumentParser(description='Remove parsed Common Logic Interchange Format (.clif) modules and their translations from the cache.')
+
+    optionalArguments = parser.add_argument_group('optional arguments')
+    optionalArguments.add_argument('-f', '--file', type=str, help='Only remove the cached entries of this Clif file (all entries are removed otherwise)', default=None)
+    optionalArguments.add_argument('--results', action='store_true', help='Remove the cached results of reasoners instead', default=False)
+    optionalArguments.add_argument('--unknown', action='store_true', help='Only remove the unknown results of reasoners (with --results)', default=False)
+    optionalArguments.add_argument('-c', '--cache', type=str, help='Folder of the parse cache (can also be set in configuration file)', default=None)
+
+    # Parse the command line arguments
+    args = parser.parse_args()
+
+    if args.results:
+        cache = ResultCache(folder=args.cache)
+        count = cache.clear(args.unknown)
+        print("Removed {} entries from the result cache in {}".format(count, cache.folder))
+        return
+
+    cache = ParseCache(folder=args.cache)
+    count = cache.invalidate(args.file)
+    fragments = FragmentCache(folder=args.cache).invalidate(args.file)
+
+    print("Removed {} parsed modules and {} translations from the cache in {}".format(count, fragments, cache.folder))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,7 +6,11 @@ import sys, os
 LOGGER = logging.getLogger(__name__)
 
 import macleod.parsing.parser as Parser
+import macleod.logical.normal_form as NormalForm
 import macleod.Filemgt
+from macleod.parsing.cache import (FragmentCache, ParseCache)
+from macleod.parsing.registry import ModuleRegistry
+from macleod.parsing.watch import (DEFAULT_INTERVAL, Watcher)
 
 default_dir = macleod.Filemgt.read_config('system', 'path')
 default_prefix = macleod.Filemgt.read_config('cl', 'prefix')
@@ -32,12 +36,21 @@ def parse_clif():
     optionalArguments = parser.add_argument_group('optional arguments')
     optionalArguments.add_argument('--enum', action='store_true', help='Enumerate axioms in LaTeX output', default=False)
     optionalArguments.add_argument('-out', '--output', action='store_true', help='Write output to file', default=True)
+    optionalArguments.add_argument('--gzip', action='store_true', help='Compress the TPTP, LADR or LaTeX output file with gzip', default=False)
+    optionalArguments.add_argument('--quiet', action='store_true', help='Do not print the TPTP, LADR or LaTeX translation to stdout when writing it to a file', default=False)
+    optionalArguments.add_argument('--skip-unchanged', action='store_true', help='Leave the output file untouched if its content stays the same', default=False)
     optionalArguments.add_argument('--resolve', action="store_true", help='Automatically resolve imports', default=False)
+    optionalArguments.add_argument('--parallel', action="store_true", help='Resolve imports on several processes (only relevant when option --resolve is turned on)', default=False)
+    optionalArguments.add_argument('--cache', action="store_true", help='Load unchanged modules and their TPTP and LADR translations from (and store new ones in) the cache', default=False)
+    optionalArguments.add_argument('--engine', choices=Parser.ENGINES, help='Parsing engine: ply (default) or the faster hand-written descent engine', default='ply')
+    optionalArguments.add_argument('--watch', nargs='?', const=DEFAULT_INTERVAL, default=None, type=float, metavar='SECONDS', help='Keep running and translate again whenever a file or one of its imports changes (checking every SECONDS, default 1)')
     optionalArguments.add_argument('--nocond', action='store_true', help='Do not use conditionals (only applies to TPTP, LADR and LaTeX production)', default=False)
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
     optionalArguments.add_argument('--ffpcnf', action='store_true', help='Automatically convert axioms to function-free prenex conjuntive normal form (FF-PCNF)', default=False)
     optionalArguments.add_argument('--clip', action='store_true', help='Split FF-PCNF axioms across the top level quantifier', default=False)
+    optionalArguments.add_argument('--cnf', choices=NormalForm.CNF_MODES, help='Conjunctive normal form of FF-PCNF axioms: naive (default) distributes disjunctions, definitional introduces new predicates for large subformulas', default=NormalForm.NAIVE)
+    optionalArguments.add_argument('--prenex', choices=NormalForm.PRENEX_MODES, help='Order of the quantifiers of FF-PCNF axioms where it is free: universals-first (default) or existentials-first', default=NormalForm.UNIVERSALS_FIRST)
 
     # Parse the command line arguments
     args = parser.parse_args()
@@ -60,7 +73,14 @@ def clif_to_tptp():
 
     optionalArguments = parser.add_argument_group('optional arguments')
     optionalArguments.add_argument('-out', '--output', action='store_true', help='Write output to file', default=True)
+    optionalArguments.add_argument('--gzip', action='store_true', help='Compress the TPTP, LADR or LaTeX output file with gzip', default=False)
+    optionalArguments.add_argument('--quiet', action='store_true', help='Do not print the TPTP, LADR or LaTeX translation to stdout when writing it to a file', default=False)
+    optionalArguments.add_argument('--skip-unchanged', action='store_true', help='Leave the output file untouched if its content stays the same', default=False)
     optionalArguments.add_argument('--resolve', action="store_true", help='Automatically resolve imports', default=False)
+    optionalArguments.add_argument('--parallel', action="store_true", help='Resolve imports on several processes (only relevant when option --resolve is turned on)', default=False)
+    optionalArguments.add_argument('--cache', action="store_true", help='Load unchanged modules and their TPTP and LADR translations from (and store new ones in) the cache', default=False)
+    optionalArguments.add_argument('--engine', choices=Parser.ENGINES, help='Parsing engine: ply (default) or the faster hand-written descent engine', default='ply')
+    optionalArguments.add_argument('--watch', nargs='?', const=DEFAULT_INTERVAL, default=None, type=float, metavar='SECONDS', help='Keep running and translate again whenever a file or one of its imports changes (checking every SECONDS, default 1)')
     optionalArguments.add_argument('--nocond', action='store_true', help='Do not use conditionals (only applies to TPTP, LADR and LaTeX production)', default=False)
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
@@ -88,7 +108,14 @@ def clif_to_ladr():
 
     optionalArguments = parser.add_argument_group('optional arguments')
     optionalArguments.add_argument('-out', '--output', action='store_true', help='Write output to file', default=True)
+    optionalArguments.add_argument('--gzip', action='store_true', help='Compress the TPTP, LADR or LaTeX output file with gzip', default=False)
+    optionalArguments.add_argument('--quiet', action='store_true', help='Do not print the TPTP, LADR or LaTeX translation to stdout when writing it to a file', default=False)
+    optionalArguments.add_argument('--skip-unchanged', action='store_true', help='Leave the output file untouched if its content stays the same', default=False)
     optionalArguments.add_argument('--resolve', action="store_true", help='Automatically resolve imports', default=False)
+    optionalArguments.add_argument('--parallel', action="store_true", help='Resolve imports on several processes (only relevant when option --resolve is turned on)', default=False)
+    optionalArguments.add_argument('--cache', action="store_true", help='Load unchanged modules and their TPTP and LADR translations from (and store new ones in) the cache', default=False)
+    optionalArguments.add_argument('--engine', choices=Parser.ENGINES, help='Parsing engine: ply (default) or the faster hand-written descent engine', default='ply')
+    optionalArguments.add_argument('--watch', nargs='?', const=DEFAULT_INTERVAL, default=None, type=float, metavar='SECONDS', help='Keep running and translate again whenever a file or one of its imports changes (checking every SECONDS, default 1)')
     optionalArguments.add_argument('--nocond', action='store_true', help='Do not use conditionals (only applies to TPTP, LADR and LaTeX production)', default=False)
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
@@ -117,10 +144,16 @@ def clif_to_owl():
     optionalArguments = parser.add_argument_group('optional arguments')
     optionalArguments.add_argument('-out', '--output', action='store_true', help='Write output to file', default=True)
     optionalArguments.add_argument('--resolve', action="store_true", help='Automatically resolve imports', default=False)
+    optionalArguments.add_argument('--parallel', action="store_true", help='Resolve imports on several processes (only relevant when option --resolve is turned on)', default=False)
+    optionalArguments.add_argument('--cache', action="store_true", help='Load unchanged modules and their TPTP and LADR translations from (and store new ones in) the cache', default=False)
+    optionalArguments.add_argument('--engine', choices=Parser.ENGINES, help='Parsing engine: ply (default) or the faster hand-written descent engine', default='ply')
+    optionalArguments.add_argument('--watch', nargs='?', const=DEFAULT_INTERVAL, default=None, type=float, metavar='SECONDS', help='Keep running and translate again whenever a file or one of its imports changes (checking every SECONDS, default 1)')
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
     optionalArguments.add_argument('--ffpcnf', action='store_true', help='Automatically convert axioms to function-free prenex conjuntive normal form (FF-PCNF)', default=True)
     optionalArguments.add_argument('--clip', action='store_true', help='Split FF-PCNF axioms across the top level quantifier', default=False)
+    optionalArguments.add_argument('--cnf', choices=NormalForm.CNF_MODES, help='Conjunctive normal form of FF-PCNF axioms: naive (default) distributes disjunctions, definitional introduces new predicates for large subformulas', default=NormalForm.NAIVE)
+    optionalArguments.add_argument('--prenex', choices=NormalForm.PRENEX_MODES, help='Order of the quantifiers of FF-PCNF axioms where it is free: universals-first (default) or existentials-first', default=NormalForm.UNIVERSALS_FIRST)
 
     owlArgument = parser.add_mutually_exclusive_group()
     owlArgument.add_argument('--full', action='store_true', help='Translate to OWL2-Full', default=True)
@@ -150,6 +183,9 @@ def clif_to_owl():
     else:
         args.full = Owl.Profile.OWL2_FULL
 
+    args.gzip = False
+    args.quiet = False
+    args.skip_unchanged = False
     main(args)
 
 def clif_to_latex():
@@ -166,8 +202,15 @@ def clif_to_latex():
 
     optionalArguments = parser.add_argument_group('optional arguments')
     optionalArguments.add_argument('-out', '--output', action='store_true', help='Write output to file', default=True)
+    optionalArguments.add_argument('--gzip', action='store_true', help='Compress the TPTP, LADR or LaTeX output file with gzip', default=False)
+    optionalArguments.add_argument('--quiet', action='store_true', help='Do not print the TPTP, LADR or LaTeX translation to stdout when writing it to a file', default=False)
+    optionalArguments.add_argument('--skip-unchanged', action='store_true', help='Leave the output file untouched if its content stays the same', default=False)
     optionalArguments.add_argument('--enum', action='store_true', help='Enumerate axioms in LaTeX output', default=False)
     optionalArguments.add_argument('--resolve', action="store_true", help='Automatically resolve imports', default=False)
+    optionalArguments.add_argument('--parallel', action="store_true", help='Resolve imports on several processes (only relevant when option --resolve is turned on)', default=False)
+    optionalArguments.add_argument('--cache', action="store_true", help='Load unchanged modules and their TPTP and LADR translations from (and store new ones in) the cache', default=False)
+    optionalArguments.add_argument('--engine', choices=Parser.ENGINES, help='Parsing engine: ply (default) or the faster hand-written descent engine', default='ply')
+    optionalArguments.add_argument('--watch', nargs='?', const=DEFAULT_INTERVAL, default=None, type=float, metavar='SECONDS', help='Keep running and translate again whenever a file or one of its imports changes (checking every SECONDS, default 1)')
     optionalArguments.add_argument('-b', '--base', default=None, type=str, help='Path to directory containing ontology files (basepath; only relevant when option --resolve is turned on; can also be set in configuration file)')
     optionalArguments.add_argument('-s', '--sub', default=None, type=str, help='String to replace with basepath found in imports, only relevant when option --resolve is turned on')
 
@@ -205,7 +248,10 @@ def main(args):
     # TODO need to substitute base path
     full_path = args.file
 
-    if os.path.isfile(full_path):
+    if args.watch is not None and os.path.exists(full_path):
+        watch(full_path, args=args)
+
+    elif os.path.isfile(full_path):
         logging.getLogger(__name__).info("Starting to parse " + args.file)
         convert_file(full_path, args=args)
 
@@ -216,7 +262,20 @@ def main(args):
         logging.getLogger(__name__).error("Attempted to parse non-existent file or directory: " + full_path)
 
 
-def convert_file(file, args, preserve_conditionals = None):
+def parse_file(file, args):
+
+    cache = ParseCache() if args.cache else None
+
+    ontology = Parser.parse_file(file, args.sub, args.base, args.resolve, preserve_conditionals = conditionals, parallel = args.parallel, cache = cache, engine = args.engine)
+
+    if ontology is None:
+        # some error occurred while parsing CLIF file(s)
+        exit(-1)
+
+    return ontology
+
+
+def convert_file(file, args, preserve_conditionals = None, ontology = None):
 
     global conditionals
 
@@ -224,20 +283,24 @@ def convert_file(file, args, preserve_conditionals = None):
     if preserve_conditionals is not None:
         conditionals = preserve_conditionals
 
-    ontology = Parser.parse_file(file, args.sub, args.base, args.resolve, preserve_conditionals = conditionals)
-
+    # the ontology may have been parsed before, e.g. when watching it
     if ontology is None:
-        # some error occurred while parsing CLIF file(s)
-        exit(-1)
+        ontology = parse_file(file, args)
+
+    if args.cache:
+        ontology.fragments = FragmentCache()
 
     # producing OWL output
     if args.owl:
         # argument full has been used to store the OWL Profile
-        onto = ontology.to_owl(args.full)
+        onto = ontology.to_owl(args.full, args.cnf, args.prenex)
 
         print("\n-- Translation --\n")
         print(onto.tostring())
 
+        if args.cnf == NormalForm.DEFINITIONAL:
+            print("Introduced {} definitions".format(ontology.definitions))
+
         if args.output:
             # producing OWL file
             filename = ontology.write_owl_file()
@@ -246,10 +309,11 @@ def convert_file(file, args, preserve_conditionals = None):
     # producing TPTP ouput
     elif args.tptp:
 
-        print(ontology.to_tptp())
+        if not (args.quiet and args.output):
+            print(ontology.to_tptp())
 
         if args.output:
-            filename = ontology.write_tptp_file()
+            filename = ontology.write_tptp_file(args.gzip, skip_unchanged=args.skip_unchanged)
             logging.getLogger(__name__).info("Produced TPTP file " + filename)
             return filename
 
@@ -257,17 +321,18 @@ def convert_file(file, args, preserve_conditionals = None):
     # producing LADR output
     elif args.ladr:
 
-        print(ontology.to_ladr())
+        if not (args.quiet and args.output):
+            print(ontology.to_ladr())
 
         if args.output:
-            filename = ontology.write_ladr_file()
+            filename = ontology.write_ladr_file(args.gzip, skip_unchanged=args.skip_unchanged)
             logging.getLogger(__name__).info("Produced LADR file " + filename)
             return filename
 
     # producing LaTeX output
     elif args.latex:
         if args.output:
-            filename = ontology.write_latex_file(args.enum)
+            filename = ontology.write_latex_file(args.enum, args.gzip, echo=not args.quiet, skip_unchanged=args.skip_unchanged)
             logging.getLogger(__name__).info("Produced LaTeX file " + filename)
             return filename
         else:
@@ -275,12 +340,18 @@ def convert_file(file, args, preserve_conditionals = None):
 
     # Just converting to Function-free Prenex-Conjunctive-Normalform
     elif args.ffpcnf:
-        print(ontology.to_ffpcnf())
+        print(ontology.to_ffpcnf(args.cnf, args.prenex))
+
+        if args.cnf == NormalForm.DEFINITIONAL:
+            print("Introduced {} definitions".format(ontology.definitions))
 
     return ontology
 
 
-def convert_folder(folder, args):
+def clif_files(folder):
+    '''
+    All CLIF files in a folder and its subfolders, except for the temporary folder
+    '''
 
     tempfolder = macleod.Filemgt.read_config('converters', 'tempfolder')
     ignores = [tempfolder]
@@ -293,9 +364,39 @@ def convert_folder(folder, args):
         else:
             for single_file in files:
                 if single_file.endswith(cl_ending):
-                    file = os.path.join(directory, single_file)
-                    logging.getLogger(__name__).info("Parsing CLIF file " + file)
-                    convert_file(file, args=args)
+                    yield os.path.join(directory, single_file)
+
+
+def convert_folder(folder, args):
+
+    # Share the parsed imports between all files of the folder, without keeping all of them alive
+    registry = ModuleRegistry()
+
+    with registry.scope():
+        for file in clif_files(folder):
+            logging.getLogger(__name__).info("Parsing CLIF file " + file)
+            convert_file(file, args=args)
+
+    logging.getLogger(__name__).info("Shared imports: {}".format(registry))
+
+
+def watch(path, args):
+    '''
+    Convert a file or all files of a folder, then keep the parsed ontologies in
+    memory and convert those again whose file or imports change
+    '''
+
+    # The parsed imports are shared through the registry of the watcher
+    watcher = Watcher(ModuleRegistry(), args.watch, conditionals)
+
+    with watcher.registry.scope():
+        for file in clif_files(path) if os.path.isdir(path) else [path]:
+            logging.getLogger(__name__).info("Parsing CLIF file " + file)
+            ontology = parse_file(file, args)
+            watcher.watch(ontology)
+            convert_file(file, args=args, ontology=ontology)
+
+    watcher.run(lambda ontology: convert_file(ontology.name, args=args, ontology=ontology))
 
 
 if __name__ == '__main__':
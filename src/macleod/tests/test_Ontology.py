@@ -1,9 +1,20 @@
+import contextlib
+import gzip
+import io
+import os
+import sys
+import tempfile
 import unittest
 
 from macleod.logical.symbol import (Function, Predicate)
 from macleod.logical.axiom import Axiom
 from macleod.logical.quantifier import (Universal, Existential, Quantifier)
 import macleod.Ontology as Ontology
+from macleod.parsing.cache import FragmentCache
+from macleod.parsing.parser import parse_file
+
+# The module, which the package shadows by the class of the same name
+OntologyModule = sys.modules['macleod.Ontology']
 
 class OnologyTest(unittest.TestCase):
     """
@@ -21,5 +32,149 @@ class OnologyTest(unittest.TestCase):
         onto.axioms.append(subclass_relation)
         print(onto.to_owl())
 
+    def test_closure(self):
+
+        a = Predicate('A', ['x'])
+        b = Predicate('B', ['x'])
+
+        root = Ontology('root.clif', basepath=('http://x/', '/tmp/'))
+        middle = Ontology('middle.clif', basepath=('http://x/', '/tmp/'))
+        leaf = Ontology('leaf.clif', basepath=('http://x/', '/tmp/'))
+
+        root.add_axiom(Universal(['x'], a | b))
+        middle.add_axiom(Universal(['x'], ~a))
+        leaf.add_axiom(Existential(['x'], b))
+
+        # root imports middle and leaf, middle imports leaf and (cyclically) root
+        root.imports = {'http://x/middle.clif': middle, 'http://x/leaf.clif': leaf}
+        middle.imports = {'http://x/leaf.clif': leaf, 'http://x/root.clif': root}
+        root.resolve = True
+
+        closure = root.get_closure()
+        self.assertEqual(closure.modules, [root, middle, leaf])
+        self.assertEqual(closure.paths, [root.name, 'http://x/middle.clif', 'http://x/leaf.clif'])
+        self.assertEqual(list(closure.provenance), [0, 1, 2])
+        self.assertEqual([path for _, path in root.get_imported_axioms()], ['http://x/middle.clif', 'http://x/leaf.clif'])
+
+        # The index is reused until a module of the closure changes
+        self.assertIs(root.get_closure(), closure)
+        self.assertIs(root.get_symbol_table(), root.get_symbol_table())
+
+        leaf.add_axiom(Universal(['x'], a))
+        self.assertIsNot(root.get_closure(), closure)
+        self.assertEqual(len(root.get_all_axioms()), 4)
+        self.assertEqual(root.get_closure().module_axioms(2), leaf.axioms)
+
+        middle.axioms.append(leaf.axioms[0])
+        self.assertEqual(len(root.get_all_axioms()), 5)
+
+    def test_parallel_imports(self):
+
+        def resolve(modules, parallel):
+            # A folder of its own, so that no module is reused from an earlier resolution
+            folder = tempfile.TemporaryDirectory()
+            self.addCleanup(folder.cleanup)
+            for name, imports in modules.items():
+                with open(os.path.join(folder.name, name + '.clif'), 'w') as f:
+                    f.write('(cl-text http://x/{}.clif\n'.format(name))
+                    for other in imports:
+                        f.write('(cl-imports http://x/{}.clif)\n'.format(other))
+                    f.write('(forall (x) ({} x))\n)\n'.format(name.upper()))
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                ontology = parse_file(os.path.join(folder.name, 'top.clif'), 'http://x/', folder.name + '/', resolve=True, parallel=parallel)
+            names = sorted(os.path.basename(module.name) for module in ontology.get_all_modules())
+            return names, output.getvalue().replace(folder.name, '')
+
+        # Both b and c import d in the same level, which is not a cycle
+        diamond = {'top': ['b', 'c'], 'b': ['d'], 'c': ['d'], 'd': []}
+        self.assertEqual(resolve(diamond, True), (['b.clif', 'c.clif', 'd.clif', 'top.clif'], ''))
+
+        # A cycle is reported as by the sequential resolution
+        cycle = {'top': ['b'], 'b': ['top']}
+        names, output = resolve(cycle, True)
+        self.assertIn('Cyclic import found', output)
+        self.assertEqual((names, output), resolve(cycle, False))
+
+    def test_fragments(self):
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+
+        def module(name, predicate):
+            ontology = Ontology(name, basepath=('http://x/', '/tmp/'))
+            ontology.add_axiom(Universal(['x'], Predicate(predicate, ['x'])))
+            ontology.set_digest(name)
+            ontology.fragments = FragmentCache(folder.name, 1)
+            return ontology
+
+        first = module('module.clif', 'A')
+        self.assertEqual(first.to_tptp(), ['fof({}, axiom, (! [X] :  (a(X)))).'.format(first.axioms[0].get_name())])
+        self.assertEqual(first.to_ladr(), ['(all x  A(x)).'])
+
+        # The same module content is translated only once
+        second = module('module.clif', 'B')
+        self.assertEqual(second.to_tptp(), first.to_tptp())
+
+        # Changed axioms are translated again
+        second.add_axiom(Predicate('C', ['c']))
+        second.tptp_output = None
+        self.assertEqual(second.to_tptp()[1], 'fof({}, axiom, c(c)).'.format(second.axioms[1].get_name()))
+        self.assertEqual(second.to_ladr(), ['(all x  B(x)).', 'C(c).'])
+
+    def test_streaming(self):
+
+        ontology = Ontology('module.clif', basepath=('http://x/', '/tmp/'))
+        ontology.add_axiom(Universal(['x'], Predicate('A', ['x'])))
+        ontology.add_axiom(Predicate('B', ['c']))
+
+        self.assertEqual(list(ontology.iter_ladr()), ['(all x  A(x)).', 'B(c).'])
+        self.assertEqual(list(ontology.iter_tptp()), ontology.to_tptp())
+        self.assertEqual(list(ontology.iter_latex()), ontology.to_latex())
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        filename = os.path.join(folder.name, 'module.tptp.gz')
+
+        with OntologyModule.open_output(filename, compress=True) as f:
+            for sentence in ontology.iter_tptp():
+                f.write(sentence + "\n")
+
+        with gzip.open(filename, 'rt') as f:
+            self.assertEqual(f.read().splitlines(), ontology.to_tptp())
+
+    def test_unchanged_output(self):
+
+        # The names of the axioms only depend on their content
+        ontology = Ontology('module.clif', basepath=('http://x/', '/tmp/'))
+        ontology.add_axiom(Predicate('B', ['c']))
+        ontology.add_axiom(Universal(['x'], Predicate('A', ['x'])))
+        ontology.add_axiom(Predicate('B', ['c']))
+
+        name = ontology.axioms[0].get_name()
+        self.assertEqual([x.split(',')[0] for x in ontology.to_tptp()], ['fof(' + name, 'fof(' + ontology.axioms[1].get_name(), 'fof(' + name + '_2'])
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        filename = os.path.join(folder.name, 'module.tptp')
+
+        def write(sentences):
+            with OntologyModule.open_output(filename, skip_unchanged=True) as f:
+                for sentence in sentences:
+                    f.write(sentence + "\n")
+            return f.changed
+
+        self.assertTrue(write(ontology.iter_tptp()))
+        os.utime(filename, (0, 0))
+
+        self.assertFalse(write(ontology.iter_tptp()))
+        self.assertEqual(os.stat(filename).st_mtime, 0)
+        self.assertEqual(os.listdir(folder.name), ['module.tptp'])
+
+        self.assertTrue(write(ontology.to_tptp()[1:]))
+        with open(filename) as f:
+            self.assertEqual(f.read().splitlines(), ontology.to_tptp()[1:])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,202 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import macleod.Ontology as Ontology
+import macleod.Process as Process
+import macleod.Reasoner
+from macleod.parsing.cache import ResultCache
+
+class Reasoner(macleod.Reasoner.Reasoner):
+    '''
+    Stand-in for a configured reasoner that runs a shell command
+    '''
+
+    def __init__(self, name, command, output_file, reasoner_type=macleod.Reasoner.Reasoner.PROVER, timeout=60):
+
+        self.name = name
+        self.identifier = name
+        self.type = reasoner_type
+        self.args = ['sh', '-c', command]
+        self.output_file = output_file
+        self.ontology = None
+        self.timeout = str(timeout)
+        self.timeout_position = None
+        self.time = -1
+        self.output = None
+
+@unittest.skipIf(os.name == 'nt', 'uses a POSIX shell')
+class ProcessTest(unittest.TestCase):
+
+    def setUp(self):
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def test_race(self):
+
+        finder = Reasoner('mace4', 'echo "Exiting with 1 model."', os.path.join(self.folder, 'mace4.out'), macleod.Reasoner.Reasoner.MODEL_FINDER)
+        # Starts a process of its own, which has to be killed with the reasoner
+        prover = Reasoner('prover9', 'sleep 30 & sleep 30', os.path.join(self.folder, 'prover9.out'))
+
+        started = time.monotonic()
+        reasoners = Process.raceProcesses([prover, finder])
+
+        # The losing reasoner is killed as soon as the model is found
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertGreaterEqual(finder.time, 0)
+
+        with open(finder.output_file) as f:
+            output = f.read()
+            self.assertIn('status: MODEL', output)
+            self.assertIn('peak memory used: ', output)
+        with open(prover.output_file) as f:
+            self.assertIn('status: ABORTED', f.read())
+
+        ontology = Ontology('race.clif', basepath=('http://x/', self.folder))
+        self.assertEqual(ontology.consolidate_results(reasoners), (Ontology.CONSISTENT, finder))
+
+    def test_race_many(self):
+
+        def reasoners(key):
+            finder = Reasoner('mace4', 'sleep 0.3; echo "Exiting with 1 model."', os.path.join(self.folder, key + '.mace4.out'), macleod.Reasoner.Reasoner.MODEL_FINDER)
+            prover = Reasoner('prover9', 'sleep 30', os.path.join(self.folder, key + '.prover9.out'))
+            return [finder, prover]
+
+        started = time.monotonic()
+        results = Process.raceMany(((key, reasoners(key)) for key in ['a', 'b', 'c']), max_parallel_reasoners=2)
+
+        # With two slots the races run one after the other, each decided by its model finder
+        self.assertEqual([key for key, _ in results], ['a', 'b', 'c'])
+        self.assertGreater(time.monotonic() - started, 0.8)
+        self.assertLess(time.monotonic() - started, 10)
+
+        # A reasoner still waiting for a slot is not started once the race is decided
+        finder, prover = reasoners('d')
+        [(_, (finder, prover))] = Process.raceMany([('d', [finder, prover])], max_parallel_reasoners=1)
+
+        self.assertTrue(finder.terminatedSuccessfully())
+        with open(prover.output_file) as f:
+            self.assertIn('status: CANCELLED', f.read())
+
+    def test_race_wide(self):
+
+        # More reasoners than threads in the default executor: the exit of each one is noticed right away
+        provers = [Reasoner('prover9', 'sleep 30', os.path.join(self.folder, str(i) + '.prover9.out')) for i in range(40)]
+        finder = Reasoner('mace4', 'sleep 0.3; echo "Exiting with 1 model."', os.path.join(self.folder, 'mace4.out'), macleod.Reasoner.Reasoner.MODEL_FINDER)
+
+        started = time.monotonic()
+        Process.raceProcesses(provers + [finder])
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertTrue(finder.terminatedSuccessfully())
+
+    def test_memory_limit(self):
+
+        # Reserving more virtual memory than the limit is fine as long as little of it is used
+        reserves = '"{}" -c "import mmap, time; m = mmap.mmap(-1, 1 << 30); time.sleep(1.5)" && echo "Exiting with 1 model."'.format(sys.executable)
+        finder = Reasoner('mace4', reserves, os.path.join(self.folder, 'mace4.out'), macleod.Reasoner.Reasoner.MODEL_FINDER)
+
+        with mock.patch.object(Process, 'memory_limit', return_value=64):
+            Process.raceProcesses([finder])
+
+        self.assertTrue(finder.terminatedSuccessfully())
+
+        # Using more resident memory than the limit is not
+        uses = '"{}" -c "import time; m = b\'x\' * (256 << 20); time.sleep(30)"'.format(sys.executable)
+        prover = Reasoner('prover9', uses, os.path.join(self.folder, 'prover9.out'))
+
+        started = time.monotonic()
+        with mock.patch.object(Process, 'memory_limit', return_value=64):
+            Process.raceProcesses([prover])
+
+        self.assertLess(time.monotonic() - started, 10)
+        with open(prover.output_file) as f:
+            self.assertIn('status: ALLOTED MEMORY EXCEEDED: 64MB', f.read())
+
+    @unittest.skipIf(Process.resource is None, 'no resource limits')
+    def test_time_limit(self):
+
+        # The kernel stops the reasoner once it has used up its CPU time
+        prover = Reasoner('prover9', 'while :; do :; done', os.path.join(self.folder, 'prover9.out'), timeout=1)
+
+        Process.raceProcesses([prover])
+
+        with open(prover.output_file) as f:
+            output = f.read()
+            self.assertIn('status: ALLOTED TIME EXCEEDED: 1 seconds', output)
+            self.assertRegex(output, r'total CPU time used: [0-9.]+\n')
+
+    def test_proc_stat(self):
+
+        self.assertGreater(Process.get_memory(os.getpid()), 0)
+        self.assertGreaterEqual(Process.get_cputime(os.getpid()), 0)
+        self.assertEqual(Process.get_memory(-1), 0)
+        self.assertEqual(Process.get_session_memory(-1), 0)
+
+    def test_results(self):
+
+        results = ResultCache(folder=os.path.join(self.folder, 'cache'))
+        input_file = os.path.join(self.folder, 'input.in')
+        marker = input_file + '.ran'
+
+        with open(input_file, 'w') as f:
+            f.write('formulas(sos).\nend_of_list.\n')
+
+        def reasoners(finds, timeout=60):
+            finder = Reasoner('mace4', 'touch "$0.ran"; ' + ('echo "Exiting with 1 model."' if finds else 'exit 2'), os.path.join(self.folder, 'mace4.out'), macleod.Reasoner.Reasoner.MODEL_FINDER, timeout)
+            # The time limit is an argument too, which does not change the key of the result
+            finder.args += [input_file, '-t' + str(timeout)]
+            finder.timeout_position = 4
+            prover = Reasoner('prover9', 'sleep 30', os.path.join(self.folder, 'prover9.out'), timeout=timeout)
+            return [finder, prover]
+
+        Process.raceProcesses(reasoners(True), results)
+        os.remove(marker)
+
+        # A decisive result on the same input is reused without starting any reasoner
+        finder, prover = Process.raceProcesses(reasoners(True), results)
+
+        self.assertFalse(os.path.exists(marker))
+        self.assertTrue(finder.terminatedSuccessfully())
+        with open(finder.output_file) as f:
+            self.assertIn('status: CACHED MODEL', f.read())
+        with open(prover.output_file) as f:
+            self.assertIn('status: CANCELLED', f.read())
+
+        # A different input runs the reasoners again
+        with open(input_file, 'a') as f:
+            f.write('formulas(goals).\nend_of_list.\n')
+
+        Process.raceProcesses([reasoners(False, 1)[0]], results)
+        self.assertTrue(os.path.exists(marker))
+        os.remove(marker)
+
+        # An unknown result is reused with the same time limit, but not with a longer one
+        [finder] = Process.raceProcesses([reasoners(False, 1)[0]], results)
+        self.assertFalse(os.path.exists(marker))
+        self.assertTrue(finder.terminatedUnknowingly())
+
+        Process.raceProcesses([reasoners(False, 2)[0]], results)
+        self.assertTrue(os.path.exists(marker))
+
+        self.assertEqual(results.clear(unknown=True), 1)
+        self.assertEqual(results.clear(), 1)
+
+    def test_missing_reasoner(self):
+
+        missing = Reasoner('vampire', '', os.path.join(self.folder, 'vampire.out'))
+        missing.args = [os.path.join(self.folder, 'vampire')]
+        finder = Reasoner('mace4', 'exit 2', os.path.join(self.folder, 'mace4.out'), macleod.Reasoner.Reasoner.MODEL_FINDER)
+
+        Process.raceProcesses([missing, finder])
+
+        self.assertTrue(finder.terminatedUnknowingly())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+
+import macleod.Ontology as Ontology
+from macleod.Repository import Repository
+
+class Checked(Repository):
+    '''
+    Repository whose modules are checked by their name instead of by reasoners
+    '''
+
+    def __init__(self, *args, **kwargs):
+
+        Repository.__init__(self, *args, **kwargs)
+        self.checked = []
+
+    def run(self, ontologies, max_parallel_reasoners=None):
+
+        names = [os.path.basename(x.name) for x in ontologies]
+        self.checked.append(names)
+
+        for ontology, name in zip(ontologies, names):
+            yield (ontology, Ontology.INCONSISTENT if name.startswith('bad') else Ontology.CONSISTENT, None, 0.0)
+
+class RepositoryTest(unittest.TestCase):
+
+    def setUp(self):
+
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def write(self, name, text):
+
+        path = os.path.join(self.folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, 'w') as f:
+            f.write('(cl-text http://x/{} {})'.format(name, text))
+
+        return path
+
+    def test_levels(self):
+
+        self.write('base.clif', '(forall (x) (A x))')
+        self.write('bad.clif', '(forall (x) (B x))')
+        self.write('sub/mid.clif', '(cl-imports http://x/base.clif) (forall (x) (C x))')
+        self.write('top.clif', '(cl-imports http://x/sub/mid.clif) (cl-imports http://x/bad.clif) (forall (x) (D x))')
+        self.write('one.clif', '(cl-imports http://x/two.clif) (forall (x) (E x))')
+        self.write('two.clif', '(cl-imports http://x/one.clif) (forall (x) (F x))')
+        # Generated files are not modules of the repository
+        self.write('output/base.clif', '(forall (x) (A x))')
+
+        repository = Checked(self.folder, 'http://x/', self.folder + os.sep)
+        results = dict((os.path.basename(x['module']), x) for x in repository.check())
+
+        self.assertEqual([[os.path.basename(x) for x in level] for level in repository.levels()],
+                         [['bad.clif', 'base.clif'], ['mid.clif'], ['top.clif'], ['one.clif', 'two.clif']])
+
+        # The importer of an inconsistent module is not checked
+        self.assertEqual(repository.checked, [['bad.clif', 'base.clif'], ['mid.clif'], [], ['one.clif', 'two.clif']])
+        self.assertEqual(results['top.clif']['result'], 'inconsistent')
+        self.assertEqual(results['top.clif']['propagated_from'], os.path.join(self.folder, 'bad.clif'))
+        self.assertEqual(results['mid.clif']['result'], 'consistent')
+
+        summary = repository.summary()
+        self.assertEqual(summary['modules'], 6)
+        self.assertEqual(summary['propagated'], 1)
+        self.assertEqual(summary['counts']['consistent'], 4)
+        self.assertEqual(summary['counts']['inconsistent'], 2)
+        self.assertIn('check', summary['timings'])
+
+        filename = repository.write_summary(os.path.join(self.folder, 'summary.json'))
+        with open(filename) as f:
+            self.assertEqual(json.load(f)['counts'], summary['counts'])
+
+
+if __name__ == '__main__':
+    unittest.main()